@@ -0,0 +1,6 @@
+"""Pacote de apoio aos POCs de correção automática com LangGraph + Gemini.
+
+Os scripts ``poc-*.py`` deste diretório continuam sendo os pontos de entrada;
+este pacote concentra o que precisa ser importado por mais de um deles
+(estado do grafo, prompt, chamada à LLM e execução em lote).
+"""
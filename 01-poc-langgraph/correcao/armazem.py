@@ -0,0 +1,262 @@
+# Armazém de resultados (SQLite) para relatórios da turma.
+#
+# Cada correção vira uma linha (só acréscimos: recorrigir gera uma linha
+# nova) com as colunas que os relatórios usam já separadas — exercício,
+# aluno, veredito, nota média, modelo, tokens, custo, latência — e tabelas
+# auxiliares com as categorias de falha e as notas por critério, todas
+# indexadas. Assim, distribuição de vereditos, falhas mais comuns e
+# histórico de um aluno saem de consultas agregadas, sem reler o texto do
+# feedback. ``ultimas`` aponta para a correção mais recente de cada
+# submissão; os relatórios da turma olham só para ela.
+#
+# As gravações são acumuladas em memória e feitas em lote (uma transação
+# com ``executemany``), a cada ``lote`` resultados ou ``intervalo_s`` segundos.
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS correcoes (
+    id INTEGER PRIMARY KEY,
+    execucao TEXT NOT NULL,
+    submissao TEXT NOT NULL,
+    exercicio TEXT NOT NULL,
+    aluno TEXT NOT NULL,
+    veredito TEXT NOT NULL,
+    nota REAL,
+    erro TEXT,
+    modelo TEXT,
+    tokens_entrada INTEGER NOT NULL,
+    tokens_saida INTEGER NOT NULL,
+    custo_usd REAL NOT NULL,
+    duracao_s REAL NOT NULL,
+    reaproveitada INTEGER NOT NULL,
+    representante TEXT,
+    criado_em REAL NOT NULL,
+    feedback TEXT NOT NULL,
+    avaliacao TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_correcoes_exercicio ON correcoes (exercicio, veredito);
+CREATE INDEX IF NOT EXISTS idx_correcoes_aluno ON correcoes (aluno, criado_em);
+CREATE INDEX IF NOT EXISTS idx_correcoes_execucao ON correcoes (execucao);
+CREATE TABLE IF NOT EXISTS falhas (
+    correcao_id INTEGER NOT NULL,
+    exercicio TEXT NOT NULL,
+    categoria TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_falhas_correcao ON falhas (correcao_id);
+CREATE INDEX IF NOT EXISTS idx_falhas_categoria ON falhas (exercicio, categoria);
+CREATE TABLE IF NOT EXISTS notas (
+    correcao_id INTEGER NOT NULL,
+    criterio TEXT NOT NULL,
+    nota REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notas_correcao ON notas (correcao_id);
+CREATE TABLE IF NOT EXISTS ultimas (
+    submissao TEXT PRIMARY KEY,
+    correcao_id INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ultimas_correcao ON ultimas (correcao_id);
+"""
+
+COLUNAS_EXPORTACAO = (
+    "submissao", "exercicio", "aluno", "veredito", "nota", "erro", "modelo", "tokens_entrada",
+    "tokens_saida", "custo_usd", "duracao_s", "reaproveitada", "representante", "execucao", "criado_em",
+)
+
+
+def exercicio_e_aluno(submissao_id, pasta=None, enunciado_path=None):
+    """Separa o id da submissão em ``(exercicio, aluno)``.
+
+    Com a pasta e o enunciado, o exercício é a pasta do enunciado (relativa à
+    raiz) e o aluno, o resto do caminho; no layout ``casoN/`` (enunciado junto
+    do código) os dois são o próprio id. Sem eles, o último componente do id é
+    o aluno.
+    """
+    if pasta is not None and enunciado_path is not None:
+        resto = os.path.relpath(pasta, os.path.dirname(enunciado_path)).replace(os.sep, "/")
+        if resto == ".":
+            return submissao_id, submissao_id
+        if submissao_id.endswith(resto):
+            return submissao_id[:-len(resto)].rstrip("/") or ".", resto
+    exercicio, _, aluno = submissao_id.rpartition("/")
+    return exercicio or ".", aluno
+
+
+def _nota_media(avaliacao):
+    notas = [n["nota"] for n in (avaliacao or {}).get("notas_criterios") or []]
+    return sum(notas) / len(notas) if notas else None
+
+
+class ArmazemResultados:
+    """Armazém SQLite dos resultados, com gravação em lote e consultas para a turma.
+
+    Seguro para várias threads; vários processos podem gravar no mesmo
+    arquivo (cada lote é uma transação ``BEGIN IMMEDIATE``).
+    """
+
+    def __init__(self, caminho, execucao=None, lote=500, intervalo_s=2.0):
+        self.caminho = caminho
+        self.execucao = execucao or time.strftime("%Y%m%dT%H%M%S-") + uuid.uuid4().hex[:6]
+        self.lote = lote
+        self.intervalo_s = intervalo_s
+        self._pendentes = []
+        self._ultima_gravacao = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    # Gravação
+
+    def registrar(self, resultado, submissao=None):
+        """Acumula um ``ResultadoSubmissao``; grava quando o lote enche ou o intervalo passa."""
+        exercicio, aluno = exercicio_e_aluno(resultado.id, getattr(submissao, "pasta", None),
+                                             getattr(submissao, "enunciado_path", None))
+        with self._lock:
+            self._pendentes.append((resultado, exercicio, aluno, time.time()))
+            if len(self._pendentes) >= self.lote or time.monotonic() - self._ultima_gravacao >= self.intervalo_s:
+                self._gravar()
+
+    def registrar_varios(self, resultados, submissoes=None):
+        """Carga em massa (ex.: exportar uma fila ou um JSONL antigo)."""
+        por_id = {s.id: s for s in submissoes or []}
+        for resultado in resultados:
+            self.registrar(resultado, por_id.get(resultado.id))
+        self.gravar()
+
+    def gravar(self):
+        with self._lock:
+            self._gravar()
+
+    def _gravar(self):
+        self._ultima_gravacao = time.monotonic()
+        if not self._pendentes:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        pendentes, self._pendentes = self._pendentes, []
+        try:
+            proximo = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM correcoes").fetchone()[0]
+            correcoes, falhas, notas, ultimas = [], [], [], []
+            for i, (r, exercicio, aluno, criado_em) in enumerate(pendentes):
+                id_ = proximo + i
+                veredito = "Erro" if r.erro else (r.avaliacao_status or "Indefinido")
+                correcoes.append((
+                    id_, self.execucao, r.id, exercicio, aluno, veredito, _nota_media(r.avaliacao_estruturada),
+                    r.erro, r.modelo, r.tokens_entrada, r.tokens_saida, r.custo_usd, r.duracao_s,
+                    int(r.retomada), r.representante, criado_em, r.feedback_bruto,
+                    json.dumps(r.avaliacao_estruturada, ensure_ascii=False) if r.avaliacao_estruturada else None,
+                ))
+                categorias = r.categorias_falha or ([f"erro:{r.erro.split(':', 1)[0]}"] if r.erro else [])
+                falhas.extend((id_, exercicio, c) for c in categorias)
+                notas.extend((id_, n["criterio"], n["nota"])
+                             for n in (r.avaliacao_estruturada or {}).get("notas_criterios") or [])
+                ultimas.append((r.id, id_))
+            self._conn.executemany(f"INSERT INTO correcoes VALUES ({', '.join('?' * 18)})", correcoes)
+            self._conn.executemany("INSERT INTO falhas VALUES (?, ?, ?)", falhas)
+            self._conn.executemany("INSERT INTO notas VALUES (?, ?, ?)", notas)
+            self._conn.executemany("INSERT OR REPLACE INTO ultimas VALUES (?, ?)", ultimas)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            self._pendentes = pendentes + self._pendentes
+            raise
+
+    # Consultas (sempre sobre a correção mais recente de cada submissão, salvo o histórico)
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, parametros)
+            nomes = [d[0] for d in cursor.description]
+            return [dict(zip(nomes, linha)) for linha in cursor.fetchall()]
+
+    @staticmethod
+    def _filtro(exercicio, execucao, prefixo="c"):
+        condicoes, parametros = [], []
+        if exercicio is not None:
+            condicoes.append(f"{prefixo}.exercicio = ?")
+            parametros.append(exercicio)
+        if execucao is not None:
+            condicoes.append(f"{prefixo}.execucao = ?")
+            parametros.append(execucao)
+        return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+    def distribuicao_vereditos(self, exercicio=None, execucao=None):
+        """``{exercicio: {veredito: quantidade}}``."""
+        where, parametros = self._filtro(exercicio, execucao)
+        distribuicao = {}
+        for linha in self._consultar(
+            "SELECT c.exercicio, c.veredito, COUNT(*) AS n FROM ultimas u JOIN correcoes c ON c.id = u.correcao_id"
+            f"{where} GROUP BY c.exercicio, c.veredito ORDER BY c.exercicio, n DESC", parametros,
+        ):
+            distribuicao.setdefault(linha["exercicio"], {})[linha["veredito"]] = linha["n"]
+        return distribuicao
+
+    def falhas_frequentes(self, exercicio=None, execucao=None, limite=10):
+        """``[{"categoria", "n", "fracao"}]`` das categorias de falha mais comuns."""
+        where, parametros = self._filtro(exercicio, execucao)
+        total = self._consultar(
+            f"SELECT COUNT(*) AS n FROM ultimas u JOIN correcoes c ON c.id = u.correcao_id{where}", parametros,
+        )[0]["n"]
+        linhas = self._consultar(
+            "SELECT f.categoria, COUNT(*) AS n FROM ultimas u JOIN correcoes c ON c.id = u.correcao_id "
+            f"JOIN falhas f ON f.correcao_id = c.id{where} GROUP BY f.categoria ORDER BY n DESC, f.categoria LIMIT ?",
+            parametros + [limite],
+        )
+        for linha in linhas:
+            linha["fracao"] = linha["n"] / total if total else 0.0
+        return linhas
+
+    def resumo_exercicios(self, execucao=None):
+        """Por exercício: submissões, nota média, tokens, custo e latência média."""
+        where, parametros = self._filtro(None, execucao)
+        return self._consultar(
+            "SELECT c.exercicio, COUNT(*) AS submissoes, AVG(c.nota) AS nota_media, "
+            "SUM(c.veredito = 'Certo') AS certas, SUM(c.erro IS NOT NULL) AS erros, "
+            "SUM(c.tokens_entrada) AS tokens_entrada, SUM(c.tokens_saida) AS tokens_saida, "
+            "SUM(c.custo_usd) AS custo_usd, AVG(c.duracao_s) AS duracao_media_s "
+            f"FROM ultimas u JOIN correcoes c ON c.id = u.correcao_id{where} GROUP BY c.exercicio ORDER BY c.exercicio",
+            parametros,
+        )
+
+    def historico_aluno(self, aluno, exercicio=None):
+        """Todas as correções do aluno, da mais antiga à mais recente, com as categorias de falha."""
+        parametros = [aluno] + ([exercicio] if exercicio is not None else [])
+        linhas = self._consultar(
+            f"SELECT c.id, {', '.join(f'c.{c}' for c in COLUNAS_EXPORTACAO)}, "
+            "(SELECT GROUP_CONCAT(f.categoria, ',') FROM falhas f WHERE f.correcao_id = c.id) AS categorias "
+            "FROM correcoes c WHERE c.aluno = ?" + (" AND c.exercicio = ?" if exercicio is not None else "")
+            + " ORDER BY c.criado_em, c.id",
+            parametros,
+        )
+        for linha in linhas:
+            linha["categorias"] = linha["categorias"].split(",") if linha["categorias"] else []
+        return linhas
+
+    def exportar(self, caminho, execucao=None):
+        """Exporta a correção mais recente de cada submissão em CSV ou JSONL (pela extensão); retorna quantas."""
+        where, parametros = self._filtro(None, execucao)
+        linhas = self._consultar(
+            f"SELECT {', '.join(f'c.{c}' for c in COLUNAS_EXPORTACAO)}, c.feedback "
+            f"FROM ultimas u JOIN correcoes c ON c.id = u.correcao_id{where} ORDER BY c.exercicio, c.aluno",
+            parametros,
+        )
+        with open(caminho, "w", encoding="utf-8", newline="") as f:
+            if caminho.endswith(".csv"):
+                escritor = csv.DictWriter(f, fieldnames=[*COLUNAS_EXPORTACAO, "feedback"])
+                escritor.writeheader()
+                escritor.writerows(linhas)
+            else:
+                for linha in linhas:
+                    f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+        return len(linhas)
+
+    def close(self):
+        with self._lock:
+            self._gravar()
+            self._conn.close()
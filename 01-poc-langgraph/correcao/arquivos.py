@@ -0,0 +1,97 @@
+# Leitura dos arquivos de enunciado e de código do aluno.
+#
+# Os arquivos chegam com codificações misturadas (IDEs no Windows ainda gravam
+# em cp1252/Latin-1): ``decodificar`` detecta a codificação e normaliza o
+# texto, para que o mesmo código dê o mesmo prompt (e o mesmo hash de cache)
+# qualquer que seja o editor do aluno.
+
+import codecs
+import os
+import re
+import unicodedata
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def parece_binario(dados):
+    """Bytes com NUL no início (e sem BOM de UTF-16): .class, imagens, executáveis..."""
+    return b"\0" in dados[:8192] and not dados.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE))
+
+
+def decodificar(dados):
+    """Decodifica bytes de um arquivo texto; devolve ``(texto, codificacao)``.
+
+    Tenta o BOM, depois UTF-8 estrito e, por fim, cp1252 (o "Latin-1" do
+    Windows; os poucos bytes que ele não define caem em latin-1, que aceita
+    qualquer byte). O texto sai sem BOM, com quebras de linha ``\n`` e em
+    Unicode NFC.
+    """
+    for bom, codificacao in _BOMS:
+        if dados.startswith(bom):
+            texto = dados.decode(codificacao, errors="replace")
+            break
+    else:
+        for codificacao in ("utf-8", "cp1252", "latin-1"):
+            try:
+                texto = dados.decode(codificacao)
+                break
+            except UnicodeDecodeError:
+                continue
+    texto = texto.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+    return unicodedata.normalize("NFC", texto), codificacao
+
+
+def read_file_content(file_path: str) -> str:
+    """Lê o conteúdo de um arquivo texto, detectando a codificação (ver ``decodificar``).
+
+    Diferente da versão dos scripts, não encerra o processo: erros de leitura
+    sobem como exceção para que o chamador decida (ex.: registrar a falha de
+    um aluno e seguir com o lote).
+    """
+    with open(file_path, 'rb') as f:
+        return decodificar(f.read())[0]
+
+
+def read_and_concat_java_files(file_paths):
+    """Lê múltiplos arquivos Java e concatena com delimitadores para o LLM."""
+    return concatenar_arquivos_java({os.path.basename(p): read_file_content(p) for p in file_paths})
+
+
+def concatenar_arquivos_java(arquivos):
+    """Concatena um dict nome do arquivo -> conteúdo com os delimitadores de ``read_and_concat_java_files``."""
+    partes = []
+    for nome, conteudo in arquivos.items():
+        partes.append(f"// --- ARQUIVO INÍCIO: {nome} ---\n")
+        partes.append(conteudo.strip() + "\n")
+        partes.append(f"// --- ARQUIVO FIM: {nome} ---\n\n")
+    return "".join(partes)
+
+
+_CLASSE_PUBLICA_RE = re.compile(r"\bpublic\s+(?:(?:abstract|final)\s+)*(?:class|interface|enum|record)\s+(\w+)")
+
+
+def separar_arquivos_java(codigo):
+    """Inverso de ``read_and_concat_java_files``: devolve dict nome do arquivo -> conteúdo.
+
+    Código sem delimitadores (ex.: colado direto no script) vira um único
+    arquivo com o nome da classe pública, como o ``javac`` exige.
+    """
+    arquivos = {}
+    nome, linhas = None, []
+    for linha in codigo.split("\n"):
+        marcador = linha.strip()
+        if marcador.startswith("// --- ARQUIVO INÍCIO: ") and marcador.endswith(" ---"):
+            nome, linhas = marcador[len("// --- ARQUIVO INÍCIO: "):-len(" ---")], []
+        elif nome is not None and marcador == f"// --- ARQUIVO FIM: {nome} ---":
+            arquivos[nome] = "\n".join(linhas) + "\n"
+            nome = None
+        elif nome is not None:
+            linhas.append(linha)
+    if not arquivos and codigo.strip():
+        m = _CLASSE_PUBLICA_RE.search(codigo)
+        arquivos[f"{m.group(1) if m else 'Main'}.java"] = codigo
+    return arquivos
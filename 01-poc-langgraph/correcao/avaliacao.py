@@ -0,0 +1,105 @@
+# Interpretação do veredito da LLM: extração do cabeçalho "**Avaliação:**" no
+# texto livre e o schema da saída estruturada (JSON), que dispensa o parse.
+
+import re
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+AVALIACOES = ("Certo", "Errado", "Parcialmente Certo")
+
+_AVALIACAO_RE = re.compile(r"\*\*Avalia[çc][ãa]o:?\*\*:?\s*(?P<valor>[^\n]*)(?P<fim>\n)?", re.IGNORECASE)
+
+
+def normalizar_avaliacao(texto):
+    """Mapeia o texto do veredito para um dos valores de ``AVALIACOES`` (ou "")."""
+    texto = texto.strip().strip("*.").lower()
+    if texto.startswith("parcialmente"):
+        return "Parcialmente Certo"
+    if texto.startswith("errado") or texto.startswith("incorreto"):
+        return "Errado"
+    if texto.startswith("certo") or texto.startswith("correto"):
+        return "Certo"
+    return ""
+
+
+def extrair_avaliacao(texto, completo=False):
+    """Extrai o veredito do cabeçalho ``**Avaliação:**``.
+
+    Com ``completo=False`` (texto ainda chegando por streaming), só decide
+    depois que a linha do cabeçalho terminou, para não confundir
+    "Parcialmente..." com um prefixo ainda incompleto.
+    """
+    m = _AVALIACAO_RE.search(texto)
+    if m is None or not (m.group("fim") or completo):
+        return ""
+    return normalizar_avaliacao(m.group("valor"))
+
+
+class Veredito(str, Enum):
+    CERTO = "Certo"
+    ERRADO = "Errado"
+    PARCIALMENTE_CERTO = "Parcialmente Certo"
+
+
+class NotaCriterio(BaseModel):
+    criterio: str = Field(description="Critério avaliado, ex.: Encapsulamento, Herança, Lógica.")
+    nota: float = Field(ge=0, le=10, description="Nota de 0 a 10.")
+    comentario: str = Field(default="", description="Comentário curto sobre a nota.")
+
+
+class AvaliacaoEstruturada(BaseModel):
+    """Resposta da LLM no modo de saída estruturada."""
+    avaliacao: Veredito
+    justificativa: str
+    sugestoes: List[str] = Field(default_factory=list)
+    notas_criterios: Optional[List[NotaCriterio]] = None
+
+
+def renderizar_feedback(avaliacao):
+    """Converte a avaliação estruturada no layout em markdown dos demais modos."""
+    sugestoes = "\n".join(f"- {s}" for s in avaliacao.sugestoes) or "- Nenhuma."
+    texto = (
+        f"1. **Avaliação:** {avaliacao.avaliacao.value}\n"
+        f"2. **Justificativa:** {avaliacao.justificativa}\n"
+        f"3. **Sugestão de Correção:**\n{sugestoes}"
+    )
+    if avaliacao.notas_criterios:
+        notas = "\n".join(f"- {n.criterio}: {n.nota:g}/10" + (f" — {n.comentario}" if n.comentario else "")
+                          for n in avaliacao.notas_criterios)
+        texto += f"\n\n**Notas por critério:**\n{notas}"
+    return texto
+
+
+NOTA_MINIMA_CRITERIO = 7.0
+
+
+def categorias_falha(estado):
+    """Categorias dos problemas apontados no estado final do grafo (para relatórios da turma).
+
+    Vêm dos erros da pré-análise (``estatica:<regra>``), dos testes (``compilacao`` e
+    ``testes``, ou ``infraestrutura:testes`` quando os testes nem rodaram, ex.: JVM
+    indisponível) e das notas por critério abaixo de ``NOTA_MINIMA_CRITERIO``
+    (``criterio:<critério>``); sem nada disso, um veredito diferente de
+    "Certo" vira ``veredito:<veredito>`` (também quando só houve falha de infraestrutura).
+    """
+    categorias = []
+    for achado in estado.get("achados_estaticos") or []:
+        if achado["severidade"] == "erro":  # avisos são suspeitas, não falhas
+            categorias.append(f"estatica:{achado['regra']}")
+    testes = estado.get("resultado_testes") or {}
+    if testes.get("erro"):
+        categorias.append("infraestrutura:testes")  # falha do ambiente, não do aluno
+    elif testes and not testes.get("compilou"):
+        categorias.append("compilacao")
+    elif any(not t["passou"] for t in testes.get("testes", [])):
+        categorias.append("testes")
+    estruturada = estado.get("avaliacao_estruturada") or {}
+    for nota in estruturada.get("notas_criterios") or []:
+        if nota["nota"] < NOTA_MINIMA_CRITERIO:
+            categorias.append(f"criterio:{nota['criterio']}")
+    so_infraestrutura = all(c.startswith("infraestrutura:") for c in categorias)
+    if so_infraestrutura and estado.get("avaliacao_status") in ("Errado", "Parcialmente Certo"):
+        categorias.append(f"veredito:{estado['avaliacao_status']}")
+    return list(dict.fromkeys(categorias))
@@ -0,0 +1,216 @@
+# Modo "Batch API": em vez de uma chamada síncrona por submissão, junta todos os
+# prompts da execução em um único JSONL, submete como um job, aguarda a conclusão
+# e devolve as respostas para o campo ``feedback_bruto`` de cada estado.
+# Troca latência por vazão e custo menor por submissão (correção de fim de período).
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .arquivos import read_and_concat_java_files, read_file_content, separar_arquivos_java
+from .avaliacao import categorias_falha, extrair_avaliacao
+from .cache import chave_cache, get_cache
+from .config import MODEL_NAME, SYSTEM_INSTRUCTION_CORRECAO
+from .empacotamento import carregar_modelo, empacotar
+from .grafo import estado_inicial, format_correction_prompt
+from .lote import ResultadoSubmissao
+from .pre_analise import carregar_regras
+
+ESTADOS_FINAIS = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED",
+                  "JOB_STATE_EXPIRED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+
+
+def linha_requisicao(chave, prompt, system_instruction):
+    """Uma linha do JSONL de entrada, no formato aceito pela Batch API do Gemini."""
+    return {
+        "key": chave,
+        "request": {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "system_instruction": {"parts": [{"text": system_instruction}]},
+        },
+    }
+
+
+def texto_da_resposta(resposta):
+    """Extrai o texto de um ``GenerateContentResponse`` serializado em JSON."""
+    candidatos = resposta.get("candidates") or []
+    if not candidatos:
+        return ""
+    partes = (candidatos[0].get("content") or {}).get("parts") or []
+    return "".join(p.get("text", "") for p in partes)
+
+
+class BackendGemini:
+    """Backend real: envia o JSONL pela File API e cria um job em ``client.batches``."""
+
+    def __init__(self, client=None, model_name=MODEL_NAME):
+        if client is None:
+            from .cliente import get_client
+            client = get_client()
+        self.client = client
+        self.model_name = model_name
+
+    def submeter(self, caminho_jsonl):
+        arquivo = self.client.files.upload(
+            file=caminho_jsonl,
+            config={"display_name": os.path.basename(caminho_jsonl), "mime_type": "jsonl"},
+        )
+        job = self.client.batches.create(
+            model=self.model_name,
+            src=arquivo.name,
+            config={"display_name": os.path.basename(caminho_jsonl)},
+        )
+        return job.name
+
+    def estado(self, job_id):
+        job = self.client.batches.get(name=job_id)
+        return getattr(job.state, "value", str(job.state))
+
+    def baixar(self, job_id, destino):
+        job = self.client.batches.get(name=job_id)
+        self.client.files.download(file=job.dest.file_name, destination=destino)
+
+
+class BackendLocal:
+    """Substituto local da Batch API, para testes sem rede nem cota.
+
+    Processa o JSONL em uma thread de fundo chamando ``responder(prompt,
+    system_instruction)`` para cada linha e grava a saída no mesmo formato do
+    serviço real. ``atraso_s`` simula o tempo de fila do job.
+    """
+
+    def __init__(self, responder=None, atraso_s=0.0):
+        self.responder = responder or (lambda prompt, system: "1. **Avaliação:** Certo\n(resposta local)")
+        self.atraso_s = atraso_s
+        self._jobs = {}
+
+    def _processar(self, job_id, caminho_jsonl):
+        time.sleep(self.atraso_s)
+        linhas = []
+        with open(caminho_jsonl, encoding="utf-8") as f:
+            for linha in f:
+                req = json.loads(linha)
+                prompt = req["request"]["contents"][0]["parts"][0]["text"]
+                system = req["request"]["system_instruction"]["parts"][0]["text"]
+                try:
+                    texto = self.responder(prompt, system)
+                    resposta = {"candidates": [{"content": {"role": "model", "parts": [{"text": texto}]}}]}
+                    linhas.append({"key": req["key"], "response": resposta})
+                except Exception as e:
+                    linhas.append({"key": req["key"], "error": {"message": str(e)}})
+        self._jobs[job_id]["saida"] = linhas
+        self._jobs[job_id]["estado"] = "JOB_STATE_SUCCEEDED"
+
+    def submeter(self, caminho_jsonl):
+        job_id = f"batches/local-{len(self._jobs) + 1}"
+        self._jobs[job_id] = {"estado": "JOB_STATE_RUNNING", "saida": None}
+        threading.Thread(target=self._processar, args=(job_id, caminho_jsonl), daemon=True).start()
+        return job_id
+
+    def estado(self, job_id):
+        return self._jobs[job_id]["estado"]
+
+    def baixar(self, job_id, destino):
+        with open(destino, "w", encoding="utf-8") as f:
+            for linha in self._jobs[job_id]["saida"]:
+                f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+
+def executar_job(backend, requisicoes, intervalo_s=10.0, timeout_s=None):
+    """Submete ``requisicoes`` (dict chave -> (prompt, system)) e espera o job.
+
+    Retorna um dict chave -> texto (ou ``Exception`` para linhas com erro).
+    """
+    with tempfile.TemporaryDirectory(prefix="correcao-batch-") as tmp:
+        entrada = os.path.join(tmp, "entrada.jsonl")
+        with open(entrada, "w", encoding="utf-8") as f:
+            for chave, (prompt, system) in requisicoes.items():
+                f.write(json.dumps(linha_requisicao(chave, prompt, system), ensure_ascii=False) + "\n")
+
+        job_id = backend.submeter(entrada)
+        print(f"Job batch submetido: {job_id} ({len(requisicoes)} requisições).")
+        inicio = time.monotonic()
+        while True:
+            estado = backend.estado(job_id)
+            if estado in ESTADOS_FINAIS:
+                break
+            if timeout_s is not None and time.monotonic() - inicio > timeout_s:
+                raise TimeoutError(f"Job {job_id} não terminou em {timeout_s:.0f}s (estado: {estado}).")
+            time.sleep(intervalo_s)
+        print(f"Job {job_id} terminou com estado {estado}.")
+        if estado not in ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"):
+            raise RuntimeError(f"Job {job_id} terminou com estado {estado}.")
+
+        saida = os.path.join(tmp, "saida.jsonl")
+        backend.baixar(job_id, saida)
+        resultados = {}
+        with open(saida, encoding="utf-8") as f:
+            for linha in f:
+                item = json.loads(linha)
+                if "error" in item:
+                    resultados[item["key"]] = RuntimeError(item["error"].get("message", str(item["error"])))
+                else:
+                    resultados[item["key"]] = texto_da_resposta(item["response"])
+    return resultados
+
+
+def corrigir_lote_batch(submissoes, backend, intervalo_s=10.0, timeout_s=None, orcamento_tokens=None):
+    """Corrige as submissões com um único job batch.
+
+    Prompts idênticos viram uma única linha do JSONL; respostas já presentes no
+    cache não são reenviadas, e as novas são gravadas nele. Retorna uma lista
+    de ``ResultadoSubmissao`` na ordem de ``submissoes``. Com ``orcamento_tokens``,
+    o código é empacotado como no grafo, mas sem a análise por partes (o job
+    tem uma única rodada de chamadas).
+    """
+    cache = get_cache()
+    estados, erros, pendentes = {}, {}, {}
+    for submissao in submissoes:
+        try:
+            enunciado = read_file_content(submissao.enunciado_path)
+            codigo = read_and_concat_java_files(submissao.arquivos_java)
+        except Exception as e:
+            erros[submissao.id] = f"{type(e).__name__}: {e}"
+            continue
+        estado = estado_inicial(enunciado, codigo)
+        if orcamento_tokens is not None:
+            modelo = carregar_modelo(submissao.enunciado_path)
+            regras = carregar_regras(submissao.enunciado_path)
+            codigo = empacotar(separar_arquivos_java(codigo), enunciado, orcamento_tokens, modelo, dividir=False,
+                               regras=regras).codigo
+        prompt = format_correction_prompt(enunciado, codigo)
+        chave = chave_cache(MODEL_NAME, SYSTEM_INSTRUCTION_CORRECAO, prompt)
+        estado["feedback_bruto"] = (cache.get(chave) if cache is not None else None) or ""
+        if not estado["feedback_bruto"]:
+            pendentes[chave] = (prompt, SYSTEM_INSTRUCTION_CORRECAO)
+        estados[submissao.id] = (chave, estado)
+
+    respostas = executar_job(backend, pendentes, intervalo_s, timeout_s) if pendentes else {}
+    if cache is not None:
+        for chave, texto in respostas.items():
+            if isinstance(texto, str) and texto:
+                cache.put(chave, MODEL_NAME, texto)
+
+    resultados = []
+    for submissao in submissoes:
+        if submissao.id in erros:
+            resultados.append(ResultadoSubmissao(id=submissao.id, erro=erros[submissao.id]))
+            continue
+        chave, estado = estados[submissao.id]
+        if not estado["feedback_bruto"]:
+            resposta = respostas.get(chave, RuntimeError("Resposta ausente na saída do job."))
+            if isinstance(resposta, Exception):
+                resultados.append(ResultadoSubmissao(id=submissao.id, erro=f"{type(resposta).__name__}: {resposta}"))
+                continue
+            estado["feedback_bruto"] = resposta
+        if not estado["avaliacao_status"]:
+            estado["avaliacao_status"] = extrair_avaliacao(estado["feedback_bruto"], completo=True)
+        resultados.append(ResultadoSubmissao(
+            id=submissao.id,
+            feedback_bruto=estado["feedback_bruto"],
+            avaliacao_status=estado["avaliacao_status"],
+            categorias_falha=categorias_falha(estado),
+        ))
+    return resultados
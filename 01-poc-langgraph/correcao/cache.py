@@ -0,0 +1,129 @@
+# Cache persistente (SQLite) das respostas da LLM, endereçado pelo conteúdo.
+# A chave é o hash de (modelo, system instruction, prompt): se nada disso mudou,
+# a resposta anterior é reaproveitada sem nova chamada à API.
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    chave TEXT PRIMARY KEY,
+    modelo TEXT NOT NULL,
+    resposta TEXT NOT NULL,
+    criado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_acessado_em ON respostas (acessado_em);
+"""
+
+
+def chave_cache(model_name, system_instruction, prompt, *extras):
+    """Hash SHA-256 que identifica uma chamada à LLM.
+
+    ``extras`` entram no hash quando outros parâmetros mudam a resposta
+    (ex.: o schema da saída estruturada).
+    """
+    h = hashlib.sha256()
+    for parte in (model_name, system_instruction or "", prompt, *extras):
+        dados = parte.encode("utf-8")
+        # Prefixa o tamanho para que ("ab", "c") e ("a", "bc") não colidam.
+        h.update(len(dados).to_bytes(8, "big"))
+        h.update(dados)
+    return h.hexdigest()
+
+
+class CacheRespostas:
+    """Cache em SQLite com expiração por tempo (TTL) e limite de entradas (LRU).
+
+    Seguro para uso por várias threads e tarefas asyncio do mesmo processo, e
+    por vários processos apontando para o mesmo arquivo (o SQLite serializa
+    as escritas).
+    """
+
+    def __init__(self, caminho, ttl_s=None, max_entradas=None):
+        self.caminho = caminho
+        self.ttl_s = ttl_s
+        self.max_entradas = max_entradas
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, chave):
+        """Retorna a resposta guardada ou ``None`` (ausente ou expirada)."""
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is not None and self.ttl_s is not None and agora - linha[1] > self.ttl_s:
+                self._conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                self._conn.commit()
+                linha = None
+            if linha is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+            self._conn.commit()
+            self.hits += 1
+            return linha[0]
+
+    def put(self, chave, model_name, resposta):
+        """Guarda uma resposta e aplica as políticas de expiração."""
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, modelo, resposta, criado_em, acessado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chave, model_name, resposta, agora, agora),
+            )
+            self._evict(agora)
+            self._conn.commit()
+
+    def _evict(self, agora):
+        if self.ttl_s is not None:
+            self._conn.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl_s,))
+        if self.max_entradas is not None:
+            self._conn.execute(
+                "DELETE FROM respostas WHERE chave IN ("
+                "SELECT chave FROM respostas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_entradas,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+
+    def stats(self):
+        """Contadores de acerto/erro desde a abertura do cache."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entradas": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Cache padrão usado pelos nós do grafo; desativado até ``configurar_cache``.
+_cache = None
+
+
+def configurar_cache(caminho, ttl_s=None, max_entradas=None):
+    """Ativa o cache de respostas para os nós de correção deste processo."""
+    global _cache
+    _cache = CacheRespostas(caminho, ttl_s=ttl_s, max_entradas=max_entradas)
+    return _cache
+
+
+def get_cache():
+    """Retorna o cache ativo ou ``None`` se ele não foi configurado."""
+    return _cache
@@ -0,0 +1,142 @@
+# Cache de contexto (context caching do Gemini) para o prefixo compartilhado
+# por todas as submissões de um exercício: system instruction + enunciado.
+# Cada exercício ganha uma entrada em ``client.caches``; as chamadas dos alunos
+# referenciam essa entrada e enviam só o próprio código, reduzindo tokens de
+# entrada e o tempo até o primeiro token. As entradas são apagadas ao fim da
+# execução (``encerrar``) ou expiram sozinhas pelo TTL.
+
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from .limite_taxa import estimar_tokens
+
+# O Gemini exige um tamanho mínimo de conteúdo para cache explícito
+# (1024 tokens no 2.5 Flash); prefixos menores seguem sem cache.
+MIN_TOKENS_CACHE = 1024
+
+
+@dataclass(frozen=True)
+class ContextoCacheado:
+    """Referência a uma entrada do cache de contexto e ao texto que ela contém."""
+    nome: str
+    prefixo: str
+
+
+class GerenciadorContextoCache:
+    """Cria e reaproveita uma entrada de cache por (modelo, system instruction, prefixo).
+
+    Seguro para threads; ``aobter`` pode ser usado por tarefas asyncio. Se a
+    criação falhar (ex.: conteúdo abaixo do mínimo), a chave é lembrada como
+    "sem cache" e as chamadas seguem com o prompt completo.
+    """
+
+    def __init__(self, client=None, ttl_s=3600, min_tokens=MIN_TOKENS_CACHE):
+        self._client = client
+        self.ttl_s = ttl_s
+        self.min_tokens = min_tokens
+        self.criados = 0
+        self.reutilizados = 0
+        self._entradas = {}  # chave -> (ContextoCacheado | None, criado_em)
+        self._lock = threading.Lock()
+        self._locks_chave = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from .cliente import get_client
+            self._client = get_client()
+        return self._client
+
+    @staticmethod
+    def _chave(model_name, system_instruction, prefixo):
+        h = hashlib.sha256()
+        for parte in (model_name, system_instruction, prefixo):
+            h.update(parte.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _consultar(self, chave):
+        """Entrada válida (ou ``None`` se ausente); renova o TTL das que estão perto de expirar."""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        contexto, criado_em = entrada
+        if contexto is not None and time.monotonic() - criado_em > self.ttl_s * 0.8:
+            try:
+                self.client.caches.update(name=contexto.nome, config={"ttl": f"{self.ttl_s}s"})
+                self._entradas[chave] = (contexto, time.monotonic())
+            except Exception as e:
+                print(f"Aviso: não foi possível renovar o cache de contexto {contexto.nome}: {e}")
+                self._entradas.pop(chave, None)
+                return None
+        return self._entradas[chave]
+
+    def obter(self, model_name, system_instruction, prefixo):
+        """Retorna o ``ContextoCacheado`` do prefixo, criando-o se preciso (ou ``None``)."""
+        chave = self._chave(model_name, system_instruction, prefixo)
+        with self._lock:
+            lock_chave = self._locks_chave.setdefault(chave, threading.Lock())
+        with lock_chave:
+            entrada = self._consultar(chave)
+            if entrada is not None:
+                if entrada[0] is not None:
+                    self.reutilizados += 1
+                return entrada[0]
+            contexto = None
+            if estimar_tokens(system_instruction, prefixo, tokens_saida=0) >= self.min_tokens:
+                try:
+                    cache = self.client.caches.create(
+                        model=model_name,
+                        config={
+                            "system_instruction": system_instruction,
+                            "contents": [{"role": "user", "parts": [{"text": prefixo}]}],
+                            "ttl": f"{self.ttl_s}s",
+                            "display_name": f"correcao-{chave[:12]}",
+                        },
+                    )
+                    contexto = ContextoCacheado(cache.name, prefixo)
+                    self.criados += 1
+                except Exception as e:
+                    print(f"Aviso: cache de contexto indisponível para este exercício ({e}); usando prompt completo.")
+            self._entradas[chave] = (contexto, time.monotonic())
+            return contexto
+
+    async def aobter(self, model_name, system_instruction, prefixo):
+        """Versão assíncrona: a criação (rara) roda em uma thread."""
+        entrada = self._entradas.get(self._chave(model_name, system_instruction, prefixo))
+        if entrada is not None and time.monotonic() - entrada[1] <= self.ttl_s * 0.8:
+            if entrada[0] is not None:
+                self.reutilizados += 1
+            return entrada[0]
+        return await asyncio.to_thread(self.obter, model_name, system_instruction, prefixo)
+
+    def encerrar(self):
+        """Apaga as entradas criadas nesta execução."""
+        with self._lock:
+            entradas, self._entradas = self._entradas, {}
+        for contexto, _ in entradas.values():
+            if contexto is None:
+                continue
+            try:
+                self.client.caches.delete(name=contexto.nome)
+            except Exception as e:
+                print(f"Aviso: não foi possível apagar o cache de contexto {contexto.nome}: {e}")
+
+
+# Gerenciador padrão usado pelos nós de correção; desativado até ser configurado.
+_gerenciador = None
+
+
+def configurar_cache_contexto(ttl_s=3600, min_tokens=MIN_TOKENS_CACHE, client=None):
+    """Ativa o cache de contexto para os nós de correção deste processo."""
+    global _gerenciador
+    _gerenciador = GerenciadorContextoCache(client=client, ttl_s=ttl_s, min_tokens=min_tokens)
+    return _gerenciador
+
+
+def get_gerenciador_contexto():
+    """Retorna o gerenciador ativo ou ``None`` se ele não foi configurado."""
+    return _gerenciador
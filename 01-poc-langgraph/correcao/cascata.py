@@ -0,0 +1,113 @@
+# Cascata de modelos: corrige primeiro com o modelo mais barato/rápido e só
+# escala para um modelo mais forte quando a resposta é incerta (confiança
+# baixa, "Parcialmente Certo") ou contradiz as verificações automáticas
+# (pré-análise e testes). Cada nível tem um orçamento de chamadas; o relatório
+# mostra quanto do tráfego cada nível absorveu.
+
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from pydantic import Field
+
+from .avaliacao import AvaliacaoEstruturada, Veredito
+from .config import MODEL_NAME, MODEL_NAME_CRITERIOS
+
+SYSTEM_INSTRUCTION_CASCATA = (
+    "Você é um Professor de Programação Orientada a Objetos (POO) da UFLA. "
+    "Sua função é avaliar o código Java de um aluno, considerando o enunciado. "
+    "Forneça um feedback construtivo e educativo, focado em princípios de POO (Encapsulamento, Herança, Lógica). "
+    "Responda em JSON no schema fornecido:\n"
+    "- avaliacao: Certo, Errado ou Parcialmente Certo;\n"
+    "- justificativa: explique a lógica e a aplicação dos princípios de POO;\n"
+    "- sugestoes: sugestões para aprimoramento ou correção do código, mesmo que ele esteja 'Certo';\n"
+    "- confianca: de 0 a 1, o quanto você tem certeza do veredito (use valores baixos se houver "
+    "ambiguidade no enunciado ou se não conseguir verificar a lógica com segurança).\n"
+    "Responda integralmente em português."
+)
+
+
+class AvaliacaoComConfianca(AvaliacaoEstruturada):
+    """Avaliação estruturada acrescida do sinal de confiança usado pelo roteador."""
+    confianca: float = Field(ge=0, le=1, description="Confiança no veredito, de 0 a 1.")
+
+
+@dataclass
+class NivelCascata:
+    """Um nível da cascata: o modelo e quantas chamadas ele pode receber (``None`` = sem limite)."""
+    model_name: str
+    orcamento: Optional[int] = None
+    chamadas: int = 0
+    finalizadas: int = 0  # submissões cujo veredito final saiu deste nível
+    escaladas: int = 0  # submissões repassadas ao nível seguinte
+
+
+def motivo_para_escalar(avaliacao, state, limiar_confianca):
+    """Motivo para pedir uma segunda opinião a um modelo mais forte (ou "" se não há)."""
+    if avaliacao.confianca < limiar_confianca:
+        return f"confiança {avaliacao.confianca:.2f} < {limiar_confianca:.2f}"
+    if avaliacao.avaliacao == Veredito.PARCIALMENTE_CERTO:
+        return "veredito Parcialmente Certo"
+    erros_estaticos = [a for a in state.get("achados_estaticos") or [] if a["severidade"] == "erro"]
+    if erros_estaticos and avaliacao.avaliacao == Veredito.CERTO:
+        return "pré-análise encontrou erros, mas o veredito foi Certo"
+    testes = state.get("resultado_testes") or {}
+    if testes and not testes.get("erro"):
+        falhou = not testes.get("compilou") or any(not t["passou"] for t in testes.get("testes", []))
+        if falhou and avaliacao.avaliacao == Veredito.CERTO:
+            return "testes falharam, mas o veredito foi Certo"
+        if not falhou and testes.get("testes") and avaliacao.avaliacao == Veredito.ERRADO:
+            return "todos os testes passaram, mas o veredito foi Errado"
+    return ""
+
+
+class RoteadorCascata:
+    """Estado compartilhado da cascata: níveis, orçamentos e contadores (seguro para threads)."""
+
+    def __init__(self, niveis=None, limiar_confianca=0.7):
+        self.niveis = niveis or [NivelCascata(MODEL_NAME_CRITERIOS), NivelCascata(MODEL_NAME)]
+        self.limiar_confianca = limiar_confianca
+        self._lock = threading.Lock()
+
+    def reservar(self, a_partir_de):
+        """Índice do primeiro nível >= ``a_partir_de`` com orçamento (já descontando a chamada) ou ``None``."""
+        with self._lock:
+            for i in range(a_partir_de, len(self.niveis)):
+                nivel = self.niveis[i]
+                if nivel.orcamento is None or nivel.chamadas < nivel.orcamento:
+                    nivel.chamadas += 1
+                    return i
+            return None
+
+    def registrar(self, indice, escalou):
+        with self._lock:
+            if escalou:
+                self.niveis[indice].escaladas += 1
+            else:
+                self.niveis[indice].finalizadas += 1
+
+    def relatorio(self):
+        """Uma linha por nível, com a fração das submissões finalizadas em cada um."""
+        with self._lock:
+            total = sum(n.finalizadas for n in self.niveis) or 1
+            return [
+                {
+                    "nivel": i,
+                    "modelo": n.model_name,
+                    "chamadas": n.chamadas,
+                    "finalizadas": n.finalizadas,
+                    "escaladas": n.escaladas,
+                    "fracao_trafego": n.finalizadas / total,
+                    "orcamento_restante": None if n.orcamento is None else n.orcamento - n.chamadas,
+                }
+                for i, n in enumerate(self.niveis)
+            ]
+
+
+def niveis_de_texto(especificacao):
+    """Converte ``"modelo[:orcamento],..."`` (ex.: ``"gemini-2.5-flash-lite,gemini-2.5-flash:200"``) em níveis."""
+    niveis = []
+    for item in especificacao.split(","):
+        modelo, _, orcamento = item.strip().partition(":")
+        niveis.append(NivelCascata(modelo, int(orcamento) if orcamento else None))
+    return niveis
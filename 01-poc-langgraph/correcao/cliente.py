@@ -0,0 +1,186 @@
+# Criação do cliente Gemini sob demanda (uma única instância por processo).
+#
+# O cliente é criado uma vez, com um pool de conexões HTTP mantidas abertas
+# (keep-alive; HTTP/2 se o pacote ``h2`` estiver instalado), e compartilhado
+# por todas as threads e tarefas asyncio: ``client.models`` para chamadas
+# síncronas e ``client.aio.models`` para assíncronas. Assim, o handshake TLS e
+# a construção do cliente não se repetem a cada chamada.
+#
+# Para testes, ``usar_cliente`` injeta qualquer objeto com a mesma interface
+# (ex.: ``ClienteLocal``); ``CORRECAO_BACKEND=local`` faz o mesmo sem mudar
+# código, e ``GEMINI_BASE_URL`` aponta o cliente real para outro servidor.
+
+import asyncio
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+# Tamanho do pool de conexões; acima do número de chamadas simultâneas usuais
+# do lote (--concorrencia), para que nenhuma chamada espere por conexão.
+MAX_CONEXOES = 64
+KEEPALIVE_S = 120
+
+_client = None
+_lock = threading.Lock()
+
+
+def _http2_disponivel():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _opcoes_http(base_url=None):
+    import httpx
+    from google.genai import types
+
+    limites = httpx.Limits(
+        max_connections=MAX_CONEXOES,
+        max_keepalive_connections=MAX_CONEXOES,
+        keepalive_expiry=KEEPALIVE_S,
+    )
+    args = {"limits": limites, "http2": _http2_disponivel()}
+    return types.HttpOptions(base_url=base_url, client_args=dict(args), async_client_args=dict(args))
+
+
+def criar_cliente():
+    """Cria o cliente conforme o ambiente (``.env``): real com pool de conexões ou ``ClienteLocal``."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if os.getenv("CORRECAO_BACKEND") == "local":
+        return ClienteLocal()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("Chave API não encontrada. Verifique o arquivo .env.")
+    from google import genai
+    return genai.Client(api_key=api_key, http_options=_opcoes_http(os.getenv("GEMINI_BASE_URL")))
+
+
+def get_client():
+    """Retorna o cliente Gemini, criando-o na primeira chamada (seguro para threads)."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = criar_cliente()
+    return _client
+
+
+def get_async_client():
+    """Interface assíncrona (``.models``, ``.caches``...) do mesmo cliente compartilhado."""
+    return get_client().aio
+
+
+def usar_cliente(client):
+    """Substitui o cliente do processo (ex.: por um ``ClienteLocal`` em testes); ``None`` volta ao padrão."""
+    global _client
+    with _lock:
+        _client = client
+
+
+def fechar_cliente():
+    """Fecha as conexões do cliente atual; o próximo ``get_client`` cria outro."""
+    global _client
+    with _lock:
+        client, _client = _client, None
+    fechar = getattr(client, "close", None)
+    if fechar is not None:
+        fechar()
+
+
+class _RespostaLocal:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+_TEXTO_LOCAL = "Resposta local."
+
+
+def _exemplo_schema(schema, definicoes):
+    """Valor mínimo válido para um JSON Schema (o gerado por ``model_json_schema`` do Pydantic)."""
+    if "$ref" in schema:
+        return _exemplo_schema(definicoes[schema["$ref"].rsplit("/", 1)[-1]], definicoes)
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "anyOf" in schema:
+        return _exemplo_schema(schema["anyOf"][0], definicoes)
+    tipo = schema.get("type")
+    if tipo == "object":
+        return {nome: _exemplo_schema(campo, definicoes) for nome, campo in schema.get("properties", {}).items()}
+    if tipo == "array":
+        return []
+    if tipo in ("number", "integer"):
+        # O máximo permitido: nota cheia e confiança total, coerentes com o veredito "Certo".
+        return schema.get("maximum", schema.get("minimum", 0))
+    if tipo == "boolean":
+        return True
+    if tipo == "null":
+        return None
+    return _TEXTO_LOCAL
+
+
+def _resposta_padrao(model, contents, config):
+    schema = config.get("response_schema") if isinstance(config, dict) else getattr(config, "response_schema", None)
+    if schema is not None:
+        # Saída estruturada: JSON válido para o schema pedido, como a API real devolveria.
+        json_schema = schema.model_json_schema()
+        return json.dumps(_exemplo_schema(json_schema, json_schema.get("$defs", {})), ensure_ascii=False)
+    return "1. **Avaliação:** Certo\n2. **Justificativa:** Resposta local.\n3. **Sugestão de Correção:** Nenhuma."
+
+
+class ClienteLocal:
+    """Substituto offline do ``genai.Client`` com ``models`` e ``aio.models``.
+
+    ``responder(model, contents, config) -> str`` gera o texto de cada resposta;
+    ``atraso_s`` simula a latência da API. Conta as chamadas em ``chamadas``.
+    """
+
+    def __init__(self, responder=None, atraso_s=0.0):
+        self.responder = responder or _resposta_padrao
+        self.atraso_s = atraso_s
+        self.chamadas = 0
+        self._lock = threading.Lock()
+        self.models = SimpleNamespace(
+            generate_content=self._gerar,
+            generate_content_stream=self._gerar_stream,
+        )
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._agerar,
+            generate_content_stream=self._agerar_stream,
+        ))
+
+    def _texto(self, model, contents, config):
+        with self._lock:
+            self.chamadas += 1
+        return self.responder(model, contents, config)
+
+    def _gerar(self, model, contents, config=None):
+        time.sleep(self.atraso_s)
+        return _RespostaLocal(self._texto(model, contents, config))
+
+    def _gerar_stream(self, model, contents, config=None):
+        time.sleep(self.atraso_s)
+        texto = self._texto(model, contents, config)
+        for i in range(0, len(texto), 64):
+            yield _RespostaLocal(texto[i:i + 64])
+
+    async def _agerar(self, model, contents, config=None):
+        await asyncio.sleep(self.atraso_s)
+        return _RespostaLocal(self._texto(model, contents, config))
+
+    async def _agerar_stream(self, model, contents, config=None):
+        await asyncio.sleep(self.atraso_s)
+        texto = self._texto(model, contents, config)
+
+        async def trechos():
+            for i in range(0, len(texto), 64):
+                yield _RespostaLocal(texto[i:i + 64])
+        return trechos()
@@ -0,0 +1,219 @@
+# Concorrência adaptativa: quantas correções ficam em andamento ao mesmo tempo.
+#
+# Um número fixo de correções simultâneas é errado em parte do dia: de
+# madrugada a cota sobra e a API responde rápido; perto do prazo de entrega a
+# latência sobe e os 429 aparecem. O limitador ajusta o limite sozinho, no
+# estilo AIMD/gradiente (como o controle de congestionamento do TCP):
+#   - cada chamada à LLM que dá certo informa a sua latência; enquanto a
+#     latência recente (média móvel curta) fica perto da latência de base
+#     (a menor observada, que sobe devagar para acompanhar mudanças reais),
+#     o limite cresce — dobrando a cada "rodada" no início, depois de uma em
+#     uma vaga por rodada;
+#   - quando a latência recente passa de ``tolerancia`` vezes a base, o limite
+#     encolhe na proporção (gradiente = base * tolerancia / recente);
+#   - um 429 (RESOURCE_EXHAUSTED) corta o limite pela metade na hora, no
+#     máximo uma vez por latência recente: as chamadas que já tinham saído com
+#     o limite antigo também podem voltar com 429 e não contam de novo.
+# Os sinais chegam de ``retentativas.ControleRetentativas`` (de qualquer
+# thread); as vagas são disputadas por tarefas asyncio, em ordem de chegada.
+
+import asyncio
+import collections
+import threading
+import time
+
+
+class LimitadorConcorrencia:
+    """Limite adaptativo de correções simultâneas; use como ``asyncio.Semaphore`` (``async with``).
+
+    O limite fica entre ``minimo`` e ``maximo`` e começa em ``inicial``.
+    ``estatisticas()`` expõe limite atual, correções em andamento, vazão e o
+    histórico de ajustes.
+    """
+
+    def __init__(self, inicial=8, minimo=1, maximo=64, tolerancia=1.5, reducao=0.5,
+                 alfa_latencia=0.2, deriva_base_por_s=0.01, janela_vazao_s=30.0):
+        self.minimo = max(1, minimo)
+        self.maximo = max(self.minimo, maximo)
+        self.tolerancia = tolerancia
+        self.reducao = reducao
+        self.alfa_latencia = alfa_latencia
+        self.deriva_base_por_s = deriva_base_por_s
+        self.janela_vazao_s = janela_vazao_s
+        self.em_andamento = 0
+        self.concluidas = 0
+        self.amostras = 0
+        self.reducoes_429 = 0
+        self.reducoes_latencia = 0
+        self.latencia_recente_s = None
+        self.latencia_base_s = None
+        self._limite = float(min(self.maximo, max(self.minimo, inicial)))
+        self._partida = True  # cresce dobrando até o primeiro sinal de sobrecarga
+        self._ultimo_corte = None
+        self._ultima_amostra = None
+        self._esperando = collections.deque()  # (loop, future) na ordem de chegada
+        self._conclusoes = collections.deque()  # instantes das conclusões dentro da janela de vazão
+        self._criado_em = time.monotonic()
+        self._historico = collections.deque([(0.0, self.limite)], maxlen=1000)
+        self._limite_min_visto = self._limite_max_visto = self.limite
+        self._lock = threading.Lock()
+
+    @property
+    def limite(self):
+        return int(self._limite)
+
+    async def __aenter__(self):
+        await self.adquirir()
+
+    async def __aexit__(self, *exc):
+        self.liberar()
+
+    async def adquirir(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._esperando and self.em_andamento < self.limite:
+                self.em_andamento += 1
+                return
+            futuro = loop.create_future()
+            self._esperando.append((loop, futuro))
+        try:
+            await futuro
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._esperando.remove((loop, futuro))
+                    raise
+                except ValueError:
+                    pass
+            # A vaga já tinha sido concedida: devolve (se o futuro foi cancelado, ``_conceder`` devolve).
+            if futuro.done() and not futuro.cancelled():
+                self._devolver()
+            raise
+
+    def liberar(self):
+        self._devolver(concluida=True)
+
+    def _devolver(self, concluida=False):
+        agora = time.monotonic()
+        with self._lock:
+            self.em_andamento -= 1
+            if concluida:
+                self.concluidas += 1
+                self._conclusoes.append(agora)
+            self._despachar()
+
+    def _conceder(self, futuro):
+        if futuro.cancelled():
+            self._devolver()
+        else:
+            futuro.set_result(None)
+
+    def _despachar(self):
+        # Chamado com o lock: entrega as vagas livres a quem espera (o futuro pode ser de outra thread).
+        while self._esperando and self.em_andamento < self.limite:
+            loop, futuro = self._esperando.popleft()
+            self.em_andamento += 1
+            loop.call_soon_threadsafe(self._conceder, futuro)
+
+    def _ajustar(self, novo, agora):
+        self._limite = min(float(self.maximo), max(float(self.minimo), novo))
+        limite = self.limite
+        if limite != self._historico[-1][1]:
+            self._historico.append((agora - self._criado_em, limite))
+            self._limite_min_visto = min(self._limite_min_visto, limite)
+            self._limite_max_visto = max(self._limite_max_visto, limite)
+        self._despachar()
+
+    def registrar_latencia(self, segundos):
+        """Sinal de uma chamada bem-sucedida: latência estável faz o limite crescer; latência em alta, encolher."""
+        agora = time.monotonic()
+        with self._lock:
+            self.amostras += 1
+            if self.latencia_recente_s is None:
+                self.latencia_recente_s = self.latencia_base_s = segundos
+            else:
+                self.latencia_recente_s += self.alfa_latencia * (segundos - self.latencia_recente_s)
+                # A base sobe devagar (por tempo, não por amostra) para aceitar uma API mais lenta de verdade.
+                deriva = 1 + self.deriva_base_por_s * (agora - self._ultima_amostra)
+                self.latencia_base_s = min(self.latencia_base_s * deriva, self.latencia_recente_s)
+            self._ultima_amostra = agora
+            razao = self.latencia_recente_s / max(self.latencia_base_s, 1e-6)
+            if razao > 1.1:
+                self._partida = False  # a fila do outro lado começou a crescer: fim da partida
+            gradiente = min(1.0, self.tolerancia / razao)
+            if gradiente < 1.0:
+                # Por rodada (``limite`` amostras), o limite é multiplicado pelo gradiente.
+                self._partida = False
+                self.reducoes_latencia += 1
+                self._ajustar(self._limite - (1.0 - max(0.5, gradiente)), agora)
+            elif self.em_andamento + len(self._esperando) >= self._limite / 2:
+                # Só cresce se o limite está sendo usado (senão a latência não diz nada sobre ele).
+                self._ajustar(self._limite + (1.0 if self._partida else 1.0 / self._limite), agora)
+
+    def registrar_sobrecarga(self):
+        """Sinal de 429: corta o limite (uma vez por latência recente, para não cortar pela mesma rajada)."""
+        agora = time.monotonic()
+        with self._lock:
+            self._partida = False
+            janela = self.latencia_recente_s or 1.0
+            if self._ultimo_corte is not None and agora - self._ultimo_corte < janela:
+                return
+            self._ultimo_corte = agora
+            self.reducoes_429 += 1
+            self._ajustar(self._limite * self.reducao, agora)
+
+    def _vazao(self, agora):
+        while self._conclusoes and agora - self._conclusoes[0] > self.janela_vazao_s:
+            self._conclusoes.popleft()
+        decorrido = min(self.janela_vazao_s, agora - self._criado_em)
+        return len(self._conclusoes) / decorrido if decorrido > 0 else 0.0
+
+    def estatisticas(self):
+        """Limite atual, em andamento, vazão (correções/s na janela recente e média) e ajustes."""
+        agora = time.monotonic()
+        with self._lock:
+            decorrido = agora - self._criado_em
+            return {
+                "limite": self.limite,
+                "minimo": self.minimo,
+                "maximo": self.maximo,
+                "em_andamento": self.em_andamento,
+                "esperando": len(self._esperando),
+                "concluidas": self.concluidas,
+                "vazao_por_s": self._vazao(agora),
+                "vazao_media_por_s": self.concluidas / decorrido if decorrido > 0 else 0.0,
+                "latencia_recente_s": self.latencia_recente_s,
+                "latencia_base_s": self.latencia_base_s,
+                "amostras": self.amostras,
+                "reducoes_429": self.reducoes_429,
+                "reducoes_latencia": self.reducoes_latencia,
+                "limite_min_visto": self._limite_min_visto,
+                "limite_max_visto": self._limite_max_visto,
+                "historico": [(round(t, 3), limite) for t, limite in self._historico],
+            }
+
+
+def formatar_estatisticas(estatisticas):
+    """Linha de resumo para o fim da execução."""
+    e = estatisticas
+    latencia = "" if e["latencia_base_s"] is None else (
+        f", latência recente {e['latencia_recente_s']:.2f}s (base {e['latencia_base_s']:.2f}s)")
+    return (f"Concorrência adaptativa: limite final {e['limite']} (entre {e['limite_min_visto']} e "
+            f"{e['limite_max_visto']} na execução; faixa {e['minimo']}-{e['maximo']}), "
+            f"{e['reducoes_429']} corte(s) por 429, {e['concluidas']} correção(ões), "
+            f"vazão média {e['vazao_media_por_s']:.2f}/s{latencia}.")
+
+
+_limitador = None
+
+
+def configurar_concorrencia(inicial=8, minimo=1, maximo=64, **opcoes):
+    """Liga a concorrência adaptativa deste processo e retorna o limitador."""
+    global _limitador
+    _limitador = LimitadorConcorrencia(inicial, minimo, maximo, **opcoes)
+    return _limitador
+
+
+def get_concorrencia():
+    """O limitador de concorrência do processo, ou ``None`` se a concorrência é fixa."""
+    return _limitador
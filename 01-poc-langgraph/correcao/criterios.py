@@ -0,0 +1,116 @@
+# Correção por critério: em vez de um único prompt que julga tudo de uma vez,
+# cada critério (encapsulamento, compilação/estático, lógica, estilo) tem um
+# prompt curto e focado, roda em paralelo no grafo e pode usar um modelo mais
+# barato. A consolidação junta os vereditos em uma AvaliacaoEstruturada.
+
+from dataclasses import dataclass
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from .avaliacao import AvaliacaoEstruturada, NotaCriterio, Veredito
+from .config import MODEL_NAME, MODEL_NAME_CRITERIOS
+
+_CABECALHO = (
+    "Você é um Professor de Programação Orientada a Objetos (POO) da UFLA. "
+    "Avalie o código Java de um aluno, considerando o enunciado, "
+    "EXCLUSIVAMENTE quanto ao critério abaixo; ignore os demais aspectos.\n"
+)
+_RODAPE = (
+    "\nResponda em JSON no schema fornecido: veredito (Certo, Errado ou Parcialmente Certo), "
+    "nota de 0 a 10, comentario curto (até 3 frases) e sugestoes objetivas. "
+    "Responda integralmente em português."
+)
+
+
+@dataclass(frozen=True)
+class Criterio:
+    """Um critério de correção independente."""
+    nome: str  # nome do nó no grafo
+    titulo: str  # como aparece no feedback
+    instrucao: str  # o que avaliar
+    model_name: str = MODEL_NAME_CRITERIOS
+    decisivo: bool = False  # "Errado" neste critério torna a avaliação geral "Errado"
+
+    @property
+    def system_instruction(self):
+        return f"{_CABECALHO}Critério: {self.titulo}. {self.instrucao}{_RODAPE}"
+
+
+CRITERIOS = (
+    Criterio(
+        "encapsulamento", "Encapsulamento",
+        "Verifique visibilidade dos atributos, uso de getters/setters apenas quando fazem sentido "
+        "e se o estado do objeto só muda por métodos que preservam suas regras.",
+    ),
+    Criterio(
+        "compilacao", "Compilação e uso de estático/instância",
+        "Aponte erros que impedem a compilação (tipos, assinaturas, chamadas inexistentes) e o uso "
+        "indevido de membros static no lugar de membros de instância (e vice-versa).",
+        decisivo=True,
+    ),
+    Criterio(
+        "logica", "Lógica de negócio",
+        "Verifique se o comportamento pedido no enunciado está implementado corretamente, "
+        "incluindo validações e casos-limite.",
+        model_name=MODEL_NAME,  # o critério mais difícil fica no modelo principal
+        decisivo=True,
+    ),
+    Criterio(
+        "estilo", "Estilo",
+        "Avalie nomes, convenções de código Java, organização das classes e legibilidade.",
+    ),
+)
+
+CRITERIOS_POR_NOME = {c.nome: c for c in CRITERIOS}
+
+
+class AvaliacaoCriterio(BaseModel):
+    """Resposta da LLM para um único critério."""
+    veredito: Veredito
+    nota: float = Field(ge=0, le=10, description="Nota de 0 a 10 no critério.")
+    comentario: str
+    sugestoes: List[str] = Field(default_factory=list)
+
+
+def selecionar_criterios(nomes=None):
+    """Critérios a usar (todos, se ``nomes`` for vazio), na ordem de ``CRITERIOS``."""
+    if not nomes:
+        return CRITERIOS
+    desconhecidos = set(nomes) - set(CRITERIOS_POR_NOME)
+    if desconhecidos:
+        raise ValueError(f"Critério(s) desconhecido(s): {', '.join(sorted(desconhecidos))}.")
+    return tuple(c for c in CRITERIOS if c.nome in nomes)
+
+
+def consolidar(resultados):
+    """Junta os resultados dos critérios (``{"criterio", "avaliacao"}``) em uma ``AvaliacaoEstruturada``.
+
+    Regra do veredito geral: "Errado" se algum critério decisivo deu "Errado";
+    "Certo" se todos deram "Certo"; senão "Parcialmente Certo".
+    """
+    ordem = {c.nome: i for i, c in enumerate(CRITERIOS)}
+    resultados = sorted(resultados, key=lambda r: ordem.get(r["criterio"], len(ordem)))
+    notas, justificativas, sugestoes = [], [], []
+    vereditos = []
+    errado_decisivo = False
+    for r in resultados:
+        criterio = CRITERIOS_POR_NOME[r["criterio"]]
+        avaliacao = AvaliacaoCriterio.model_validate(r["avaliacao"])
+        vereditos.append(avaliacao.veredito)
+        errado_decisivo |= criterio.decisivo and avaliacao.veredito == Veredito.ERRADO
+        notas.append(NotaCriterio(criterio=criterio.titulo, nota=avaliacao.nota, comentario=avaliacao.veredito.value))
+        justificativas.append(f"{criterio.titulo}: {avaliacao.comentario}")
+        sugestoes.extend(f"[{criterio.titulo}] {s}" for s in avaliacao.sugestoes)
+    if errado_decisivo:
+        veredito = Veredito.ERRADO
+    elif vereditos and all(v == Veredito.CERTO for v in vereditos):
+        veredito = Veredito.CERTO
+    else:
+        veredito = Veredito.PARCIALMENTE_CERTO
+    return AvaliacaoEstruturada(
+        avaliacao=veredito,
+        justificativa="\n".join(justificativas),
+        sugestoes=sugestoes,
+        notas_criterios=notas,
+    )
@@ -0,0 +1,146 @@
+# Gerador de turmas sintéticas para benchmarks: N alunos x M exercícios no
+# layout <exercicio>/<aluno>/*.java, com o enunciado (e as regras) na pasta do
+# exercício, como em 02-dados-teste/. As soluções variam entre corretas, com
+# erro de encapsulamento, com erro de lógica e cópias de colegas, e têm
+# número e tamanho de arquivos variados. Tudo depende só da semente.
+
+import json
+import os
+import random
+from dataclasses import dataclass
+
+from .lote import ENUNCIADO_FILENAME
+from .pre_analise import REGRAS_FILENAME
+
+
+@dataclass(frozen=True)
+class _Modelo:
+    classe: str
+    atributo: str
+    tipo: str
+    enunciado: str
+    metodos: str  # corpo correto, com {a} no lugar do nome do atributo
+    metodos_erro: str  # mesma interface, com erro de lógica
+
+
+_MODELOS = (
+    _Modelo(
+        "ContaBancaria", "saldo", "double",
+        "1. Um atributo privado 'saldo' do tipo double.\n"
+        "2. Um método 'depositar(double valor)' que adiciona valor ao saldo.\n"
+        "3. Um método 'sacar(double valor)' que subtrai valor do saldo se houver saldo suficiente.\n"
+        "4. Um método 'getSaldo()' que retorna o saldo atual.",
+        "    public void depositar(double valor) {{\n        {a} += valor;\n    }}\n\n"
+        "    public void sacar(double valor) {{\n        if ({a} >= valor) {{\n            {a} -= valor;\n        }}\n    }}\n\n"
+        "    public double getSaldo() {{\n        return {a};\n    }}\n",
+        "    public void depositar(double valor) {{\n        {a} = valor;\n    }}\n\n"
+        "    public void sacar(double valor) {{\n        {a} -= valor;\n    }}\n\n"
+        "    public double getSaldo() {{\n        return {a};\n    }}\n",
+    ),
+    _Modelo(
+        "Contador", "valor", "int",
+        "1. Um atributo privado 'valor' do tipo int, iniciando em zero.\n"
+        "2. Um método 'incrementar()' que soma 1 ao valor.\n"
+        "3. Um método 'decrementar()' que subtrai 1 do valor, sem deixá-lo negativo.\n"
+        "4. Um método 'getValor()' que retorna o valor atual.",
+        "    public void incrementar() {{\n        {a}++;\n    }}\n\n"
+        "    public void decrementar() {{\n        if ({a} > 0) {{\n            {a}--;\n        }}\n    }}\n\n"
+        "    public int getValor() {{\n        return {a};\n    }}\n",
+        "    public void incrementar() {{\n        {a}++;\n    }}\n\n"
+        "    public void decrementar() {{\n        {a}--;\n    }}\n\n"
+        "    public int getValor() {{\n        return {a};\n    }}\n",
+    ),
+    _Modelo(
+        "Estoque", "quantidade", "int",
+        "1. Um atributo privado 'quantidade' do tipo int.\n"
+        "2. Um método 'adicionar(int itens)' que soma itens à quantidade, ignorando valores negativos.\n"
+        "3. Um método 'remover(int itens)' que retorna false se não houver itens suficientes.\n"
+        "4. Um método 'getQuantidade()' que retorna a quantidade atual.",
+        "    public void adicionar(int itens) {{\n        if (itens > 0) {{\n            {a} += itens;\n        }}\n    }}\n\n"
+        "    public boolean remover(int itens) {{\n        if (itens > {a}) {{\n            return false;\n        }}\n"
+        "        {a} -= itens;\n        return true;\n    }}\n\n"
+        "    public int getQuantidade() {{\n        return {a};\n    }}\n",
+        "    public void adicionar(int itens) {{\n        {a} += itens;\n    }}\n\n"
+        "    public boolean remover(int itens) {{\n        {a} -= itens;\n        return true;\n    }}\n\n"
+        "    public int getQuantidade() {{\n        return {a};\n    }}\n",
+    ),
+)
+
+
+def _regras(modelo):
+    getter = {"ContaBancaria": "getSaldo", "Contador": "getValor", "Estoque": "getQuantidade"}[modelo.classe]
+    return {
+        "classes": [modelo.classe],
+        "atributos": [{"classe": modelo.classe, "nome": modelo.atributo, "tipo": modelo.tipo,
+                       "modificadores": ["private"]}],
+        "metodos": [{"classe": modelo.classe, "nome": getter, "parametros": [], "retorno": modelo.tipo}],
+        "pular_llm_se_errado": False,
+    }
+
+
+def _classe_auxiliar(nome, rng, metodos):
+    corpo = []
+    for i in range(metodos):
+        corpo.append(
+            f"    // Auxiliar {i}: formata um valor para exibição.\n"
+            f"    public static String formatar{i}(double v) {{\n"
+            f"        return String.format(\"%.{rng.randint(0, 4)}f\", v * {rng.randint(1, 100)});\n"
+            f"    }}\n"
+        )
+    return f"public class {nome} {{\n" + "\n".join(corpo) + "}\n"
+
+
+def _solucao(modelo, variante, rng, metodos_extras):
+    visibilidade = "public" if variante == "encapsulamento" else "private"
+    metodos = modelo.metodos_erro if variante == "logica" else modelo.metodos
+    extras = "".join(
+        f"\n    public String descricao{i}() {{\n        return \"{modelo.classe} #{i}: \" + {modelo.atributo};\n    }}\n"
+        for i in range(metodos_extras)
+    )
+    return (
+        f"public class {modelo.classe} {{\n"
+        f"    {visibilidade} {modelo.tipo} {modelo.atributo};\n\n"
+        f"{metodos.format(a=modelo.atributo)}{extras}}}\n"
+    )
+
+
+def gerar_turma(raiz, alunos=30, exercicios=2, semente=0, arquivos_max=3, metodos_extras_max=8,
+                fracao_copias=0.1, com_regras=True):
+    """Grava a turma em ``raiz`` e retorna um resumo (contagens por variante).
+
+    Cada aluno recebe uma variante: "correta", "encapsulamento", "logica" ou
+    "copia" (idêntica à de um colega anterior do mesmo exercício). O número
+    de arquivos (1..``arquivos_max``) e de métodos extras varia por aluno.
+    """
+    rng = random.Random(semente)
+    contagem = {"correta": 0, "encapsulamento": 0, "logica": 0, "copia": 0}
+    arquivos_total = 0
+    for e in range(exercicios):
+        modelo = _MODELOS[e % len(_MODELOS)]
+        pasta_exercicio = os.path.join(raiz, f"exercicio{e + 1:02d}")
+        os.makedirs(pasta_exercicio, exist_ok=True)
+        with open(os.path.join(pasta_exercicio, ENUNCIADO_FILENAME), "w", encoding="utf-8") as f:
+            f.write(f"Implemente uma classe Java chamada '{modelo.classe}' com os seguintes requisitos:\n"
+                    f"{modelo.enunciado}")
+        if com_regras:
+            with open(os.path.join(pasta_exercicio, REGRAS_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(_regras(modelo), f, ensure_ascii=False, indent=2)
+        anteriores = []
+        for a in range(alunos):
+            if anteriores and rng.random() < fracao_copias:
+                variante, arquivos = "copia", rng.choice(anteriores)
+            else:
+                variante = rng.choices(("correta", "encapsulamento", "logica"), weights=(5, 2, 3))[0]
+                arquivos = {f"{modelo.classe}.java": _solucao(modelo, variante, rng, rng.randint(0, metodos_extras_max))}
+                for k in range(rng.randint(1, arquivos_max) - 1):
+                    nome = f"Util{k + 1}"
+                    arquivos[f"{nome}.java"] = _classe_auxiliar(nome, rng, rng.randint(1, metodos_extras_max))
+                anteriores.append(arquivos)
+            contagem[variante] += 1
+            pasta_aluno = os.path.join(pasta_exercicio, f"aluno{a + 1:03d}")
+            os.makedirs(pasta_aluno, exist_ok=True)
+            for nome, codigo in arquivos.items():
+                with open(os.path.join(pasta_aluno, nome), "w", encoding="utf-8") as f:
+                    f.write(codigo)
+            arquivos_total += len(arquivos)
+    return {"submissoes": alunos * exercicios, "arquivos": arquivos_total, "variantes": contagem}
@@ -0,0 +1,189 @@
+# Deduplicação de submissões: agrupa programas idênticos para corrigir cada
+# solução distinta uma única vez e aponta cópias próximas (sinal de plágio).
+#
+# Três níveis de comparação, todos sobre os tokens de java_analise.tokenizar
+# (comentários e espaços já descartados):
+#   - exato:    mesma sequência de tokens -> o feedback pode ser reaproveitado
+#               (o único nível que compartilha correção);
+#   - canonico: mesma sequência com os nomes escolhidos pelo aluno renomeados
+#               em ordem de aparição (``saldo`` -> ``$1``) -> cópia com nomes
+#               trocados. Só aponta plágio: programas canonicamente iguais
+#               podem merecer notas diferentes (``Math.max`` x ``Math.min``,
+#               ``deposit`` x o ``depositar`` pedido no enunciado), por isso
+#               membros (``.max``), imports, tipos de biblioteca e os nomes
+#               do enunciado e das regras nunca são renomeados;
+#   - similar:  fingerprints por winnowing sobre k-gramas canônicos, indexados
+#               por MinHash + LSH para escalar a milhares de submissões.
+
+import hashlib
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .java_analise import tokenizar
+
+PALAVRAS_RESERVADAS = {
+    "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char", "class", "const",
+    "continue", "default", "do", "double", "else", "enum", "extends", "final", "finally", "float",
+    "for", "goto", "if", "implements", "import", "instanceof", "int", "interface", "long", "native",
+    "new", "package", "private", "protected", "public", "return", "short", "static", "strictfp",
+    "super", "switch", "synchronized", "this", "throw", "throws", "transient", "try", "void",
+    "volatile", "while", "var", "record", "true", "false", "null",
+}
+
+_PRIMO = (1 << 61) - 1
+
+
+def tokens_normalizados(codigo):
+    """Tokens sem comentários nem espaços (identificadores preservados)."""
+    return [t.valor for t in tokenizar(codigo)]
+
+
+_DECLARA_TIPO = {"class", "interface", "enum", "record"}
+
+
+def _identificador(valor):
+    return (valor[0].isalpha() or valor[0] in "_$") and valor not in PALAVRAS_RESERVADAS
+
+
+def tokens_canonicos(tokens, preservar=()):
+    """Troca por ``$n`` (ordem de primeira aparição) os identificadores escolhidos pelo aluno.
+
+    Ficam como estão: nomes em ``preservar`` (os do enunciado e das regras),
+    membros acessados com ``.`` (``Math.max``, ``lista.add``), nomes de
+    ``import``/``package`` e tipos com inicial maiúscula que o próprio código
+    não declara (``String``, ``Math``, ``ArrayList``).
+    """
+    declarados = {tokens[i + 1] for i, valor in enumerate(tokens[:-1]) if valor in _DECLARA_TIPO}
+    nomes = {}
+    canonicos = []
+    em_import = False
+    for i, valor in enumerate(tokens):
+        if valor in ("import", "package"):
+            em_import = True
+        elif valor == ";":
+            em_import = False
+        elif (_identificador(valor) and not em_import and valor not in preservar
+              and not (i > 0 and tokens[i - 1] == ".")
+              and not (valor[0].isupper() and valor not in declarados)):
+            valor = nomes.setdefault(valor, f"${len(nomes) + 1}")
+        canonicos.append(valor)
+    return canonicos
+
+
+def _hash64(texto):
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def winnowing(tokens, k=8, janela=4):
+    """Fingerprints de Schleimer et al.: o menor hash de cada janela de k-gramas."""
+    if len(tokens) < k:
+        return {_hash64(" ".join(tokens))} if tokens else set()
+    hashes = [_hash64(" ".join(tokens[i:i + k])) for i in range(len(tokens) - k + 1)]
+    if len(hashes) <= janela:
+        return {min(hashes)}
+    return {min(hashes[i:i + janela]) for i in range(len(hashes) - janela + 1)}
+
+
+@dataclass
+class Impressao:
+    """Fingerprints de uma submissão nos três níveis."""
+    id: str
+    grupo: str  # só se compara dentro do mesmo grupo (ex.: mesmo enunciado)
+    hash_exato: str
+    hash_canonico: str
+    fingerprints: set
+
+
+def impressao(id, codigo, grupo="", preservar=()):
+    tokens = tokens_normalizados(codigo)
+    canonicos = tokens_canonicos(tokens, preservar)
+    return Impressao(
+        id=id,
+        grupo=grupo,
+        hash_exato=hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest(),
+        hash_canonico=hashlib.sha256(" ".join(canonicos).encode("utf-8")).hexdigest(),
+        fingerprints=winnowing(canonicos),
+    )
+
+
+class IndiceSimilaridade:
+    """Índice MinHash + LSH: encontra pares candidatos sem comparar todos com todos.
+
+    Com ``bandas`` x ``linhas`` permutações, pares com Jaccard acima de
+    aproximadamente (1/bandas) ** (1/linhas) caem no mesmo balde com alta
+    probabilidade; os candidatos são confirmados pelo Jaccard exato.
+    """
+
+    def __init__(self, bandas=16, linhas=4, semente=42):
+        self.bandas = bandas
+        self.linhas = linhas
+        rng = random.Random(semente)
+        self._perm = [(rng.randrange(1, _PRIMO), rng.randrange(0, _PRIMO)) for _ in range(bandas * linhas)]
+        self._baldes = defaultdict(list)
+        self._impressoes = {}
+
+    def _assinatura(self, fingerprints):
+        if not fingerprints:
+            return [0] * len(self._perm)
+        return [min((a * h + b) % _PRIMO for h in fingerprints) for a, b in self._perm]
+
+    def adicionar(self, imp):
+        self._impressoes[imp.id] = imp
+        assinatura = self._assinatura(imp.fingerprints)
+        for banda in range(self.bandas):
+            trecho = tuple(assinatura[banda * self.linhas:(banda + 1) * self.linhas])
+            self._baldes[(imp.grupo, banda, trecho)].append(imp.id)
+
+    def pares_similares(self, limiar=0.7):
+        """Pares ``(id_a, id_b, jaccard)`` com similaridade >= ``limiar``, do maior para o menor."""
+        candidatos = set()
+        for ids in self._baldes.values():
+            for i in range(len(ids)):
+                for j in range(i + 1, len(ids)):
+                    candidatos.add(tuple(sorted((ids[i], ids[j]))))
+        pares = []
+        for a, b in candidatos:
+            fa, fb = self._impressoes[a].fingerprints, self._impressoes[b].fingerprints
+            uniao = len(fa | fb)
+            jaccard = len(fa & fb) / uniao if uniao else 1.0
+            if jaccard >= limiar:
+                pares.append((a, b, jaccard))
+        return sorted(pares, key=lambda p: (-p[2], p[0], p[1]))
+
+
+@dataclass
+class Agrupamento:
+    """Resultado da deduplicação de um lote."""
+    representantes: List[str] = field(default_factory=list)
+    representante_de: Dict[str, str] = field(default_factory=dict)  # id -> id do representante
+    grupos_canonicos: List[List[str]] = field(default_factory=list)  # cópias com nomes trocados
+    pares_similares: List[Tuple[str, str, float]] = field(default_factory=list)
+
+
+def agrupar(itens, limiar_similaridade=0.7, preservar=None):
+    """Agrupa ``itens`` (lista de ``(id, codigo, grupo)``).
+
+    Só compartilham a correção programas iguais a menos de comentários e
+    formatação, dentro do mesmo ``grupo``. Os grupos canônicos e os pares
+    similares são apenas sinal de plágio. ``preservar`` mapeia cada grupo aos
+    nomes que a forma canônica não renomeia (ver ``tokens_canonicos``).
+    """
+    preservar = preservar or {}
+    indice = IndiceSimilaridade()
+    por_exato, por_canonico = defaultdict(list), defaultdict(list)
+    for id, codigo, grupo in itens:
+        imp = impressao(id, codigo, grupo, preservar.get(grupo, ()))
+        por_exato[(grupo, imp.hash_exato)].append(id)
+        por_canonico[(grupo, imp.hash_canonico)].append(id)
+        indice.adicionar(imp)
+
+    resultado = Agrupamento()
+    for ids in por_exato.values():
+        resultado.representantes.append(ids[0])
+        for id in ids:
+            resultado.representante_de[id] = ids[0]
+    resultado.grupos_canonicos = [ids for ids in por_canonico.values() if len(ids) > 1]
+    resultado.pares_similares = indice.pares_similares(limiar_similaridade)
+    return resultado
@@ -0,0 +1,262 @@
+# Empacotamento do código do aluno dentro de um orçamento de tokens.
+#
+# Em projetos maiores (muitas classes, código gerado, arquivos do modelo do
+# professor) mandar tudo na íntegra estoura o contexto ou só deixa a chamada
+# lenta e cara. Antes de montar o prompt, os arquivos são:
+#   1. filtrados (só quando o código não cabe no orçamento): código gerado
+#      (anotação ``@Generated`` ou "DO NOT EDIT"/"Generated by" no comentário
+#      de cabeçalho), de terceiros e arquivos idênticos ao modelo entregue pelo
+#      professor (pasta ``modelo/`` ao lado do enunciado) saem — nunca um
+#      arquivo que declara uma classe citada no enunciado ou nas regras;
+#   2. ordenados por relevância: classes citadas no enunciado primeiro, depois
+#      as que elas usam (e as que as usam), por distância no grafo de referências;
+#   3. incluídos na íntegra enquanto couberem; os demais entram só com as
+#      assinaturas (``java_analise.resumir_assinaturas``).
+# Se uma classe do enunciado não couber na íntegra, ou algo ligado a ela não
+# couber nem como assinatura, o código é dividido em partes que cabem no orçamento:
+# cada parte é analisada em uma chamada própria (map) e as notas entram no
+# prompt da correção junto com as assinaturas de tudo (reduce; ver ``grafo.py``).
+
+import glob
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List
+
+from .arquivos import concatenar_arquivos_java, read_file_content
+from .java_analise import analisar_java, resumir_assinaturas, tokenizar
+from .limite_taxa import CHARS_POR_TOKEN
+
+MODELO_DIRNAME = "modelo"
+ORCAMENTO_TOKENS_PADRAO = 24_000
+_TOKENS_DELIMITADORES = 30  # marcadores de início/fim de um arquivo na concatenação
+
+# Só marcas explícitas: "// TODO Auto-generated method stub" do Eclipse aparece em código escrito pelo aluno.
+_ANOTACAO_GERADO_RE = re.compile(r"^\s*@(?:(?:javax|jakarta)\.annotation\.(?:processing\.)?)?Generated\b", re.MULTILINE)
+_CABECALHO_GERADO_RE = re.compile(r"\bDO NOT EDIT\b|\bGenerated by\b", re.IGNORECASE)
+_CABECALHO_RE = re.compile(r"\A(?:\s*(?://[^\n]*|/\*.*?\*/))+", re.DOTALL)
+_PACOTES_TERCEIROS = ("org.apache.", "com.google.", "org.junit", "junit.", "javax.", "org.springframework.")
+_PACOTE_RE = re.compile(r"^\s*package\s+([\w.]+)\s*;", re.MULTILINE)
+
+SYSTEM_INSTRUCTION_PARTE = (
+    "Você é um Professor de Programação Orientada a Objetos (POO) da UFLA. "
+    "Você recebe o enunciado e só uma PARTE do código Java de um aluno (o restante será visto depois). "
+    "Liste, em tópicos curtos, os problemas e os acertos relevantes para o enunciado encontrados nesta parte "
+    "(encapsulamento, lógica, erros de compilação), citando classe e método. Não dê nota nem veredito. "
+    "Responda integralmente em português."
+)
+
+
+def contar_tokens(texto):
+    """Estimativa de tokens do texto (a mesma razão caracteres/token do limitador de taxa)."""
+    return len(texto) // CHARS_POR_TOKEN + 1
+
+
+def carregar_modelo(enunciado_path):
+    """Lê os arquivos do modelo do professor (dict nome do arquivo -> código), se houver."""
+    pasta = os.path.join(os.path.dirname(enunciado_path), MODELO_DIRNAME)
+    return {
+        os.path.basename(p): read_file_content(p)
+        for p in sorted(glob.glob(os.path.join(pasta, "*.java")))
+    }
+
+
+@dataclass
+class Empacotamento:
+    """Resultado do empacotamento de uma submissão."""
+    codigo: str  # o que vai no prompt (íntegra + assinaturas, ou só assinaturas quando há partes)
+    partes: List[str] = field(default_factory=list)  # código completo dividido para map/reduce
+    tokens: int = 0
+    tokens_originais: int = 0
+    decisoes: List[dict] = field(default_factory=list)  # {arquivo, acao, motivo, tokens}
+
+
+def _normalizado(conteudo):
+    return [t.valor for t in tokenizar(conteudo)]
+
+
+def _gerado(conteudo):
+    """Arquivo marcado como gerado: anotação ``@Generated`` ou aviso no primeiro bloco de comentários."""
+    if _ANOTACAO_GERADO_RE.search(conteudo):
+        return True
+    cabecalho = _CABECALHO_RE.match(conteudo)
+    return bool(cabecalho and _CABECALHO_GERADO_RE.search(cabecalho.group(0)))
+
+
+def classes_pedidas(enunciado, regras=None):
+    """Identificadores do enunciado e classes das regras: arquivos que declaram uma delas nunca são ignorados."""
+    nomes = set(re.findall(r"\w+", enunciado or ""))
+    regras = regras or {}
+    nomes.update(regras.get("classes", []))
+    nomes.update(r["classe"] for chave in ("atributos", "metodos") for r in regras.get(chave, []) if "classe" in r)
+    return nomes
+
+
+def _motivo_ignorar(nome, conteudo, modelo_normalizado, pedidas):
+    if any(classe.nome in pedidas for classe in analisar_java(conteudo)):
+        return None
+    if nome in modelo_normalizado and _normalizado(conteudo) == modelo_normalizado[nome]:
+        return "igual ao modelo do professor"
+    if _gerado(conteudo):
+        return "código gerado"
+    pacote = _PACOTE_RE.search(conteudo)
+    if pacote and pacote.group(1).startswith(_PACOTES_TERCEIROS):
+        return f"biblioteca de terceiros ({pacote.group(1)})"
+    return None
+
+
+def ordenar_por_relevancia(arquivos, enunciado, regras=None):
+    """Retorna ``[(nome, distancia)]`` do mais ao menos relevante.
+
+    Distância 0 para arquivos que declaram classes citadas no enunciado ou nas ``regras`` (ou,
+    se nenhuma for citada, o ``main``); depois, a distância no grafo "usa o
+    tipo declarado em" entre arquivos. Sem ligação, a distância é ``None``.
+    """
+    declaradas = {}  # classe -> arquivo
+    referencias = {}  # arquivo -> identificadores usados
+    for nome, conteudo in arquivos.items():
+        for classe in analisar_java(conteudo):
+            declaradas.setdefault(classe.nome, nome)
+        referencias[nome] = {t.valor for t in tokenizar(conteudo) if t.tipo == "ident"}
+
+    vizinhos = {nome: set() for nome in arquivos}
+    for nome, idents in referencias.items():
+        for classe, dono in declaradas.items():
+            if dono != nome and classe in idents:
+                vizinhos[nome].add(dono)
+                vizinhos[dono].add(nome)
+
+    citadas = classes_pedidas(enunciado, regras)
+    origem = [n for n in arquivos if any(c in citadas and d == n for c, d in declaradas.items())]
+    if not origem:
+        origem = [n for n in arquivos if "main" in referencias[n] and "static" in referencias[n]]
+    distancia = {n: 0 for n in origem}
+    fila = deque(origem)
+    while fila:
+        atual = fila.popleft()
+        for vizinho in sorted(vizinhos[atual]):
+            if vizinho not in distancia:
+                distancia[vizinho] = distancia[atual] + 1
+                fila.append(vizinho)
+    posicao = {n: i for i, n in enumerate(arquivos)}
+    ordem = sorted(arquivos, key=lambda n: (distancia.get(n, float("inf")), posicao[n]))
+    return [(n, distancia.get(n)) for n in ordem]
+
+
+def _dividir(arquivos, orcamento):
+    """Agrupa os arquivos (na ordem dada) em partes de até ``orcamento`` tokens; arquivos maiores são fatiados por linhas."""
+    orcamento -= _TOKENS_DELIMITADORES
+    partes, atual, tokens_atual = [], {}, 0
+
+    def fechar():
+        nonlocal atual, tokens_atual
+        if atual:
+            partes.append(concatenar_arquivos_java(atual))
+        atual, tokens_atual = {}, 0
+
+    for nome, conteudo in arquivos.items():
+        tokens = contar_tokens(conteudo)
+        if tokens > orcamento:
+            fechar()
+            linhas, pedaco = conteudo.split("\n"), []
+            indice = 1
+            for linha in linhas:
+                if pedaco and contar_tokens("\n".join(pedaco + [linha])) > orcamento:
+                    partes.append(concatenar_arquivos_java({f"{nome} (trecho {indice})": "\n".join(pedaco)}))
+                    pedaco, indice = [], indice + 1
+                pedaco.append(linha)
+            if pedaco:
+                partes.append(concatenar_arquivos_java({f"{nome} (trecho {indice})": "\n".join(pedaco)}))
+            continue
+        tokens += _TOKENS_DELIMITADORES
+        if tokens_atual + tokens > orcamento:
+            fechar()
+        atual[nome] = conteudo
+        tokens_atual += tokens
+    fechar()
+    return partes
+
+
+def _nota_fora(decisoes, acoes=("ignorado", "omitido")):
+    """Comentário final listando o que ficou fora do prompt, para a LLM não supor que falta código."""
+    fora = [f"{d['arquivo']} ({d['motivo'] if d['acao'] == 'ignorado' else 'fora do orçamento'})"
+            for d in decisoes if d["acao"] in acoes]
+    return f"// Arquivos não incluídos: {', '.join(fora)}\n" if fora else ""
+
+
+def empacotar(arquivos, enunciado, orcamento_tokens=ORCAMENTO_TOKENS_PADRAO, modelo=None, dividir=True,
+              regras=None):
+    """Monta o código do prompt dentro de ``orcamento_tokens``.
+
+    ``arquivos`` é um dict nome -> conteúdo (ex.: ``separar_arquivos_java``) e
+    ``modelo`` o mesmo para os arquivos entregues pelo professor. Se tudo
+    couber, nada é filtrado; senão, arquivos gerados, de terceiros ou iguais
+    ao modelo saem, exceto os que declaram classes do enunciado ou de
+    ``regras``. Com
+    ``dividir``, se uma classe do enunciado não couber na íntegra ou um
+    arquivo ligado a ela não couber nem como assinaturas, o código completo
+    vai para ``partes`` e ``codigo`` fica só com as assinaturas que couberem.
+    """
+    tokens_originais = contar_tokens(concatenar_arquivos_java(arquivos))
+    decisoes = []
+    relevantes = {}
+    if tokens_originais <= orcamento_tokens:
+        relevantes = dict(arquivos)
+    else:
+        modelo_normalizado = {nome: _normalizado(c) for nome, c in (modelo or {}).items()}
+        pedidas = classes_pedidas(enunciado, regras)
+        for nome, conteudo in arquivos.items():
+            motivo = _motivo_ignorar(nome, conteudo, modelo_normalizado, pedidas)
+            if motivo is not None:
+                decisoes.append({"arquivo": nome, "acao": "ignorado", "motivo": motivo, "tokens": 0})
+            else:
+                relevantes[nome] = conteudo
+
+    ordem = ordenar_por_relevancia(relevantes, enunciado, regras)
+    escolhidos, tokens = {}, 0
+    excedeu = False  # algo essencial ficou de fora
+    for nome, distancia in ordem:
+        completo = relevantes[nome]
+        motivo = "citado no enunciado" if distancia == 0 else (
+            f"a {distancia} passo(s) das classes do enunciado" if distancia is not None else "sem ligação com o enunciado")
+        custo = contar_tokens(concatenar_arquivos_java({nome: completo}))
+        if tokens + custo <= orcamento_tokens:
+            escolhidos[nome] = completo
+            decisoes.append({"arquivo": nome, "acao": "completo", "motivo": motivo, "tokens": custo})
+            tokens += custo
+            continue
+        resumo = resumir_assinaturas(completo)
+        custo = contar_tokens(concatenar_arquivos_java({f"{nome} (assinaturas)": resumo}))
+        if tokens + custo <= orcamento_tokens:
+            escolhidos[f"{nome} (assinaturas)"] = resumo
+            decisoes.append({"arquivo": nome, "acao": "assinaturas", "motivo": motivo, "tokens": custo})
+            tokens += custo
+            excedeu = excedeu or distancia == 0  # uma classe do enunciado sem o corpo
+        else:
+            excedeu = excedeu or distancia is not None  # arquivos sem ligação podem ficar de fora
+            decisoes.append({"arquivo": nome, "acao": "omitido", "motivo": motivo, "tokens": 0})
+
+    if dividir and excedeu:
+        # Map/reduce: os arquivos ligados ao enunciado são analisados na íntegra, em
+        # partes; o prompt final leva as assinaturas que couberem e as notas de cada parte.
+        ligados = {nome: relevantes[nome] for nome, distancia in ordem if distancia is not None}
+        decisoes = [d for d in decisoes if d["acao"] == "ignorado" or d["arquivo"] not in ligados]
+        for d in decisoes:
+            if d["acao"] != "ignorado":
+                d.update(acao="omitido", tokens=0)
+        assinaturas, tokens = {}, 0
+        for nome, conteudo in ligados.items():
+            bloco = {f"{nome} (assinaturas)": resumir_assinaturas(conteudo)}
+            custo = contar_tokens(concatenar_arquivos_java(bloco))
+            cabe = tokens + custo <= orcamento_tokens
+            if cabe:
+                assinaturas.update(bloco)
+                tokens += custo
+            decisoes.append({"arquivo": nome, "acao": "partes", "motivo": "analisado em partes"
+                             + ("; assinaturas no prompt" if cabe else ""), "tokens": custo if cabe else 0})
+        codigo = concatenar_arquivos_java(assinaturas) + _nota_fora(decisoes)
+        return Empacotamento(codigo, _dividir(ligados, orcamento_tokens), contar_tokens(codigo),
+                             tokens_originais, decisoes)
+    codigo = concatenar_arquivos_java(escolhidos) + _nota_fora(decisoes)
+    return Empacotamento(codigo, [], contar_tokens(codigo), tokens_originais, decisoes)
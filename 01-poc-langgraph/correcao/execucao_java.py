@@ -0,0 +1,232 @@
+# Compilação e execução dos testes do professor sobre o código do aluno.
+# Um pool de processos JVM "quentes" (java/CorrecaoServidor.java) compila em
+# memória via javax.tools e roda os testes em um class loader descartável, de
+# modo que corrigir centenas de submissões não paga a partida da JVM a cada uma.
+#
+# Limites por submissão: tempo de relógio por teste e no total, e tempo de CPU
+# do processo (todas as threads, medido pelo próprio servidor) durante a
+# submissão. ``-Xmx`` limita a memória do trabalhador, que corrige uma
+# submissão por vez; isolamento de rede e disco só com ``prefixo_sandbox``.
+#
+# Testes ficam em ``testes/*.java`` ao lado de ``enunciado_exercicio.txt``. Cada
+# método público sem parâmetros cujo nome começa com ``test`` (ou anotado com
+# ``@Test``) é um caso; use ``Verificacao.assertEquals``/``assertTrue``.
+
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from .arquivos import read_file_content
+
+TESTES_DIRNAME = "testes"
+_JAVA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "java")
+
+
+def carregar_testes(enunciado_path):
+    """Lê os testes do professor (dict nome do arquivo -> código), se houver."""
+    pasta = os.path.join(os.path.dirname(enunciado_path), TESTES_DIRNAME)
+    return {
+        os.path.basename(p): read_file_content(p)
+        for p in sorted(glob.glob(os.path.join(pasta, "*.java")))
+    }
+
+
+def _compilar_servidor(javac):
+    """Compila o servidor uma vez e reaproveita o resultado (cache pelo hash da fonte)."""
+    fontes = [os.path.join(_JAVA_DIR, n) for n in ("CorrecaoServidor.java",)]
+    h = hashlib.sha256()
+    for f in fontes:
+        with open(f, "rb") as arq:
+            h.update(arq.read())
+    destino = os.path.join(tempfile.gettempdir(), f"correcao-jvm-{h.hexdigest()[:16]}")
+    if not os.path.isfile(os.path.join(destino, "CorrecaoServidor.class")):
+        os.makedirs(destino, exist_ok=True)
+        subprocess.run([javac, "-d", destino, *fontes], check=True, capture_output=True)
+    return destino
+
+
+class TrabalhadorJVM:
+    """Um processo ``CorrecaoServidor`` com limite de memória (``-Xmx``, do processo todo)."""
+
+    def __init__(self, classpath, java="java", memoria_mb=256, prefixo_sandbox=None):
+        comando = [
+            java, f"-Xmx{memoria_mb}m", f"-Xss{min(memoria_mb, 16)}m", "-XX:+UseSerialGC",
+            "-XX:ActiveProcessorCount=1", "-XX:TieredStopAtLevel=1",
+            "-cp", classpath, "CorrecaoServidor",
+        ]
+        # ActiveProcessorCount só reduz as threads de GC/JIT; o limite de CPU é o ``cpu_ms`` de cada pedido.
+        # ``prefixo_sandbox`` permite isolar o processo (ex.: ["bwrap", ...] ou ["firejail", "--net=none"]).
+        self.proc = subprocess.Popen(
+            list(prefixo_sandbox or []) + comando,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", bufsize=1, cwd=tempfile.gettempdir(),
+        )
+        # Uma thread leitora por processo permite esperar respostas com timeout.
+        self._linhas = queue.Queue()
+        threading.Thread(target=self._ler_saida, daemon=True).start()
+        self._ler_ate("PRONTO", timeout_s=60)
+
+    def _ler_saida(self):
+        for linha in self.proc.stdout:
+            self._linhas.put(linha)
+        self._linhas.put(None)
+
+    def vivo(self):
+        return self.proc.poll() is None
+
+    def _ler_ate(self, prefixo, timeout_s):
+        limite = time.monotonic() + timeout_s
+        while True:
+            try:
+                linha = self._linhas.get(timeout=max(0.0, limite - time.monotonic()))
+            except queue.Empty:
+                raise TimeoutError(f"JVM não respondeu em {timeout_s:.0f}s.")
+            if linha is None:
+                raise RuntimeError("Processo JVM encerrou inesperadamente (System.exit ou falta de memória?).")
+            if linha.startswith(prefixo):
+                return linha[len(prefixo):].strip()
+
+    def executar(self, pasta, classes_teste, timeout_teste_s, timeout_total_s, cpu_total_s=None):
+        cpu_ms = int(cpu_total_s * 1000) if cpu_total_s else 0
+        self.proc.stdin.write(f"{pasta}\t{int(timeout_teste_s * 1000)}\t{','.join(classes_teste)}\t{cpu_ms}\n")
+        self.proc.stdin.flush()
+        return json.loads(self._ler_ate("RESULTADO ", timeout_total_s))
+
+    def encerrar(self):
+        if self.vivo():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class PoolJVM:
+    """Pool de ``TrabalhadorJVM`` compartilhado entre threads e tarefas asyncio.
+
+    ``timeout_teste_s`` limita cada método de teste e ``timeout_total_s`` a
+    submissão inteira (compilação + testes), em tempo de relógio;
+    ``cpu_total_s`` limita o tempo de CPU que a submissão gasta no processo,
+    somando as threads que o código do aluno criar (``None`` = sem limite).
+    Trabalhadores que estouram um limite ou morrem são descartados e recriados.
+    """
+
+    def __init__(self, tamanho=2, memoria_mb=256, timeout_teste_s=5.0, timeout_total_s=60.0,
+                 java="java", javac="javac", prefixo_sandbox=None, cpu_total_s=20.0):
+        self.tamanho = tamanho
+        self.memoria_mb = memoria_mb
+        self.timeout_teste_s = timeout_teste_s
+        self.timeout_total_s = timeout_total_s
+        self.cpu_total_s = cpu_total_s
+        self.java = java
+        self.prefixo_sandbox = prefixo_sandbox
+        self._classpath = None
+        self._javac = javac
+        self._livres = []
+        self._criados = 0
+        # Quem espera acorda quando um trabalhador volta livre ou quando uma vaga é liberada
+        # (trabalhador morto, descartado ou que nem chegou a subir) para criar outro.
+        self._condicao = threading.Condition()
+
+    def _novo_trabalhador(self):
+        if self._classpath is None:
+            self._classpath = _compilar_servidor(self._javac)
+        return TrabalhadorJVM(self._classpath, self.java, self.memoria_mb, self.prefixo_sandbox)
+
+    def _obter(self):
+        with self._condicao:
+            self._condicao.wait_for(lambda: self._livres or self._criados < self.tamanho)
+            if self._livres:
+                return self._livres.pop()
+            self._criados += 1
+        try:
+            return self._novo_trabalhador()
+        except BaseException:
+            self._liberar_vaga()
+            raise
+
+    def _liberar_vaga(self):
+        with self._condicao:
+            self._criados -= 1
+            self._condicao.notify()
+
+    def _devolver(self, trabalhador):
+        if trabalhador.vivo():
+            with self._condicao:
+                self._livres.append(trabalhador)
+                self._condicao.notify()
+            return
+        trabalhador.encerrar()
+        self._liberar_vaga()
+
+    def executar_testes(self, arquivos_aluno, testes):
+        """Compila ``arquivos_aluno`` + ``testes`` (dicts nome -> código) e roda os testes.
+
+        Retorna ``{"compilou": bool, "erros_compilacao": str, "testes": [...]}``,
+        com um item ``{"classe", "nome", "passou", "mensagem", "tempo_ms"}`` por teste.
+        """
+        pasta = tempfile.mkdtemp(prefix="correcao-exec-")
+        try:
+            src = os.path.join(pasta, "src")
+            os.makedirs(src)
+            for nome, conteudo in {**arquivos_aluno, **testes}.items():
+                with open(os.path.join(src, nome), "w", encoding="utf-8") as f:
+                    f.write(conteudo)
+            shutil.copy(os.path.join(_JAVA_DIR, "Verificacao.java"), src)
+            classes_teste = [os.path.splitext(n)[0] for n in testes]
+
+            try:
+                trabalhador = self._obter()
+            except (OSError, subprocess.CalledProcessError, TimeoutError, RuntimeError) as e:
+                # Sem JDK (javac/java) ou JVM que não sobe: segue sem testes.
+                return {"compilou": False, "erro": f"JVM indisponível: {e}", "testes": []}
+            try:
+                resultado = trabalhador.executar(pasta, classes_teste, self.timeout_teste_s, self.timeout_total_s,
+                                                 self.cpu_total_s)
+                if resultado.pop("encerrando", False):
+                    # O servidor vai sair por causa de um teste preso; não reutilizar.
+                    trabalhador.encerrar()
+                return resultado
+            except (TimeoutError, RuntimeError) as e:
+                trabalhador.encerrar()
+                return {"compilou": False, "erro": str(e), "testes": []}
+            finally:
+                self._devolver(trabalhador)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    async def aexecutar_testes(self, arquivos_aluno, testes):
+        """Versão assíncrona: executa em uma thread para não bloquear o event loop."""
+        return await asyncio.to_thread(self.executar_testes, arquivos_aluno, testes)
+
+    def encerrar(self):
+        with self._condicao:
+            livres, self._livres = self._livres, []
+            self._criados -= len(livres)
+        for trabalhador in livres:
+            trabalhador.encerrar()
+
+
+def formatar_resultado_testes(resultado):
+    """Resumo dos testes para o prompt: a LLM só precisa explicar as falhas."""
+    if resultado.get("erro"):
+        return f"A execução dos testes automatizados falhou: {resultado['erro']}\n"
+    if not resultado.get("compilou"):
+        return (
+            "O código NÃO COMPILOU junto com os testes do professor. Erros do compilador:\n"
+            f"{resultado.get('erros_compilacao', '').strip()}\n"
+        )
+    testes = resultado.get("testes", [])
+    falhas = [t for t in testes if not t["passou"]]
+    linhas = [f"{len(testes) - len(falhas)} de {len(testes)} testes automatizados passaram."]
+    for t in testes:
+        status = "PASSOU" if t["passou"] else f"FALHOU: {t['mensagem']}"
+        linhas.append(f"- {t['classe']}.{t['nome']}: {status}")
+    if falhas:
+        linhas.append("Explique a causa de cada falha no código do aluno; não é preciso reavaliar o que passou.")
+    return "\n".join(linhas) + "\n"
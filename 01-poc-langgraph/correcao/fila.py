@@ -0,0 +1,303 @@
+# Fila de trabalho durável (SQLite) para a correção distribuída.
+#
+# Um coordenador enfileira as submissões (uma tarefa por pasta de aluno/caso);
+# processos trabalhadores, na mesma máquina ou em várias que compartilham o
+# sistema de arquivos, reivindicam tarefas com uma concessão (lease) por
+# tempo limitado, corrigem e gravam o resultado de volta na fila. Enquanto
+# corrige, o trabalhador renova as concessões; se ele morrer, elas expiram e
+# as tarefas voltam a ser reivindicáveis por outro trabalhador. Cada
+# reivindicação recebe um token: só quem tem o token vigente grava o
+# resultado, então um trabalhador "ressuscitado" não sobrescreve o de outro.
+#
+# Os caminhos ficam relativos à raiz da turma, para que cada máquina possa
+# montar a pasta compartilhada em um lugar diferente. Os prazos das
+# concessões usam ``time.time()``: entre máquinas, os relógios precisam
+# estar sincronizados (NTP). SQLite em sistema de arquivos de rede depende de
+# travas de arquivo confiáveis; em NFS antigo, prefira uma máquina só.
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, fields
+
+from .lote import ResultadoSubmissao, Submissao, corrigir_submissao
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id TEXT PRIMARY KEY,
+    ordem INTEGER NOT NULL,
+    submissao TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    trabalhador TEXT,
+    token TEXT,
+    concessao_ate REAL,
+    reivindicacoes INTEGER NOT NULL DEFAULT 0,
+    resultado TEXT,
+    atualizado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tarefas_estado ON tarefas (estado, ordem);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+"""
+
+
+def _relativo(caminho, raiz):
+    return os.path.relpath(caminho, raiz).replace(os.sep, "/")
+
+
+def _submissao(id_, dados, raiz):
+    dados = json.loads(dados)
+    return Submissao(
+        id=id_,
+        pasta=os.path.join(raiz, dados["pasta"]),
+        enunciado_path=os.path.join(raiz, dados["enunciado_path"]),
+        arquivos_java=[os.path.join(raiz, a) for a in dados["arquivos_java"]],
+    )
+
+
+class FilaTrabalho:
+    """Fila de submissões em SQLite, com concessões e reaproveitamento de concessões vencidas.
+
+    Várias threads do mesmo processo podem usá-la (uma conexão protegida
+    por lock) e vários processos podem abrir o mesmo arquivo: cada operação
+    que muda estado roda em uma transação ``BEGIN IMMEDIATE``.
+    """
+
+    def __init__(self, caminho, max_reivindicacoes=3):
+        self.caminho = caminho
+        self.max_reivindicacoes = max_reivindicacoes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _transacao(self, operacao):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                retorno = operacao(self._conn)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return retorno
+
+    # Coordenador
+
+    def enfileirar(self, submissoes, raiz, opcoes=None):
+        """Acrescenta as submissões (as já presentes ficam como estão) e grava raiz e opções da correção.
+
+        Retorna quantas tarefas novas entraram na fila.
+        """
+        raiz = os.path.abspath(raiz)
+        agora = time.time()
+
+        def operacao(conn):
+            base = conn.execute("SELECT COALESCE(MAX(ordem), -1) + 1 FROM tarefas").fetchone()[0]
+            novas = 0
+            for i, s in enumerate(submissoes):
+                submissao = {
+                    "pasta": _relativo(s.pasta, raiz),
+                    "enunciado_path": _relativo(s.enunciado_path, raiz),
+                    "arquivos_java": [_relativo(a, raiz) for a in s.arquivos_java],
+                }
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO tarefas (id, ordem, submissao, estado, atualizado_em) VALUES (?, ?, ?, ?, ?)",
+                    (s.id, base + i, json.dumps(submissao), PENDENTE, agora),
+                )
+                novas += cursor.rowcount
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('raiz', ?)", (raiz,))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('opcoes', ?)", (json.dumps(opcoes or {}),))
+            return novas
+
+        return self._transacao(operacao)
+
+    def reabrir_erros(self):
+        """Devolve à fila as tarefas que terminaram com erro; retorna quantas."""
+        return self._transacao(lambda conn: conn.execute(
+            "UPDATE tarefas SET estado = ?, reivindicacoes = 0, resultado = NULL, trabalhador = NULL, "
+            "token = NULL, concessao_ate = NULL, atualizado_em = ? WHERE estado = ?",
+            (PENDENTE, time.time(), ERRO),
+        ).rowcount)
+
+    def meta(self, chave, padrao=None):
+        with self._lock:
+            linha = self._conn.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return padrao
+        return linha[0] if chave == "raiz" else json.loads(linha[0])
+
+    # Trabalhador
+
+    def reivindicar(self, trabalhador, limite=1, concessao_s=120.0, raiz=None):
+        """Reivindica até ``limite`` tarefas pendentes ou com concessão vencida.
+
+        Retorna ``[(Submissao, token)]``. Tarefas que já foram reivindicadas
+        ``max_reivindicacoes`` vezes sem resultado (ex.: derrubam o
+        trabalhador) terminam com erro em vez de voltar à fila.
+        """
+        raiz = raiz or self.meta("raiz")
+        agora = time.time()
+
+        def operacao(conn):
+            abandonadas = conn.execute(
+                "SELECT id, reivindicacoes FROM tarefas WHERE estado = ? AND concessao_ate < ? AND reivindicacoes >= ?",
+                (EM_ANDAMENTO, agora, self.max_reivindicacoes),
+            ).fetchall()
+            for id_, reivindicacoes in abandonadas:
+                resultado = ResultadoSubmissao(
+                    id=id_, erro=f"Tarefa abandonada: concessão expirou {reivindicacoes} vez(es) sem resultado.")
+                conn.execute(
+                    "UPDATE tarefas SET estado = ?, resultado = ?, token = NULL, atualizado_em = ? WHERE id = ?",
+                    (ERRO, json.dumps(asdict(resultado), ensure_ascii=False), agora, id_),
+                )
+            linhas = conn.execute(
+                "SELECT id, submissao FROM tarefas WHERE estado = ? OR (estado = ? AND concessao_ate < ?) "
+                "ORDER BY ordem LIMIT ?",
+                (PENDENTE, EM_ANDAMENTO, agora, limite),
+            ).fetchall()
+            reivindicadas = []
+            for id_, submissao in linhas:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE tarefas SET estado = ?, trabalhador = ?, token = ?, concessao_ate = ?, "
+                    "reivindicacoes = reivindicacoes + 1, atualizado_em = ? WHERE id = ?",
+                    (EM_ANDAMENTO, trabalhador, token, agora + concessao_s, agora, id_),
+                )
+                reivindicadas.append((_submissao(id_, submissao, raiz), token))
+            return reivindicadas
+
+        return self._transacao(operacao)
+
+    def renovar(self, tokens, concessao_s=120.0):
+        """Estende as concessões ainda vigentes; retorna os tokens perdidos (tarefa reivindicada por outro)."""
+        if not tokens:
+            return []
+        agora = time.time()
+
+        def operacao(conn):
+            perdidos = []
+            for token in tokens:
+                cursor = conn.execute(
+                    "UPDATE tarefas SET concessao_ate = ? WHERE token = ? AND estado = ?",
+                    (agora + concessao_s, token, EM_ANDAMENTO),
+                )
+                if not cursor.rowcount:
+                    perdidos.append(token)
+            return perdidos
+
+        return self._transacao(operacao)
+
+    def concluir(self, resultado, token):
+        """Grava o resultado se ``token`` ainda for o da tarefa; retorna se gravou."""
+        estado = ERRO if resultado.erro else CONCLUIDA
+        return self._transacao(lambda conn: conn.execute(
+            "UPDATE tarefas SET estado = ?, resultado = ?, token = NULL, concessao_ate = NULL, atualizado_em = ? "
+            "WHERE id = ? AND token = ? AND estado = ?",
+            (estado, json.dumps(asdict(resultado), ensure_ascii=False), time.time(), resultado.id, token,
+             EM_ANDAMENTO),
+        ).rowcount == 1)
+
+    # Consulta
+
+    def contagem(self):
+        """Tarefas por estado (``em_andamento`` inclui as de concessão vencida)."""
+        with self._lock:
+            linhas = self._conn.execute("SELECT estado, COUNT(*) FROM tarefas GROUP BY estado").fetchall()
+        contagem = {PENDENTE: 0, EM_ANDAMENTO: 0, CONCLUIDA: 0, ERRO: 0}
+        contagem.update(dict(linhas))
+        return contagem
+
+    def trabalhadores(self):
+        """Concessões vigentes por trabalhador."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT trabalhador, COUNT(*) FROM tarefas WHERE estado = ? AND concessao_ate >= ? GROUP BY trabalhador",
+                (EM_ANDAMENTO, time.time()),
+            ).fetchall())
+
+    def terminada(self):
+        contagem = self.contagem()
+        return contagem[PENDENTE] == 0 and contagem[EM_ANDAMENTO] == 0
+
+    def submissoes(self, raiz=None):
+        """Todas as submissões da fila, na ordem em que foram enfileiradas."""
+        raiz = raiz or self.meta("raiz")
+        with self._lock:
+            linhas = self._conn.execute("SELECT id, submissao FROM tarefas ORDER BY ordem").fetchall()
+        return [_submissao(id_, dados, raiz) for id_, dados in linhas]
+
+    def resultados(self):
+        """``ResultadoSubmissao`` das tarefas terminadas, na ordem em que foram enfileiradas."""
+        nomes = {f.name for f in fields(ResultadoSubmissao)}
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT resultado FROM tarefas WHERE estado IN (?, ?) ORDER BY ordem", (CONCLUIDA, ERRO)
+            ).fetchall()
+        return [ResultadoSubmissao(**{k: v for k, v in json.loads(r).items() if k in nomes}) for (r,) in linhas]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+async def trabalhar(app, fila, trabalhador, max_concorrencia=8, concessao_s=120.0, prazo_s=None, raiz=None,
+                    ao_concluir=None, intervalo_s=2.0, limitador=None):
+    """Laço do trabalhador: reivindica tarefas, corrige com ``app`` e grava os resultados na fila.
+
+    Reivindica só o que cabe em ``max_concorrencia`` (não segura tarefas que
+    outro trabalhador poderia pegar) e renova as concessões a cada terço de
+    ``concessao_s``. Termina quando não há tarefa pendente nem em andamento;
+    enquanto houver concessões de outros trabalhadores, continua consultando
+    a fila a cada ``intervalo_s``, para assumir as que vencerem.
+    ``ao_concluir(resultado, gravado)`` é chamado a cada submissão. Com
+    ``limitador`` (``LimitadorConcorrencia``), reivindica até o limite atual
+    dele em vez de ``max_concorrencia``.
+    Retorna quantos resultados este trabalhador gravou.
+    """
+    semaforo = limitador or asyncio.Semaphore(max_concorrencia)
+    tarefas = {}  # token -> asyncio.Task
+    gravados = 0
+
+    async def renovar_concessoes():
+        while True:
+            await asyncio.sleep(concessao_s / 3)
+            for token in await asyncio.to_thread(fila.renovar, list(tarefas), concessao_s):
+                print(f"Aviso: {trabalhador} perdeu a concessão de uma tarefa; o resultado dela será descartado.")
+
+    renovacao = asyncio.create_task(renovar_concessoes())
+    try:
+        while True:
+            livres = (limitador.limite if limitador else max_concorrencia) - len(tarefas)
+            if livres > 0:
+                for submissao, token in await asyncio.to_thread(fila.reivindicar, trabalhador, livres,
+                                                                concessao_s, raiz):
+                    tarefas[token] = asyncio.create_task(
+                        corrigir_submissao(app, submissao, semaforo, prazo_s=prazo_s))
+            if not tarefas:
+                if await asyncio.to_thread(fila.terminada):
+                    return gravados
+                await asyncio.sleep(intervalo_s)
+                continue
+            prontas, _ = await asyncio.wait(tarefas.values(), timeout=intervalo_s,
+                                            return_when=asyncio.FIRST_COMPLETED)
+            for token, tarefa in list(tarefas.items()):
+                if tarefa in prontas:
+                    del tarefas[token]
+                    resultado = tarefa.result()
+                    gravado = await asyncio.to_thread(fila.concluir, resultado, token)
+                    gravados += gravado
+                    if ao_concluir is not None:
+                        ao_concluir(resultado, gravado)
+    finally:
+        renovacao.cancel()
+        for tarefa in tarefas.values():
+            tarefa.cancel()
@@ -0,0 +1,578 @@
+# Estado, nós e montagem do grafo de correção.
+#
+# O LangGraph (e o langchain_core que vem com ele) só é importado ao montar ou
+# executar um grafo: quem usa apenas o estado (lote, fila, batch, armazém) não
+# paga esse custo na inicialização. ``obter_grafo`` compila cada configuração
+# uma única vez por processo.
+
+import asyncio
+import operator
+import threading
+from typing import Annotated, List, TypedDict
+
+from .arquivos import separar_arquivos_java
+from .avaliacao import AvaliacaoEstruturada, extrair_avaliacao, renderizar_feedback
+from .cache_contexto import get_gerenciador_contexto
+from .cascata import SYSTEM_INSTRUCTION_CASCATA, AvaliacaoComConfianca, motivo_para_escalar
+from .config import MODEL_NAME, SYSTEM_INSTRUCTION_CORRECAO, SYSTEM_INSTRUCTION_CORRECAO_JSON
+from .criterios import AvaliacaoCriterio, consolidar, selecionar_criterios
+from .empacotamento import SYSTEM_INSTRUCTION_PARTE, empacotar
+from .execucao_java import formatar_resultado_testes
+from .llm import (
+    agenerate_content_stream_with_retry,
+    agenerate_content_with_retry,
+    generate_content_stream_with_retry,
+    generate_content_with_retry,
+)
+from .metricas import instrumentar, span_atual
+from .pre_analise import analisar_submissao, formatar_feedback_estatico
+
+
+# O estado é o dicionário compartilhado entre todos os nós do grafo.
+class CorrectionState(TypedDict):
+    """Representa o estado do processo de correção."""
+    enunciado: str
+    codigo_aluno: str
+    # Código que vai no prompt quando há orçamento de tokens (vazio = codigo_aluno inteiro).
+    codigo_prompt: str
+    partes_codigo: List[str]  # código completo dividido para a análise por partes (map/reduce)
+    notas_partes: List[str]  # o que a análise de cada parte encontrou
+    modelo_professor: dict  # Arquivos entregues pelo professor (nome do arquivo -> código)
+    feedback_bruto: str  # Resultado da LLM (Passo 1/Nó Básico)
+    avaliacao_status: str # Status extraído para tomada de decisão futura
+    regras: dict  # Regras estruturadas do exercício (regras_exercicio.json), se houver
+    achados_estaticos: List[dict]  # Problemas confirmados pela pré-análise
+    testes: dict  # Testes do professor (nome do arquivo -> código Java)
+    resultado_testes: dict  # Compilação e matriz passou/falhou dos testes
+    avaliacao_estruturada: dict  # Registro validado da saída estruturada (modo JSON)
+    # Resultados da correção por critério; cada nó de critério acrescenta o seu.
+    avaliacoes_criterios: Annotated[List[dict], operator.add]
+    # Cascata de modelos: próximo nível a tentar e uma entrada por nível consultado.
+    nivel_cascata: int
+    historico_cascata: Annotated[List[dict], operator.add]
+
+
+def format_enunciado_prompt(enunciado):
+    """Parte do prompt comum a todos os alunos do exercício (cacheável)."""
+    return (
+        f"--- ENUNCIADO DO EXERCÍCIO ---\n"
+        f"{enunciado}\n"
+    )
+
+
+def format_aluno_prompt(codigo_aluno, achados=None, resultado_testes=None, notas_partes=None):
+    """Parte do prompt específica de cada submissão."""
+    bloco_achados = ""
+    if notas_partes:
+        bloco_achados = (
+            "--- ANÁLISE PRÉVIA DE CADA PARTE DO CÓDIGO (acima estão só as assinaturas) ---\n"
+            + "".join(f"[Parte {i}]\n{nota.strip()}\n" for i, nota in enumerate(notas_partes, 1))
+        )
+    erros = [a for a in achados or [] if a["severidade"] == "erro"]
+    avisos = [a for a in achados or [] if a["severidade"] != "erro"]
+    if erros:
+        bloco_achados += (
+            "--- PROBLEMAS JÁ CONFIRMADOS PELA ANÁLISE ESTÁTICA ---\n"
+            + "".join(f"- {a['mensagem']}\n" for a in erros)
+            + "Considere-os como fatos; concentre a análise no restante do código.\n"
+        )
+    if avisos:
+        bloco_achados += (
+            "--- PONTOS A VERIFICAR (a análise estática não tem certeza) ---\n"
+            + "".join(f"- {a['mensagem']}\n" for a in avisos)
+        )
+    if resultado_testes:
+        bloco_achados += (
+            "--- RESULTADO DOS TESTES AUTOMATIZADOS ---\n"
+            + formatar_resultado_testes(resultado_testes)
+        )
+    return (
+        "--- CÓDIGO DO ALUNO ---\n"
+        f"```java\n{codigo_aluno}\n```\n\n"
+        f"{bloco_achados}"
+        "Siga a estrutura rígida definida no System Instruction."
+    )
+
+
+def format_correction_prompt(enunciado, codigo_aluno, achados=None, resultado_testes=None):
+    """Formata a entrada de dados para o modelo (usa o SYSTEM_INSTRUCTION global).
+
+    Se a pré-análise já confirmou problemas ou os testes já foram executados,
+    isso vai no prompt para que o modelo não gaste tokens redescobrindo-os.
+    """
+    return format_enunciado_prompt(enunciado) + format_aluno_prompt(codigo_aluno, achados, resultado_testes)
+
+
+def estado_inicial(enunciado, codigo_aluno, regras=None, testes=None, modelo=None):
+    """Monta o estado de entrada do grafo para uma submissão."""
+    return {
+        "enunciado": enunciado,
+        "codigo_aluno": codigo_aluno,
+        "codigo_prompt": "",
+        "partes_codigo": [],
+        "notas_partes": [],
+        "modelo_professor": modelo or {},
+        "feedback_bruto": "",
+        "avaliacao_status": "",
+        "regras": regras or {},
+        "achados_estaticos": [],
+        "testes": testes or {},
+        "resultado_testes": {},
+        "avaliacao_estruturada": {},
+        "avaliacoes_criterios": [],
+        "nivel_cascata": 0,
+        "historico_cascata": [],
+    }
+
+
+def _prompt_do_estado(state):
+    return format_enunciado_prompt(state["enunciado"]) + _aluno_do_estado(state)
+
+
+def _aluno_do_estado(state):
+    return format_aluno_prompt(
+        state.get("codigo_prompt") or state["codigo_aluno"], state.get("achados_estaticos"),
+        state.get("resultado_testes"), state.get("notas_partes"),
+    )
+
+
+def _preparar_chamada(state, system_instruction, model_name=MODEL_NAME):
+    """Retorna ``(prompt, contexto)``: com cache de contexto ativo, só a parte do aluno vai no prompt."""
+    gerenciador = get_gerenciador_contexto()
+    if gerenciador is not None:
+        contexto = gerenciador.obter(model_name, system_instruction, format_enunciado_prompt(state["enunciado"]))
+        if contexto is not None:
+            return _aluno_do_estado(state), contexto
+    return _prompt_do_estado(state), None
+
+
+async def _apreparar_chamada(state, system_instruction, model_name=MODEL_NAME):
+    """Versão assíncrona de ``_preparar_chamada``."""
+    gerenciador = get_gerenciador_contexto()
+    if gerenciador is not None:
+        contexto = await gerenciador.aobter(model_name, system_instruction, format_enunciado_prompt(state["enunciado"]))
+        if contexto is not None:
+            return _aluno_do_estado(state), contexto
+    return _prompt_do_estado(state), None
+
+
+def pre_analise_node(state: CorrectionState) -> dict:
+    """Nó de pré-análise: análise estática do código contra as regras do exercício."""
+    return {"achados_estaticos": analisar_submissao(state["codigo_aluno"], state.get("regras"))}
+
+
+def feedback_estatico_node(state: CorrectionState) -> dict:
+    """Nó alternativo à LLM: monta o feedback só com os achados da pré-análise."""
+    return {
+        "feedback_bruto": formatar_feedback_estatico(state["achados_estaticos"]),
+        "avaliacao_status": "Errado",
+    }
+
+
+def _no_empacotamento(orcamento_tokens):
+    """Nó que encaixa o código no orçamento de tokens (ver ``empacotamento.py``)."""
+    def empacotamento_node(state: CorrectionState) -> dict:
+        pacote = empacotar(separar_arquivos_java(state["codigo_aluno"]), state["enunciado"],
+                           orcamento_tokens, state.get("modelo_professor"), regras=state.get("regras"))
+        span_atual().definir(tokens=pacote.tokens, tokens_originais=pacote.tokens_originais,
+                             partes=len(pacote.partes))
+        return {"codigo_prompt": pacote.codigo, "partes_codigo": pacote.partes}
+    return empacotamento_node
+
+
+def _prompt_parte(state, indice, parte):
+    total = len(state["partes_codigo"])
+    return (
+        format_enunciado_prompt(state["enunciado"])
+        + f"--- PARTE {indice} DE {total} DO CÓDIGO DO ALUNO ---\n```java\n{parte}\n```\n"
+    )
+
+
+def analise_partes_node(state: CorrectionState) -> dict:
+    """Map da correção por partes: uma chamada por parte; a correção final faz o reduce."""
+    notas = [
+        generate_content_with_retry(_prompt_parte(state, i, parte), SYSTEM_INSTRUCTION_PARTE)
+        for i, parte in enumerate(state["partes_codigo"], 1)
+    ]
+    return {"notas_partes": notas}
+
+
+async def aanalise_partes_node(state: CorrectionState) -> dict:
+    """Versão assíncrona: as partes são analisadas em paralelo."""
+    notas = await asyncio.gather(*(
+        agenerate_content_with_retry(_prompt_parte(state, i, parte), SYSTEM_INSTRUCTION_PARTE)
+        for i, parte in enumerate(state["partes_codigo"], 1)
+    ))
+    return {"notas_partes": list(notas)}
+
+
+def _rotear_pos_empacotamento(entrada):
+    def rotear(state: CorrectionState) -> list:
+        return ["analise_partes"] if state.get("partes_codigo") else entrada
+    return rotear
+
+
+def _rotear_pos_pre_analise(pular_llm_se_errado, destinos):
+    def rotear(state: CorrectionState) -> list:
+        erros = [a for a in state.get("achados_estaticos", []) if a["severidade"] == "erro"]
+        pular = (state.get("regras") or {}).get("pular_llm_se_errado", pular_llm_se_errado)
+        return ["feedback_estatico"] if erros and pular else destinos
+    return rotear
+
+
+def _nos_execucao_testes(pool):
+    """Cria as versões síncrona e assíncrona do nó de testes ligadas a ``pool``."""
+    def execucao_testes_node(state: CorrectionState) -> dict:
+        if not state.get("testes"):
+            return {}
+        arquivos = separar_arquivos_java(state["codigo_aluno"])
+        return {"resultado_testes": pool.executar_testes(arquivos, state["testes"])}
+
+    async def aexecucao_testes_node(state: CorrectionState) -> dict:
+        if not state.get("testes"):
+            return {}
+        arquivos = separar_arquivos_java(state["codigo_aluno"])
+        return {"resultado_testes": await pool.aexecutar_testes(arquivos, state["testes"])}
+
+    return execucao_testes_node, aexecucao_testes_node
+
+
+def correction_node(state: CorrectionState) -> dict:
+    """
+    Nó de correção: Recebe o estado, executa a chamada à LLM
+    e atualiza o estado com o feedback bruto e o veredito extraído dele.
+    """
+    prompt, contexto = _preparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO)
+    feedback = generate_content_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO, contexto=contexto)
+    return {"feedback_bruto": feedback, "avaliacao_status": extrair_avaliacao(feedback, completo=True)}
+
+
+async def acorrection_node(state: CorrectionState) -> dict:
+    """Versão assíncrona do nó de correção (usada por ``ainvoke``/``abatch``)."""
+    prompt, contexto = await _apreparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO)
+    feedback = await agenerate_content_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO, contexto=contexto)
+    return {"feedback_bruto": feedback, "avaliacao_status": extrair_avaliacao(feedback, completo=True)}
+
+
+def _estado_da_avaliacao(texto_json):
+    """Valida o JSON uma única vez e preenche os campos do estado."""
+    avaliacao = AvaliacaoEstruturada.model_validate_json(texto_json)
+    return {
+        "feedback_bruto": renderizar_feedback(avaliacao),
+        "avaliacao_status": avaliacao.avaliacao.value,
+        "avaliacao_estruturada": avaliacao.model_dump(mode="json"),
+    }
+
+
+def correction_json_node(state: CorrectionState) -> dict:
+    """Nó de correção com saída estruturada: sem parse de texto livre."""
+    prompt, contexto = _preparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO_JSON)
+    texto = generate_content_with_retry(
+        prompt, SYSTEM_INSTRUCTION_CORRECAO_JSON, response_schema=AvaliacaoEstruturada, contexto=contexto
+    )
+    return _estado_da_avaliacao(texto)
+
+
+async def acorrection_json_node(state: CorrectionState) -> dict:
+    """Versão assíncrona do nó com saída estruturada."""
+    prompt, contexto = await _apreparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO_JSON)
+    texto = await agenerate_content_with_retry(
+        prompt, SYSTEM_INSTRUCTION_CORRECAO_JSON, response_schema=AvaliacaoEstruturada, contexto=contexto
+    )
+    return _estado_da_avaliacao(texto)
+
+
+def _nos_criterio(criterio):
+    """Nós (síncrono e assíncrono) que avaliam a submissão em um único critério."""
+    def _resultado(texto_json):
+        avaliacao = AvaliacaoCriterio.model_validate_json(texto_json)
+        return {"avaliacoes_criterios": [{"criterio": criterio.nome, "avaliacao": avaliacao.model_dump(mode="json")}]}
+
+    def criterio_node(state: CorrectionState) -> dict:
+        prompt, contexto = _preparar_chamada(state, criterio.system_instruction, criterio.model_name)
+        texto = generate_content_with_retry(
+            prompt, criterio.system_instruction, response_schema=AvaliacaoCriterio, contexto=contexto,
+            model_name=criterio.model_name,
+        )
+        return _resultado(texto)
+
+    async def acriterio_node(state: CorrectionState) -> dict:
+        prompt, contexto = await _apreparar_chamada(state, criterio.system_instruction, criterio.model_name)
+        texto = await agenerate_content_with_retry(
+            prompt, criterio.system_instruction, response_schema=AvaliacaoCriterio, contexto=contexto,
+            model_name=criterio.model_name,
+        )
+        return _resultado(texto)
+
+    return criterio_node, acriterio_node
+
+
+def consolidacao_node(state: CorrectionState) -> dict:
+    """Nó redutor: junta as avaliações por critério no feedback final."""
+    avaliacao = consolidar(state["avaliacoes_criterios"])
+    return {
+        "feedback_bruto": renderizar_feedback(avaliacao),
+        "avaliacao_status": avaliacao.avaliacao.value,
+        "avaliacao_estruturada": avaliacao.model_dump(mode="json"),
+    }
+
+
+def _nos_cascata(roteador):
+    """Nós da cascata de modelos: corrigem no nível atual e decidem se escalam (ver ``cascata.py``)."""
+    def _reservar(state):
+        historico = state.get("historico_cascata") or []
+        if historico and historico[-1]["escalou"]:
+            indice = state["nivel_cascata"]  # reservado por quem decidiu escalar
+        else:
+            indice = roteador.reservar(0)
+            if indice is None:
+                raise RuntimeError("Orçamento de todos os níveis da cascata esgotado.")
+        return indice, roteador.niveis[indice].model_name
+
+    def _resultado(state, indice, texto_json):
+        avaliacao = AvaliacaoComConfianca.model_validate_json(texto_json)
+        motivo = motivo_para_escalar(avaliacao, state, roteador.limiar_confianca)
+        # Sem orçamento nos níveis acima, o veredito atual fica como final.
+        proximo = roteador.reservar(indice + 1) if motivo else None
+        roteador.registrar(indice, proximo is not None)
+        base = AvaliacaoEstruturada(**avaliacao.model_dump(exclude={"confianca"}))
+        return {
+            "feedback_bruto": renderizar_feedback(base),
+            "avaliacao_status": avaliacao.avaliacao.value,
+            "avaliacao_estruturada": avaliacao.model_dump(mode="json"),
+            "nivel_cascata": proximo if proximo is not None else indice,
+            "historico_cascata": [{
+                "nivel": indice,
+                "modelo": roteador.niveis[indice].model_name,
+                "avaliacao": avaliacao.avaliacao.value,
+                "confianca": avaliacao.confianca,
+                "motivo": motivo,
+                "escalou": proximo is not None,
+            }],
+        }
+
+    def cascata_node(state: CorrectionState) -> dict:
+        indice, model_name = _reservar(state)
+        prompt, contexto = _preparar_chamada(state, SYSTEM_INSTRUCTION_CASCATA, model_name)
+        texto = generate_content_with_retry(
+            prompt, SYSTEM_INSTRUCTION_CASCATA, response_schema=AvaliacaoComConfianca, contexto=contexto,
+            model_name=model_name,
+        )
+        return _resultado(state, indice, texto)
+
+    async def acascata_node(state: CorrectionState) -> dict:
+        indice, model_name = _reservar(state)
+        prompt, contexto = await _apreparar_chamada(state, SYSTEM_INSTRUCTION_CASCATA, model_name)
+        texto = await agenerate_content_with_retry(
+            prompt, SYSTEM_INSTRUCTION_CASCATA, response_schema=AvaliacaoComConfianca, contexto=contexto,
+            model_name=model_name,
+        )
+        return _resultado(state, indice, texto)
+
+    return cascata_node, acascata_node
+
+
+def _rotear_cascata(state: CorrectionState) -> str:
+    from langgraph.graph import END
+
+    historico = state.get("historico_cascata") or []
+    return "correcao" if historico and historico[-1]["escalou"] else END
+
+
+class _AcompanhamentoStream:
+    """Acumula os trechos e emite eventos no stream ``custom`` do LangGraph.
+
+    Eventos: ``{"trecho": str}`` para cada pedaço de texto e, uma única vez,
+    ``{"avaliacao_status": str}`` assim que a linha ``**Avaliação:**`` chega.
+    """
+
+    def __init__(self):
+        from langgraph.config import get_stream_writer
+
+        self.writer = get_stream_writer()
+        self.partes = []
+        self.avaliacao = ""
+
+    def receber(self, trecho):
+        self.partes.append(trecho)
+        self.writer({"trecho": trecho})
+        if not self.avaliacao:
+            self.avaliacao = extrair_avaliacao("".join(self.partes))
+            if self.avaliacao:
+                self.writer({"avaliacao_status": self.avaliacao})
+
+    def resultado(self):
+        feedback = "".join(self.partes)
+        return {
+            "feedback_bruto": feedback,
+            "avaliacao_status": self.avaliacao or extrair_avaliacao(feedback, completo=True),
+        }
+
+
+def correction_stream_node(state: CorrectionState) -> dict:
+    """Nó de correção em streaming: repassa os trechos da LLM ao ``app.stream``."""
+    acompanhamento = _AcompanhamentoStream()
+    prompt, contexto = _preparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO)
+    for trecho in generate_content_stream_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO, contexto):
+        acompanhamento.receber(trecho)
+    return acompanhamento.resultado()
+
+
+async def acorrection_stream_node(state: CorrectionState) -> dict:
+    """Versão assíncrona do nó em streaming (``app.astream``)."""
+    acompanhamento = _AcompanhamentoStream()
+    prompt, contexto = await _apreparar_chamada(state, SYSTEM_INSTRUCTION_CORRECAO)
+    async for trecho in agenerate_content_stream_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO, contexto):
+        acompanhamento.receber(trecho)
+    return acompanhamento.resultado()
+
+
+def _adicionar_no(workflow, nome, func, afunc=None):
+    """Adiciona o nó com as versões síncrona e assíncrona, medidas por ``metricas.span``.
+
+    Sem ``afunc``, ``ainvoke`` executa ``func`` em uma thread (como o LangGraph faz).
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    afunc = instrumentar(nome, afunc) if afunc is not None else None
+    workflow.add_node(nome, RunnableLambda(instrumentar(nome, func), afunc=afunc, name=nome))
+
+
+def construir_grafo(pre_analise=False, pular_llm_se_errado=True, pool_jvm=None, streaming=False,
+                    saida_estruturada=False, checkpointer=None, criterios=None, cascata=None,
+                    orcamento_tokens=None):
+    """Monta e compila o grafo correcao -> FIM.
+
+    O nó aceita tanto ``invoke`` (versão síncrona) quanto ``ainvoke`` (versão
+    assíncrona, que não ocupa uma thread por chamada em andamento).
+
+    Com ``pre_analise``, o grafo vira pre_analise -> (correcao | feedback_estatico)
+    -> FIM: quando a análise estática confirma erros e ``pular_llm_se_errado``
+    vale (o ``regras_exercicio.json`` pode sobrescrever), a LLM não é chamada.
+
+    Com ``pool_jvm`` (um ``PoolJVM``), o nó execucao_testes compila o código e
+    roda os testes do professor antes da correção pela LLM.
+
+    Com ``streaming``, o nó de correção publica os trechos da resposta no modo
+    ``custom`` de ``app.stream``/``app.astream`` enquanto eles chegam.
+
+    Com ``saida_estruturada``, a LLM responde em JSON (``AvaliacaoEstruturada``)
+    e o registro validado vai para ``avaliacao_estruturada``.
+
+    ``checkpointer`` (ex.: ``AsyncSqliteSaver``) grava o estado após cada nó,
+    permitindo retomar execuções interrompidas (ver ``retomada.py``).
+
+    Com ``criterios`` (lista de nomes de ``criterios.CRITERIOS``; vazia = todos),
+    o nó correcao é substituído por um nó por critério, executados no mesmo
+    passo, e pelo nó consolidacao, que junta os resultados. A saída é sempre
+    estruturada nesse modo.
+
+    Com ``cascata`` (um ``RoteadorCascata``), o nó correcao usa o modelo mais
+    barato primeiro e, por uma aresta condicional de volta a si mesmo, escala
+    para os níveis seguintes quando o veredito é incerto ou contradiz a
+    pré-análise/os testes.
+
+    Com ``orcamento_tokens``, o nó empacotamento (o primeiro do grafo) reduz o
+    código do prompt a esse número de tokens: arquivos gerados ou iguais ao
+    modelo do professor saem, e os menos relevantes para o enunciado ficam só
+    com as assinaturas. Se nem assim couber, o nó analise_partes analisa o
+    código completo em partes, em paralelo, e a correção recebe as notas.
+    """
+    if streaming and saida_estruturada:
+        raise ValueError("streaming e saida_estruturada não podem ser usados juntos.")
+    if streaming and (criterios is not None or cascata is not None):
+        raise ValueError("streaming não pode ser usado com correção por critério ou cascata de modelos.")
+    if criterios is not None and cascata is not None:
+        raise ValueError("correção por critério e cascata de modelos não podem ser usadas juntas.")
+    from langgraph.graph import StateGraph, END
+
+    workflow = StateGraph(CorrectionState)
+    if criterios is not None:
+        nos_criterio = []
+        for criterio in selecionar_criterios(criterios):
+            no, ano = _nos_criterio(criterio)
+            _adicionar_no(workflow, criterio.nome, no, ano)
+            nos_criterio.append(criterio.nome)
+        _adicionar_no(workflow, "consolidacao", consolidacao_node)
+        workflow.add_edge(nos_criterio, "consolidacao")
+        workflow.add_edge("consolidacao", END)
+        _ligar_entrada(workflow, nos_criterio, pre_analise, pular_llm_se_errado, pool_jvm, orcamento_tokens)
+        return workflow.compile(checkpointer=checkpointer)
+    if cascata is not None:
+        no, ano = _nos_cascata(cascata)
+    elif saida_estruturada:
+        no, ano = correction_json_node, acorrection_json_node
+    elif streaming:
+        no, ano = correction_stream_node, acorrection_stream_node
+    else:
+        no, ano = correction_node, acorrection_node
+    _adicionar_no(workflow, "correcao", no, ano)
+    if cascata is not None:
+        workflow.add_conditional_edges("correcao", _rotear_cascata, ["correcao", END])
+    else:
+        workflow.add_edge("correcao", END)
+    _ligar_entrada(workflow, ["correcao"], pre_analise, pular_llm_se_errado, pool_jvm, orcamento_tokens)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_grafos = {}
+_lock_grafos = threading.Lock()
+
+
+def _chave_opcao(valor):
+    if isinstance(valor, (list, tuple)):
+        return tuple(_chave_opcao(v) for v in valor)
+    try:
+        hash(valor)
+    except TypeError:
+        return ("id", id(valor))  # o grafo em cache mantém o objeto vivo
+    return valor
+
+
+def obter_grafo(**opcoes):
+    """Como ``construir_grafo``, mas compila cada configuração uma única vez por processo.
+
+    Objetos (``pool_jvm``, ``checkpointer``, ``cascata``) entram na chave pela
+    identidade: o mesmo objeto reaproveita o grafo já compilado.
+    """
+    chave = tuple(sorted((nome, _chave_opcao(valor)) for nome, valor in opcoes.items()))
+    app = _grafos.get(chave)
+    if app is None:
+        with _lock_grafos:
+            app = _grafos.get(chave)
+            if app is None:
+                app = _grafos[chave] = construir_grafo(**opcoes)
+    return app
+
+
+def _ligar_entrada(workflow, destinos, pre_analise, pular_llm_se_errado, pool_jvm, orcamento_tokens=None):
+    """Liga as etapas opcionais (empacotamento, pré-análise, testes) antes dos nós de correção ``destinos``."""
+    from langgraph.graph import START, END
+
+    if pool_jvm is not None:
+        no, ano = _nos_execucao_testes(pool_jvm)
+        _adicionar_no(workflow, "execucao_testes", no, ano)
+        for destino in destinos:
+            workflow.add_edge("execucao_testes", destino)
+        destinos = ["execucao_testes"]
+    if pre_analise:
+        _adicionar_no(workflow, "pre_analise", pre_analise_node)
+        _adicionar_no(workflow, "feedback_estatico", feedback_estatico_node)
+        workflow.add_conditional_edges(
+            "pre_analise",
+            _rotear_pos_pre_analise(pular_llm_se_errado, destinos),
+            destinos + ["feedback_estatico"],
+        )
+        workflow.add_edge("feedback_estatico", END)
+        destinos = ["pre_analise"]
+    if orcamento_tokens is not None:
+        _adicionar_no(workflow, "empacotamento", _no_empacotamento(orcamento_tokens))
+        _adicionar_no(workflow, "analise_partes", analise_partes_node, aanalise_partes_node)
+        workflow.add_conditional_edges(
+            "empacotamento", _rotear_pos_empacotamento(destinos), destinos + ["analise_partes"]
+        )
+        for destino in destinos:
+            workflow.add_edge("analise_partes", destino)
+        destinos = ["empacotamento"]
+    for destino in destinos:
+        workflow.add_edge(START, destino)
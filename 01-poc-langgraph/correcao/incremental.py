@@ -0,0 +1,206 @@
+# Recorreção incremental: um manifesto guarda, para cada submissão, o hash de
+# cada arquivo, das entradas do exercício (enunciado, regras, testes, modelo
+# do professor) e da configuração da correção (system instructions, modelos e
+# opções do grafo), junto com o resultado produzido. Numa nova execução, só
+# as submissões cujas entradas mudaram voltam ao grafo; as demais reaproveitam
+# o resultado guardado. Mudar o enunciado invalida só as submissões daquele
+# exercício; mudar um prompt ou modelo invalida as que foram corrigidas com ele.
+#
+# Diferente do checkpoint (``retomada.py``), que retoma uma execução
+# interrompida, o manifesto é pensado para ficar junto da turma entre
+# execuções (reenvios de alunos, ajustes no enunciado ou na rubrica).
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, fields
+
+from .cascata import SYSTEM_INSTRUCTION_CASCATA
+from .config import MODEL_NAME, SYSTEM_INSTRUCTION_CORRECAO, SYSTEM_INSTRUCTION_CORRECAO_JSON
+from .criterios import selecionar_criterios
+from .empacotamento import MODELO_DIRNAME, SYSTEM_INSTRUCTION_PARTE
+from .execucao_java import TESTES_DIRNAME
+from .lote import ResultadoSubmissao
+from .pre_analise import REGRAS_FILENAME
+
+VERSAO_MANIFESTO = 1
+_INTERVALO_GRAVACAO_S = 2.0
+
+
+def _hash_texto(*partes):
+    h = hashlib.sha256()
+    for parte in partes:
+        dados = parte.encode("utf-8")
+        h.update(len(dados).to_bytes(8, "big"))
+        h.update(dados)
+    return h.hexdigest()
+
+
+def impressao_configuracao(saida_estruturada=False, criterios=None, cascata=None, pre_analise=False,
+                           testes=False, orcamento_tokens=None):
+    """Hash do que, além das entradas da submissão, muda o resultado: prompts, modelos e opções.
+
+    ``cascata`` é a lista de modelos da cascata (o orçamento de chamadas não
+    entra: ele muda quem é chamado, não o que cada modelo responde).
+    """
+    if criterios is not None:
+        chamadas = [(c.system_instruction, c.model_name) for c in selecionar_criterios(criterios)]
+    elif cascata is not None:
+        chamadas = [(SYSTEM_INSTRUCTION_CASCATA, modelo) for modelo in cascata]
+    elif saida_estruturada:
+        chamadas = [(SYSTEM_INSTRUCTION_CORRECAO_JSON, MODEL_NAME)]
+    else:
+        chamadas = [(SYSTEM_INSTRUCTION_CORRECAO, MODEL_NAME)]
+    if orcamento_tokens is not None:
+        chamadas.append((SYSTEM_INSTRUCTION_PARTE, MODEL_NAME))
+    opcoes = {"pre_analise": pre_analise, "testes": testes, "orcamento_tokens": orcamento_tokens}
+    return _hash_texto(json.dumps({"chamadas": chamadas, "opcoes": opcoes}, sort_keys=True, ensure_ascii=False))
+
+
+class ManifestoIncremental:
+    """Manifesto JSON da recorreção incremental (uma entrada por submissão).
+
+    Guarda também tamanho e mtime de cada arquivo lido, para não reler os
+    que não mudaram. As gravações são atômicas (arquivo temporário +
+    ``os.replace``) e agrupadas: ``registrar`` grava no máximo a cada poucos
+    segundos e ``salvar`` grava o que faltar no fim da execução.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._ultima_gravacao = 0.0
+        self._sujo = False
+        self._hash_arquivos = {}  # caminho -> [mtime_ns, tamanho, sha256]
+        self._hash_exercicios = {}  # enunciado_path -> hash das entradas do exercício
+        self._lidos = set()
+        self.submissoes = {}
+        if os.path.isfile(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("versao") == VERSAO_MANIFESTO:
+                self.submissoes = dados.get("submissoes", {})
+                self._hash_arquivos = dados.get("hashes", {})
+
+    def _hash_arquivo(self, caminho):
+        """SHA-256 do arquivo; reaproveita o hash guardado se tamanho e mtime não mudaram."""
+        stat = os.stat(caminho)
+        self._lidos.add(caminho)
+        anterior = self._hash_arquivos.get(caminho)
+        if anterior is not None and anterior[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return anterior[2]
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 16), b""):
+                h.update(bloco)
+        self._hash_arquivos[caminho] = [stat.st_mtime_ns, stat.st_size, h.hexdigest()]
+        return h.hexdigest()
+
+    def _hash_pasta_java(self, pasta):
+        if not os.path.isdir(pasta):
+            return {}
+        return {n: self._hash_arquivo(os.path.join(pasta, n)) for n in sorted(os.listdir(pasta)) if n.endswith(".java")}
+
+    def _hash_exercicio(self, enunciado_path):
+        """Hash das entradas compartilhadas por todas as submissões do exercício."""
+        if enunciado_path not in self._hash_exercicios:
+            pasta = os.path.dirname(enunciado_path)
+            regras = os.path.join(pasta, REGRAS_FILENAME)
+            entradas = {
+                "enunciado": self._hash_arquivo(enunciado_path),
+                "regras": self._hash_arquivo(regras) if os.path.isfile(regras) else None,
+                "testes": self._hash_pasta_java(os.path.join(pasta, TESTES_DIRNAME)),
+                "modelo": self._hash_pasta_java(os.path.join(pasta, MODELO_DIRNAME)),
+            }
+            self._hash_exercicios[enunciado_path] = _hash_texto(json.dumps(entradas, sort_keys=True))
+        return self._hash_exercicios[enunciado_path]
+
+    def impressao(self, submissao, configuracao):
+        """Hashes das entradas de uma submissão: arquivos, exercício e configuração."""
+        return {
+            "arquivos": {os.path.basename(p): self._hash_arquivo(p) for p in submissao.arquivos_java},
+            "exercicio": self._hash_exercicio(submissao.enunciado_path),
+            "configuracao": configuracao,
+        }
+
+    def _motivo(self, submissao_id, impressao):
+        anterior = self.submissoes.get(submissao_id)
+        if anterior is None:
+            return "nova"
+        if anterior.get("resultado") is None:
+            return "sem resultado"
+        if anterior["configuracao"] != impressao["configuracao"]:
+            return "configuração alterada"
+        if anterior["exercicio"] != impressao["exercicio"]:
+            return "exercício alterado"
+        if anterior["arquivos"] != impressao["arquivos"]:
+            return "arquivos alterados"
+        return None
+
+    def calcular_pendentes(self, submissoes, configuracao):
+        """Separa as submissões a corrigir das que podem reaproveitar o resultado.
+
+        Retorna ``(pendentes, reaproveitados, impressoes, motivos)``:
+        ``reaproveitados`` traz os ``ResultadoSubmissao`` guardados,
+        ``impressoes`` os hashes a registrar e ``motivos`` conta por que cada
+        submissão pendente precisa ser corrigida. Arquivos ilegíveis deixam a
+        submissão pendente, para que o erro apareça na correção.
+        """
+        pendentes, reaproveitados, impressoes, motivos = [], [], {}, {}
+        for submissao in submissoes:
+            try:
+                impressao = self.impressao(submissao, configuracao)
+            except OSError:
+                motivo, impressao = "erro de leitura", None
+            else:
+                motivo = self._motivo(submissao.id, impressao)
+            if motivo is None:
+                reaproveitados.append(self.resultado(submissao.id))
+                continue
+            pendentes.append(submissao)
+            impressoes[submissao.id] = impressao
+            motivos[motivo] = motivos.get(motivo, 0) + 1
+        atuais = {s.id for s in submissoes}
+        with self._lock:
+            for removida in set(self.submissoes) - atuais:
+                del self.submissoes[removida]
+                self._sujo = True
+            for caminho in set(self._hash_arquivos) - self._lidos:
+                del self._hash_arquivos[caminho]
+        return pendentes, reaproveitados, impressoes, motivos
+
+    def resultado(self, submissao_id):
+        """O ``ResultadoSubmissao`` guardado, marcado como reaproveitado."""
+        nomes = {f.name for f in fields(ResultadoSubmissao)}
+        guardado = {k: v for k, v in self.submissoes[submissao_id]["resultado"].items() if k in nomes}
+        return ResultadoSubmissao(**{**guardado, "retomada": True, "duracao_s": 0.0})
+
+    def registrar(self, resultado, impressao):
+        """Guarda o resultado com os hashes das entradas; erros não são guardados (serão refeitos)."""
+        if impressao is None:
+            return
+        with self._lock:
+            self.submissoes[resultado.id] = {
+                **impressao,
+                "resultado": None if resultado.erro else asdict(resultado),
+                "atualizado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._sujo = True
+            if time.monotonic() - self._ultima_gravacao >= _INTERVALO_GRAVACAO_S:
+                self._salvar()
+
+    def salvar(self):
+        with self._lock:
+            if self._sujo:
+                self._salvar()
+
+    def _salvar(self):
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"versao": VERSAO_MANIFESTO, "submissoes": self.submissoes, "hashes": self._hash_arquivos},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+        self._ultima_gravacao = time.monotonic()
+        self._sujo = False
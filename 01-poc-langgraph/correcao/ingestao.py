@@ -0,0 +1,305 @@
+# Ingestão de submissões direto de pacotes .zip/.tar(.gz/.bz2/.xz) exportados
+# pelo LMS, sem extrair nada para o disco.
+#
+# Cada pasta do pacote com arquivos .java vira uma submissão (o mesmo layout
+# de ``lote.descobrir_submissoes``), gerada sob demanda: só os arquivos da
+# submissão atual ficam em memória, então o consumo não cresce com o tamanho
+# do pacote. O enunciado (e o regras_exercicio.json) vêm da própria pasta ou
+# de uma pasta acima dela no pacote; sem eles, do enunciado em disco
+# informado, de onde também vêm os testes e o modelo do professor.
+#
+# Arquivos de build e de IDE (bin/, target/, .class, __MACOSX...) e binários
+# são ignorados. A codificação de cada arquivo é detectada e normalizada
+# (``arquivos.decodificar``). Um arquivo corrompido, grande demais ou ilegível
+# vira um erro só daquela submissão (``ErroIngestao`` ao corrigir), não o fim
+# do processo.
+
+import itertools
+import json
+import posixpath
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .arquivos import concatenar_arquivos_java, decodificar, parece_binario
+from .empacotamento import MODELO_DIRNAME, carregar_modelo
+from .execucao_java import TESTES_DIRNAME, carregar_testes
+from .lote import ENUNCIADO_FILENAME
+from .pre_analise import REGRAS_FILENAME, carregar_regras
+
+EXTENSOES_PACOTE = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# Pastas geradas por IDEs/ferramentas de build, metadados do macOS e os
+# materiais do professor (testes/ e modelo/), que não são código do aluno.
+PASTAS_IGNORADAS = {
+    "bin", "build", "out", "target", "classes", ".git", ".svn", ".idea", ".vscode", ".settings",
+    ".gradle", "__MACOSX", "node_modules", TESTES_DIRNAME, MODELO_DIRNAME,
+}
+MAX_BYTES_ARQUIVO = 1 << 20  # 1 MiB: acima disso não é código escrito à mão
+MAX_BYTES_SUBMISSAO = 4 << 20
+MAX_BYTES_ENUNCIADO = 1 << 20
+
+# Falhas ao ler uma entrada: CRC errado, compressão sem suporte, entrada cifrada, dados truncados...
+_ERROS_LEITURA = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError, ValueError,
+                  RuntimeError, NotImplementedError)
+# Falhas do pacote em si (truncado, compressão corrompida): a leitura para ali.
+_ERROS_PACOTE = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError)
+
+
+class ErroIngestao(RuntimeError):
+    """A submissão não pôde ser lida do pacote (arquivo corrompido, grande demais, sem enunciado...)."""
+
+
+@dataclass
+class SubmissaoPacote:
+    """Submissão lida de um pacote: o conteúdo já vem em memória, decodificado.
+
+    Tem a mesma interface usada pela correção em lote que ``lote.Submissao``
+    (``id``, ``enunciado_path`` e ``ler()``).
+    """
+    id: str
+    pacote: str
+    enunciado: str = ""
+    codigo_aluno: str = ""
+    regras: Optional[dict] = None
+    enunciado_path: Optional[str] = None  # enunciado em disco (testes e modelo do professor vêm de lá)
+    arquivos: List[str] = field(default_factory=list)
+    codificacoes: Dict[str, str] = field(default_factory=dict)  # só os arquivos que não estavam em UTF-8
+    ignorados: List[str] = field(default_factory=list)
+    erro: Optional[str] = None
+
+    def ler(self):
+        """``(enunciado, codigo, regras, testes, modelo)``; levanta ``ErroIngestao`` se a leitura falhou."""
+        if self.erro:
+            raise ErroIngestao(self.erro)
+        if self.enunciado_path is None:
+            return self.enunciado, self.codigo_aluno, self.regras, {}, {}
+        return (self.enunciado, self.codigo_aluno, self.regras, carregar_testes(self.enunciado_path),
+                carregar_modelo(self.enunciado_path))
+
+
+def eh_pacote(caminho):
+    return caminho.lower().endswith(EXTENSOES_PACOTE)
+
+
+def _ignorado(nome):
+    partes = nome.split("/")
+    return any(p in PASTAS_IGNORADAS for p in partes[:-1]) or partes[-1].startswith("._")
+
+
+def _ler_limitado(arquivo, tamanho, limite):
+    """Lê no máximo ``limite`` bytes (o tamanho declarado no pacote pode mentir)."""
+    if tamanho > limite:
+        raise ErroIngestao(f"{tamanho} bytes (limite: {limite})")
+    dados = arquivo.read(limite + 1)
+    if len(dados) > limite:
+        raise ErroIngestao(f"mais de {limite} bytes (limite: {limite})")
+    return dados
+
+
+class _Materiais:
+    """Enunciados e regras encontrados no pacote, por pasta, mais o enunciado em disco (se houver)."""
+
+    def __init__(self, enunciado_path=None):
+        self.enunciado_path = enunciado_path
+        self.enunciado_disco = None
+        if enunciado_path is not None:
+            with open(enunciado_path, "rb") as f:
+                self.enunciado_disco = decodificar(f.read())[0]
+        self.regras_disco = carregar_regras(enunciado_path) if enunciado_path else None
+        self.enunciados = {}  # pasta no pacote -> texto
+        self.regras = {}
+
+    def registrar(self, nome, tamanho, abrir):
+        pasta, base = posixpath.split(nome)
+        try:
+            with abrir() as f:
+                texto = decodificar(_ler_limitado(f, tamanho, MAX_BYTES_ENUNCIADO))[0]
+            if base == ENUNCIADO_FILENAME:
+                self.enunciados[pasta] = texto
+            else:
+                self.regras[pasta] = json.loads(texto)
+        except _ERROS_LEITURA as e:  # inclui ErroIngestao e JSON inválido
+            print(f"Aviso: {nome} ignorado ({type(e).__name__}: {e}).")
+
+    def para(self, pasta):
+        """``(enunciado, regras, enunciado_path)`` da pasta: o mais próximo no pacote ou o do disco."""
+        atual = pasta
+        while True:
+            if atual in self.enunciados:
+                return self.enunciados[atual], self.regras.get(atual), None
+            if not atual:
+                break
+            atual = posixpath.dirname(atual)
+        if self.enunciado_disco is None:
+            return None, None, None
+        return self.enunciado_disco, self.regras_disco, self.enunciado_path
+
+
+def _montar(pacote, pasta, arquivos, materiais, max_bytes_submissao, max_bytes_arquivo):
+    """Lê os .java de uma pasta (``arquivos``: lista de ``(nome, tamanho, abrir)``) e monta a submissão."""
+    submissao = SubmissaoPacote(id=pasta or ".", pacote=pacote)
+    enunciado, regras, enunciado_path = materiais.para(pasta)
+    if enunciado is None:
+        submissao.erro = f"nenhum {ENUNCIADO_FILENAME} no pacote para {submissao.id} e nenhum --enunciado informado"
+        return submissao
+    submissao.enunciado, submissao.regras, submissao.enunciado_path = enunciado, regras, enunciado_path
+    conteudos = {}
+    total = 0
+    for nome, tamanho, abrir in sorted(arquivos, key=lambda a: a[0]):  # mesma ordem de descobrir_submissoes
+        base = posixpath.basename(nome)
+        try:
+            total += tamanho
+            if total > max_bytes_submissao:
+                raise ErroIngestao(f"a submissão passa de {max_bytes_submissao} bytes de código")
+            with abrir() as f:
+                dados = _ler_limitado(f, tamanho, max_bytes_arquivo)
+        except ErroIngestao as e:
+            submissao.erro = f"{base}: {e}"
+            return submissao
+        except _ERROS_LEITURA as e:
+            submissao.erro = f"{base}: arquivo corrompido no pacote ({type(e).__name__}: {e})"
+            return submissao
+        if parece_binario(dados):
+            submissao.ignorados.append(nome)
+            continue
+        conteudos[base], codificacao = decodificar(dados)
+        if codificacao != "utf-8":
+            submissao.codificacoes[base] = codificacao
+    if not conteudos:
+        submissao.erro = "nenhum arquivo .java legível na submissão"
+        return submissao
+    submissao.arquivos = list(conteudos)
+    submissao.codigo_aluno = concatenar_arquivos_java(conteudos)
+    return submissao
+
+
+def _ler_zip(caminho, materiais, max_bytes_submissao, max_bytes_arquivo):
+    with zipfile.ZipFile(caminho) as zf:
+        # O diretório central já lista tudo: os enunciados são lidos antes dos alunos.
+        javas = []
+        for info in zf.infolist():
+            nome = info.filename.replace("\\", "/")
+            if info.is_dir() or _ignorado(nome):
+                continue
+            base = posixpath.basename(nome)
+            if base in (ENUNCIADO_FILENAME, REGRAS_FILENAME):
+                materiais.registrar(nome, info.file_size, lambda: zf.open(info))
+            elif base.endswith(".java"):
+                javas.append((nome, info))
+        javas.sort(key=lambda j: j[0])
+        for pasta, grupo in itertools.groupby(javas, key=lambda j: posixpath.dirname(j[0])):
+            arquivos = [(nome, info.file_size, lambda info=info: zf.open(info)) for nome, info in grupo]
+            yield _montar(caminho, pasta, arquivos, materiais, max_bytes_submissao, max_bytes_arquivo)
+
+
+def _nome_tar(membro):
+    nome = membro.name
+    while nome.startswith("./"):
+        nome = nome[2:]
+    return nome.lstrip("/")
+
+
+def _membros_tar(caminho):
+    """Percorre o .tar em modo stream (sem voltar no arquivo), sem acumular os ``TarInfo`` lidos."""
+    with tarfile.open(caminho, "r|*") as tf:
+        for membro in tf:
+            yield tf, membro
+            tf.members = []  # o TarFile guarda todos os membros já lidos; aqui isso não é necessário
+
+
+class _BytesLidos:
+    """Conteúdo já lido, com a interface de arquivo que ``_montar`` usa."""
+
+    def __init__(self, dados):
+        self.dados = dados
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def read(self, n=-1):
+        return self.dados if n < 0 else self.dados[:n]
+
+
+def _ler_tar(caminho, materiais, max_bytes_submissao, max_bytes_arquivo):
+    # 1ª passada: só os enunciados/regras (o tar não tem índice e eles podem vir depois dos alunos).
+    # Num pacote truncado ficam os materiais achados até a falha; a 2ª passada corrige os alunos
+    # até o mesmo ponto e só então termina com a submissão de erro (ver ``_gerar``).
+    try:
+        for tf, membro in _membros_tar(caminho):
+            nome = _nome_tar(membro)
+            if membro.isfile() and posixpath.basename(nome) in (ENUNCIADO_FILENAME, REGRAS_FILENAME) \
+                    and not _ignorado(nome):
+                materiais.registrar(nome, membro.size, lambda: tf.extractfile(membro))
+    except _ERROS_PACOTE as e:
+        print(f"Aviso: {caminho} está corrompido; enunciados e regras procurados só até o ponto da falha "
+              f"({type(e).__name__}: {e}).")
+
+    # 2ª passada: os .java, agrupados por pasta na ordem do pacote (o tar grava pasta por pasta).
+    # No modo stream o conteúdo de um membro só pode ser lido antes do próximo,
+    # então os bytes da pasta atual ficam em memória até ela terminar.
+    vistas = set()
+    pasta, lidos, erro = None, [], None
+
+    def fechar():
+        if pasta in vistas:
+            erro_pasta = "arquivos da pasta espalhados pelo pacote; gere o .tar de novo"
+        else:
+            erro_pasta = erro
+        vistas.add(pasta)
+        if erro_pasta is not None:
+            return SubmissaoPacote(id=pasta or ".", pacote=caminho, erro=erro_pasta)
+        arquivos = [(n, len(d), lambda d=d: _BytesLidos(d)) for n, d in lidos]
+        return _montar(caminho, pasta, arquivos, materiais, max_bytes_submissao, max_bytes_arquivo)
+
+    total = 0
+    for tf, membro in _membros_tar(caminho):
+        nome = _nome_tar(membro)
+        if not membro.isfile() or not nome.endswith(".java") or _ignorado(nome):
+            continue
+        if posixpath.dirname(nome) != pasta:
+            if lidos or erro is not None:
+                yield fechar()
+            pasta, lidos, erro, total = posixpath.dirname(nome), [], None, 0
+        if erro is not None:
+            continue
+        total += membro.size
+        try:
+            if total > max_bytes_submissao:
+                raise ErroIngestao(f"a submissão passa de {max_bytes_submissao} bytes de código")
+            lidos.append((nome, _ler_limitado(tf.extractfile(membro), membro.size, max_bytes_arquivo)))
+        except ErroIngestao as e:
+            erro, lidos = f"{posixpath.basename(nome)}: {e}", []
+    if lidos or erro is not None:
+        yield fechar()
+
+
+def ler_pacote(caminho, enunciado_path=None, max_bytes_submissao=MAX_BYTES_SUBMISSAO,
+               max_bytes_arquivo=MAX_BYTES_ARQUIVO):
+    """Gera as submissões de um pacote .zip/.tar sob demanda (ver o início do módulo).
+
+    Um arquivo que não é zip/tar levanta ``ErroIngestao`` na hora. Depois
+    disso, problemas de um aluno viram ``erro`` na submissão dele, e um pacote
+    truncado no meio termina com uma submissão de erro em vez de derrubar o lote.
+    """
+    zip_ = caminho.lower().endswith(".zip")
+    try:
+        valido = zipfile.is_zipfile(caminho) if zip_ else tarfile.is_tarfile(caminho)
+    except _ERROS_PACOTE as e:  # ex.: gzip truncado logo no começo
+        raise ErroIngestao(f"{caminho} não pôde ser lido ({type(e).__name__}: {e})") from e
+    if not valido:
+        raise ErroIngestao(f"{caminho} não é um arquivo {'.zip' if zip_ else '.tar'} válido")
+    submissoes = _ler_zip if zip_ else _ler_tar
+    return _gerar(caminho, submissoes(caminho, _Materiais(enunciado_path), max_bytes_submissao, max_bytes_arquivo))
+
+
+def _gerar(caminho, submissoes):
+    try:
+        yield from submissoes
+    except _ERROS_PACOTE as e:
+        yield SubmissaoPacote(id=f"{posixpath.basename(caminho)}:restante", pacote=caminho,
+                              erro=f"pacote corrompido; a leitura parou aqui ({type(e).__name__}: {e})")
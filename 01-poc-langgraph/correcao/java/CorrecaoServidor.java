@@ -0,0 +1,230 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.annotation.Annotation;
+import java.lang.management.ManagementFactory;
+import java.lang.management.OperatingSystemMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.lang.reflect.Modifier;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import javax.tools.Diagnostic;
+import javax.tools.DiagnosticCollector;
+import javax.tools.JavaCompiler;
+import javax.tools.JavaFileObject;
+import javax.tools.StandardJavaFileManager;
+import javax.tools.ToolProvider;
+
+/**
+ * Servidor de compilação e testes mantido "quente" pelo pool em execucao_java.py.
+ *
+ * Protocolo (uma linha por pedido, campos separados por TAB):
+ *   <pasta>\t<timeout_ms>\t<ClasseTeste1,ClasseTeste2,...>[\t<cpu_ms>]
+ * A pasta contém src/ com os .java do aluno e dos testes. A resposta é uma
+ * única linha "RESULTADO {json}". timeout_ms é o tempo de relógio de cada
+ * teste; cpu_ms (opcional, 0 = sem limite) é o tempo de CPU do processo que
+ * a submissão inteira pode gastar, somando todas as threads (inclusive as
+ * que o código do aluno criar). Se algum teste estourar um dos limites, o
+ * processo responde e encerra, pois a thread presa não pode ser interrompida
+ * com segurança; o pool em Python sobe um processo novo.
+ */
+public class CorrecaoServidor {
+
+    private static final PrintStream PROTOCOLO = System.out;
+    private static final long INTERVALO_VERIFICACAO_MS = 50;
+
+    public static void main(String[] args) throws Exception {
+        BufferedReader entrada = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        JavaCompiler compilador = ToolProvider.getSystemJavaCompiler();
+        PROTOCOLO.println("PRONTO");
+        PROTOCOLO.flush();
+        String linha;
+        while ((linha = entrada.readLine()) != null) {
+            String[] campos = linha.split("\t", -1);
+            boolean contaminado = false;
+            StringBuilder json = new StringBuilder();
+            try {
+                long limiteCpuNs = campos.length > 3 ? Long.parseLong(campos[3]) * 1_000_000L : 0;
+                contaminado = processar(compilador, new File(campos[0]), Long.parseLong(campos[1]),
+                        campos[2].isEmpty() ? new String[0] : campos[2].split(","), limiteCpuNs, json);
+            } catch (Throwable t) {
+                json.setLength(0);
+                json.append("{\"compilou\":false,\"erro\":").append(texto(t.toString())).append("}");
+            }
+            PROTOCOLO.println("RESULTADO " + json);
+            PROTOCOLO.flush();
+            if (contaminado) {
+                System.exit(3);
+            }
+        }
+    }
+
+    private static boolean processar(JavaCompiler compilador, File pasta, long timeoutMs, String[] classesTeste,
+                                     long limiteCpuNs, StringBuilder json) throws Exception {
+        long cpuInicio = cpuProcessoNs();
+        File src = new File(pasta, "src");
+        File classes = new File(pasta, "classes");
+        classes.mkdirs();
+        File[] fontes = src.listFiles((d, nome) -> nome.endsWith(".java"));
+        if (fontes == null) {
+            fontes = new File[0];
+        }
+
+        DiagnosticCollector<JavaFileObject> diagnosticos = new DiagnosticCollector<>();
+        boolean compilou;
+        try (StandardJavaFileManager arquivos = compilador.getStandardFileManager(diagnosticos, null, StandardCharsets.UTF_8)) {
+            compilou = compilador.getTask(null, arquivos, diagnosticos,
+                    Arrays.asList("-d", classes.getAbsolutePath(), "-encoding", "UTF-8", "-nowarn"),
+                    null, arquivos.getJavaFileObjectsFromFiles(Arrays.asList(fontes))).call();
+        }
+        if (!compilou) {
+            StringBuilder erros = new StringBuilder();
+            for (Diagnostic<? extends JavaFileObject> d : diagnosticos.getDiagnostics()) {
+                if (d.getKind() == Diagnostic.Kind.ERROR) {
+                    String arquivo = d.getSource() == null ? "?" : new File(d.getSource().getName()).getName();
+                    erros.append(arquivo).append(":").append(d.getLineNumber()).append(": ")
+                            .append(d.getMessage(null)).append("\n");
+                }
+            }
+            json.append("{\"compilou\":false,\"erros_compilacao\":").append(texto(erros.toString()))
+                    .append(",\"testes\":[]}");
+            return false;
+        }
+
+        boolean contaminado = false;
+        List<String> resultados = new ArrayList<>();
+        PrintStream outOriginal = System.out;
+        PrintStream errOriginal = System.err;
+        PrintStream descarte = new PrintStream(new ByteArrayOutputStream(), true, "UTF-8");
+        System.setOut(descarte);
+        System.setErr(descarte);
+        try (URLClassLoader carregador = new URLClassLoader(new URL[]{classes.toURI().toURL()},
+                ClassLoader.getPlatformClassLoader())) {
+            for (String nomeClasse : classesTeste) {
+                Class<?> classe = carregador.loadClass(nomeClasse);
+                for (Method metodo : metodosDeTeste(classe)) {
+                    String[] saida = executarTeste(classe, metodo, timeoutMs, cpuInicio, limiteCpuNs);
+                    if ("timeout".equals(saida[0])) {
+                        contaminado = true;
+                    }
+                    resultados.add("{\"classe\":" + texto(nomeClasse) + ",\"nome\":" + texto(metodo.getName())
+                            + ",\"passou\":" + "ok".equals(saida[0]) + ",\"mensagem\":" + texto(saida[1])
+                            + ",\"tempo_ms\":" + saida[2] + "}");
+                    if (contaminado) {
+                        break;
+                    }
+                }
+                if (contaminado) {
+                    break;
+                }
+            }
+        } finally {
+            System.setOut(outOriginal);
+            System.setErr(errOriginal);
+        }
+        json.append("{\"compilou\":true,\"testes\":[").append(String.join(",", resultados))
+                .append("],\"encerrando\":").append(contaminado).append("}");
+        return contaminado;
+    }
+
+    /** Métodos públicos sem parâmetros anotados com @Test ou com nome iniciado por "test". */
+    private static List<Method> metodosDeTeste(Class<?> classe) {
+        List<Method> metodos = new ArrayList<>();
+        for (Method m : classe.getDeclaredMethods()) {
+            if (!Modifier.isPublic(m.getModifiers()) || m.getParameterCount() != 0) {
+                continue;
+            }
+            boolean anotado = false;
+            for (Annotation a : m.getAnnotations()) {
+                anotado |= a.annotationType().getSimpleName().equals("Test");
+            }
+            if (anotado || m.getName().startsWith("test")) {
+                metodos.add(m);
+            }
+        }
+        metodos.sort((a, b) -> a.getName().compareTo(b.getName()));
+        return metodos;
+    }
+
+    /** Tempo de CPU do processo (todas as threads), em ns; -1 se a JVM não informa. */
+    private static long cpuProcessoNs() {
+        OperatingSystemMXBean so = ManagementFactory.getOperatingSystemMXBean();
+        if (so instanceof com.sun.management.OperatingSystemMXBean) {
+            return ((com.sun.management.OperatingSystemMXBean) so).getProcessCpuTime();
+        }
+        return -1;
+    }
+
+    /**
+     * Retorna {status, mensagem, tempo_ms}; status é ok, falha ou timeout. Estoura com timeoutMs de
+     * relógio no teste ou com limiteCpuNs de CPU do processo desde cpuInicio (início da submissão).
+     */
+    private static String[] executarTeste(Class<?> classe, Method metodo, long timeoutMs, long cpuInicio,
+                                          long limiteCpuNs) throws InterruptedException {
+        final String[] resultado = {"falha", "", "0"};
+        Thread execucao = new Thread(() -> {
+            try {
+                Object instancia = Modifier.isStatic(metodo.getModifiers())
+                        ? null : classe.getDeclaredConstructor().newInstance();
+                metodo.invoke(instancia);
+                resultado[0] = "ok";
+            } catch (InvocationTargetException e) {
+                Throwable causa = e.getCause();
+                resultado[1] = causa instanceof AssertionError && causa.getMessage() != null
+                        ? causa.getMessage() : String.valueOf(causa);
+            } catch (Throwable t) {
+                resultado[1] = String.valueOf(t);
+            }
+        });
+        execucao.setDaemon(true);
+        boolean medirCpu = limiteCpuNs > 0 && cpuInicio >= 0;
+        long inicio = System.nanoTime();
+        long prazo = inicio + timeoutMs * 1_000_000L;
+        String estouro = null;
+        execucao.start();
+        while (execucao.isAlive()) {
+            long restanteMs = (prazo - System.nanoTime()) / 1_000_000;
+            if (restanteMs <= 0) {
+                estouro = "Tempo limite de " + timeoutMs + " ms excedido.";
+                break;
+            }
+            execucao.join(Math.min(restanteMs, INTERVALO_VERIFICACAO_MS));
+            if (medirCpu && execucao.isAlive() && cpuProcessoNs() - cpuInicio > limiteCpuNs) {
+                estouro = "Limite de " + limiteCpuNs / 1_000_000 + " ms de CPU da submissão excedido.";
+                break;
+            }
+        }
+        resultado[2] = String.valueOf((System.nanoTime() - inicio) / 1_000_000);
+        if (estouro != null) {
+            return new String[]{"timeout", estouro, resultado[2]};
+        }
+        return resultado;
+    }
+
+    private static String texto(String s) {
+        StringBuilder b = new StringBuilder("\"");
+        for (char c : s.toCharArray()) {
+            switch (c) {
+                case '"': b.append("\\\""); break;
+                case '\\': b.append("\\\\"); break;
+                case '\n': b.append("\\n"); break;
+                case '\r': b.append("\\r"); break;
+                case '\t': b.append("\\t"); break;
+                default:
+                    if (c < 0x20) {
+                        b.append(String.format("\\u%04x", (int) c));
+                    } else {
+                        b.append(c);
+                    }
+            }
+        }
+        return b.append("\"").toString();
+    }
+}
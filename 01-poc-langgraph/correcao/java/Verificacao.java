@@ -0,0 +1,28 @@
+/**
+ * Asserções mínimas para os testes do professor (sem depender do JUnit).
+ * Copiada para a pasta de cada submissão antes da compilação.
+ */
+public class Verificacao {
+
+    public static void assertTrue(boolean condicao, String mensagem) {
+        if (!condicao) {
+            throw new AssertionError(mensagem);
+        }
+    }
+
+    public static void assertFalse(boolean condicao, String mensagem) {
+        assertTrue(!condicao, mensagem);
+    }
+
+    public static void assertEquals(double esperado, double obtido, double tolerancia, String mensagem) {
+        if (Math.abs(esperado - obtido) > tolerancia) {
+            throw new AssertionError(mensagem + " (esperado: " + esperado + ", obtido: " + obtido + ")");
+        }
+    }
+
+    public static void assertEquals(Object esperado, Object obtido, String mensagem) {
+        if (esperado == null ? obtido != null : !esperado.equals(obtido)) {
+            throw new AssertionError(mensagem + " (esperado: " + esperado + ", obtido: " + obtido + ")");
+        }
+    }
+}
@@ -0,0 +1,379 @@
+# Análise estática leve de código Java (sem JVM): tokenizador + parser de
+# declarações suficiente para extrair classes, atributos, métodos e chamadas.
+# Não é um compilador — o objetivo é detectar problemas mecânicos com certeza
+# (ex.: atributo público onde o enunciado pede privado, chamada estática a um
+# método de instância) antes de gastar uma chamada à LLM.
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(
+    r'(?P<comentario>//[^\n]*|/\*.*?\*/)'
+    r'|(?P<texto>"""(?:.|\n)*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'
+    r'|(?P<ident>[A-Za-z_$][\w$]*)'
+    r'|(?P<numero>\d[\w.]*)'
+    r'|(?P<espaco>\s+)'
+    r'|(?P<simbolo>.)',
+    re.DOTALL,
+)
+
+MODIFICADORES = {
+    "public", "private", "protected", "static", "final", "abstract", "synchronized",
+    "native", "transient", "volatile", "default", "strictfp", "sealed", "non-sealed",
+}
+PALAVRAS_TIPO = {"class", "interface", "enum", "record"}
+PALAVRAS_CONTROLE = {"if", "for", "while", "switch", "catch", "return", "new", "throw", "synchronized", "super", "this"}
+
+
+@dataclass
+class Token:
+    tipo: str
+    valor: str
+    linha: int
+
+
+@dataclass
+class ChamadaJava:
+    receptor: Optional[str]  # None para chamadas não qualificadas (ex.: ``foo()``)
+    metodo: str
+    linha: int
+
+
+@dataclass
+class AtributoJava:
+    nome: str
+    tipo: str
+    modificadores: List[str]
+    linha: int
+
+
+@dataclass
+class MetodoJava:
+    nome: str
+    retorno: Optional[str]  # None para construtores e blocos de inicialização
+    parametros: List[str]
+    modificadores: List[str]
+    linha: int
+    chamadas: List[ChamadaJava] = field(default_factory=list)
+
+    @property
+    def estatico(self):
+        return "static" in self.modificadores
+
+
+@dataclass
+class ClasseJava:
+    nome: str
+    tipo: str  # class, interface, enum ou record
+    modificadores: List[str]
+    linha: int
+    superclasse: Optional[str] = None
+    interfaces: List[str] = field(default_factory=list)  # implements (ou extends, numa interface)
+    atributos: List[AtributoJava] = field(default_factory=list)
+    metodos: List[MetodoJava] = field(default_factory=list)
+
+    def atributo(self, nome):
+        return next((a for a in self.atributos if a.nome == nome), None)
+
+    def metodos_chamados(self, nome):
+        return [m for m in self.metodos if m.nome == nome]
+
+
+def tokenizar(codigo):
+    """Quebra o código em tokens, descartando comentários e espaços."""
+    tokens = []
+    linha = 1
+    for m in _TOKEN_RE.finditer(codigo):
+        tipo = m.lastgroup
+        valor = m.group()
+        if tipo not in ("comentario", "espaco"):
+            tokens.append(Token(tipo, valor, linha))
+        linha += valor.count("\n")
+    return tokens
+
+
+def _tipo_parametro(tokens):
+    """Tipo de um parâmetro na forma usada nas regras: ``String args[]`` e ``String... args`` viram ``String[]``."""
+    tokens = [v for v in tokens if v != "final"]
+    dimensoes = 0
+    while len(tokens) > 3 and tokens[-2:] == ["[", "]"]:  # colchetes no estilo C, depois do nome
+        dimensoes += 1
+        tokens = tokens[:-2]
+    tipo = "".join(tokens[:-1]) if len(tokens) > 1 else "".join(tokens)
+    return tipo.replace("...", "[]") + "[]" * dimensoes
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.t = tokens
+        self.i = 0
+        self.classes = []
+
+    def _atual(self, deslocamento=0):
+        j = self.i + deslocamento
+        return self.t[j] if 0 <= j < len(self.t) else None
+
+    def _eh(self, valor, deslocamento=0):
+        tok = self._atual(deslocamento)
+        return tok is not None and tok.valor == valor
+
+    def _pular_balanceado(self, abre, fecha):
+        """Avança até depois do ``fecha`` que casa com o ``abre`` atual."""
+        profundidade = 0
+        while self.i < len(self.t):
+            v = self.t[self.i].valor
+            self.i += 1
+            if v == abre:
+                profundidade += 1
+            elif v == fecha:
+                profundidade -= 1
+                if profundidade == 0:
+                    return
+
+    def _pular_anotacao(self):
+        self.i += 2  # '@' e o nome
+        while self._eh(".") and self._atual(1) is not None and self._atual(1).tipo == "ident":
+            self.i += 2
+        if self._eh("("):
+            self._pular_balanceado("(", ")")
+
+    def _pular_generico(self):
+        if self._eh("<"):
+            self._pular_balanceado("<", ">")
+
+    def analisar(self):
+        while self.i < len(self.t):
+            if self._atual().valor in PALAVRAS_TIPO and self._atual(1) is not None and self._atual(1).tipo == "ident":
+                j = self.i
+                while j > 0 and self.t[j - 1].valor in MODIFICADORES:
+                    j -= 1
+                self._classe([t.valor for t in self.t[j:self.i]])
+            else:
+                self.i += 1
+        return self.classes
+
+    def _classe(self, modificadores):
+        tipo = self._atual().valor
+        nome_tok = self._atual(1)
+        self.i += 2
+        classe = ClasseJava(nome=nome_tok.valor, tipo=tipo, modificadores=modificadores, linha=nome_tok.linha)
+        self.classes.append(classe)
+        self._pular_generico()
+        if self._eh("("):  # componentes de um record
+            self._pular_balanceado("(", ")")
+        lista = None  # lista de tipos em andamento: "extends" ou "implements"
+        while self.i < len(self.t) and not self._eh("{"):
+            tok = self._atual()
+            if tok.valor in ("extends", "implements"):
+                lista = tok.valor
+            elif tok.tipo == "ident" and lista is not None and not self._eh(".", 1):
+                if lista == "extends" and tipo != "interface":
+                    classe.superclasse = tok.valor
+                else:
+                    classe.interfaces.append(tok.valor)
+            elif self._eh("<"):
+                self._pular_generico()
+                continue
+            self.i += 1
+        self.i += 1  # '{'
+        if tipo == "enum":
+            self._pular_constantes_enum()
+        self._corpo_classe(classe)
+
+    def _pular_constantes_enum(self):
+        while self.i < len(self.t):
+            if self._eh(";"):
+                self.i += 1
+                return
+            if self._eh("}"):
+                return
+            if self._eh("("):
+                self._pular_balanceado("(", ")")
+            elif self._eh("{"):
+                self._pular_balanceado("{", "}")
+            else:
+                self.i += 1
+
+    def _corpo_classe(self, classe):
+        while self.i < len(self.t):
+            if self._eh("}"):
+                self.i += 1
+                return
+            if self._eh(";"):
+                self.i += 1
+                continue
+            self._membro(classe)
+
+    def _membro(self, classe):
+        modificadores = []
+        while self.i < len(self.t):
+            tok = self._atual()
+            if tok.valor == "@":
+                self._pular_anotacao()
+            elif tok.valor in MODIFICADORES:
+                modificadores.append(tok.valor)
+                self.i += 1
+            else:
+                break
+        tok = self._atual()
+        if tok is None:
+            return
+        if tok.valor in PALAVRAS_TIPO and self._atual(1) is not None and self._atual(1).tipo == "ident":
+            self._classe(modificadores)
+            return
+        if tok.valor == "{":  # bloco de inicialização (estático ou de instância)
+            metodo = MetodoJava("<init>", None, [], modificadores, tok.linha)
+            classe.metodos.append(metodo)
+            self._corpo_metodo(metodo)
+            return
+        self._pular_generico()
+
+        # Junta os tokens da declaração até '(' (método), '=' / ';' / ',' (atributo).
+        inicio = self.i
+        while self.i < len(self.t) and self._atual().valor not in ("(", "=", ";", ",", "{", "}"):
+            if self._eh("<"):
+                self._pular_balanceado("<", ">")
+            else:
+                self.i += 1
+        declaracao = self.t[inicio:self.i]
+        if not declaracao or self._atual() is None:
+            self.i += 1
+            return
+        nome = declaracao[-1]
+        tipo = "".join(t.valor for t in declaracao[:-1]) or None
+
+        if self._eh("("):
+            parametros = self._parametros()
+            while self.i < len(self.t) and not (self._eh("{") or self._eh(";")):
+                self.i += 1  # throws ..., default ...
+            metodo = MetodoJava(nome.valor, tipo, parametros, modificadores, nome.linha)
+            classe.metodos.append(metodo)
+            if self._eh("{"):
+                self._corpo_metodo(metodo)
+            else:
+                self.i += 1
+            return
+
+        classe.atributos.append(AtributoJava(nome.valor, tipo or "", modificadores, nome.linha))
+        # Demais variáveis da mesma declaração (``int a, b = 2;``) e inicializadores.
+        profundidade = 0
+        while self.i < len(self.t):
+            v = self._atual().valor
+            if v in "({[":
+                profundidade += 1
+            elif v in ")}]":
+                if profundidade == 0:
+                    return
+                profundidade -= 1
+            elif v == ";" and profundidade == 0:
+                self.i += 1
+                return
+            elif v == "," and profundidade == 0:
+                prox = self._atual(1)
+                if prox is not None and prox.tipo == "ident":
+                    classe.atributos.append(AtributoJava(prox.valor, tipo or "", modificadores, prox.linha))
+            self.i += 1
+
+    def _parametros(self):
+        """Lê ``( ... )`` e devolve a lista de tipos dos parâmetros."""
+        self.i += 1  # '('
+        parametros, atual, profundidade = [], [], 0
+        while self.i < len(self.t):
+            tok = self._atual()
+            if tok.valor == "@":
+                self._pular_anotacao()
+                continue
+            self.i += 1
+            if tok.valor in "<(":
+                profundidade += 1
+            elif tok.valor in ">" or (tok.valor == ")" and profundidade > 0):
+                profundidade -= 1
+            elif tok.valor == ")":
+                break
+            elif tok.valor == "," and profundidade == 0:
+                parametros.append(atual)
+                atual = []
+                continue
+            atual.append(tok.valor)
+        if atual:
+            parametros.append(atual)
+        return [_tipo_parametro(p) for p in parametros]
+
+    def _corpo_metodo(self, metodo):
+        """Percorre o corpo ``{ ... }`` registrando as chamadas de método."""
+        profundidade = 0
+        while self.i < len(self.t):
+            tok = self._atual()
+            if tok.valor == "{":
+                profundidade += 1
+            elif tok.valor == "}":
+                profundidade -= 1
+                if profundidade == 0:
+                    self.i += 1
+                    return
+            elif tok.tipo == "ident" and self._eh("(", 1) and tok.valor not in PALAVRAS_CONTROLE:
+                anterior = self._atual(-1)
+                if anterior is not None and anterior.valor == ".":
+                    receptor = self._atual(-2)
+                    antes_receptor = self._atual(-3)
+                    # Só guarda receptores simples (``X.m()``), não cadeias (``a.b.m()``).
+                    if receptor.tipo == "ident" and not (antes_receptor and antes_receptor.valor == "."):
+                        metodo.chamadas.append(ChamadaJava(receptor.valor, tok.valor, tok.linha))
+                elif anterior is None or anterior.valor != "new":
+                    metodo.chamadas.append(ChamadaJava(None, tok.valor, tok.linha))
+            self.i += 1
+
+
+def analisar_java(codigo):
+    """Extrai as classes declaradas em ``codigo`` (um ou vários arquivos concatenados)."""
+    return _Parser(tokenizar(codigo)).analisar()
+
+
+def resumir_assinaturas(codigo):
+    """Mantém as declarações e troca o corpo de métodos e inicializadores por ``{ ... }``.
+
+    Comentários são removidos; tipos aninhados continuam com seus membros.
+    Serve para mostrar à LLM a interface de uma classe gastando poucos tokens.
+    """
+    partes = []
+    blocos = []  # pilha: True para corpo de tipo (class/interface/...), False para os demais
+    declarando_tipo = False
+    pular = 0  # profundidade dentro de um corpo sendo omitido
+    anterior = None
+    for m in _TOKEN_RE.finditer(codigo):
+        tipo, valor = m.lastgroup, m.group()
+        if pular:
+            if tipo == "simbolo" and valor == "{":
+                pular += 1
+            elif tipo == "simbolo" and valor == "}":
+                pular -= 1
+                if pular == 0:
+                    partes.append("{ ... }")
+            continue
+        if tipo == "comentario":
+            continue
+        if tipo == "espaco":
+            # Preserva quebras de linha (e a indentação da última), não espaços em série.
+            partes.append(valor[valor.rfind("\n"):] if "\n" in valor else " ")
+            continue
+        if tipo == "ident" and valor in PALAVRAS_TIPO and anterior != ".":
+            declarando_tipo = True
+        elif valor == "{":
+            if declarando_tipo:
+                blocos.append(True)
+                declarando_tipo = False
+            elif blocos and blocos[-1]:
+                pular = 1
+                anterior = "}"
+                continue
+            else:
+                blocos.append(False)
+        elif valor == "}" and blocos:
+            blocos.pop()
+        elif valor == ";":
+            declarando_tipo = False
+        partes.append(valor)
+        anterior = valor
+    texto = "".join(partes)
+    return "\n".join(linha.rstrip() for linha in texto.split("\n") if linha.strip()) + "\n"
@@ -0,0 +1,142 @@
+# Limitador de taxa proativo (token bucket) para as chamadas ao Gemini.
+# Mantém dois baldes — requisições por minuto (RPM) e tokens por minuto (TPM) —
+# e faz cada chamador esperar ANTES de estourar a cota, em vez de reagir ao 429.
+# O estado pode ficar em memória (threads/tarefas do processo) ou em um arquivo
+# SQLite, compartilhado por vários processos na mesma máquina.
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+# Aproximação usada pelo Gemini para texto em português/código: ~4 caracteres por token.
+CHARS_POR_TOKEN = 4
+# Reserva para a resposta, que só é conhecida depois da chamada.
+TOKENS_SAIDA_ESTIMADOS = 1024
+
+
+def estimar_tokens(*textos, tokens_saida=TOKENS_SAIDA_ESTIMADOS):
+    """Estimativa barata do custo de uma chamada (entrada + saída esperada)."""
+    caracteres = sum(len(t) for t in textos if t)
+    return caracteres // CHARS_POR_TOKEN + 1 + tokens_saida
+
+
+class LimitadorTaxa:
+    """Token bucket duplo (RPM e TPM) compartilhado entre chamadores.
+
+    ``margem`` reduz as taxas configuradas para que a vazão fique logo abaixo
+    do teto da cota. Com ``caminho`` definido, o estado dos baldes é guardado
+    em SQLite e atualizado em transação exclusiva, servindo a vários processos.
+    """
+
+    def __init__(self, rpm, tpm, margem=0.9, caminho=None):
+        self.capacidade_req = max(1.0, rpm * margem)
+        self.capacidade_tok = max(1.0, tpm * margem)
+        self.taxa_req = self.capacidade_req / 60.0
+        self.taxa_tok = self.capacidade_tok / 60.0
+        self.caminho = caminho
+        self.espera_total_s = 0.0
+        self._lock = threading.Lock()
+        self._estado = (self.capacidade_req, self.capacidade_tok, time.monotonic())
+        self._conn = None
+        if caminho is not None:
+            self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS baldes ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), req REAL, tok REAL, atualizado_em REAL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO baldes VALUES (1, ?, ?, ?)",
+                (self.capacidade_req, self.capacidade_tok, time.time()),
+            )
+
+    def _agora(self):
+        # time.time() é comparável entre processos; monotonic() apenas dentro de um.
+        return time.time() if self._conn is not None else time.monotonic()
+
+    def _reabastecer(self, req, tok, atualizado_em, agora):
+        decorrido = max(0.0, agora - atualizado_em)
+        req = min(self.capacidade_req, req + decorrido * self.taxa_req)
+        tok = min(self.capacidade_tok, tok + decorrido * self.taxa_tok)
+        return req, tok
+
+    def _consumir(self, req, tok, custo):
+        """Retorna ``(req, tok, espera_s)``; espera zero significa reserva feita."""
+        if req >= 1.0 and tok >= custo:
+            return req - 1.0, tok - custo, 0.0
+        espera = max((1.0 - req) / self.taxa_req, (custo - tok) / self.taxa_tok, 0.001)
+        return req, tok, espera
+
+    def _transacao(self, operacao):
+        """Lê o estado, aplica ``operacao(req, tok, agora)`` e grava o resultado.
+
+        O relógio é lido já com o lock (e, no SQLite, dentro da transação): quem
+        esperou pelo lock não pode gravar um ``atualizado_em`` mais antigo que o
+        atual, o que faria o próximo chamador reabastecer o mesmo intervalo duas vezes.
+        """
+        with self._lock:
+            if self._conn is None:
+                req, tok, atualizado_em = self._estado
+                agora = max(self._agora(), atualizado_em)
+                req, tok = self._reabastecer(req, tok, atualizado_em, agora)
+                req, tok, retorno = operacao(req, tok)
+                self._estado = (req, tok, agora)
+                return retorno
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                req, tok, atualizado_em = self._conn.execute(
+                    "SELECT req, tok, atualizado_em FROM baldes WHERE id = 1"
+                ).fetchone()
+                agora = max(self._agora(), atualizado_em)
+                req, tok = self._reabastecer(req, tok, atualizado_em, agora)
+                req, tok, retorno = operacao(req, tok)
+                self._conn.execute(
+                    "UPDATE baldes SET req = ?, tok = ?, atualizado_em = ? WHERE id = 1", (req, tok, agora)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return retorno
+
+    def _tentar_reservar(self, tokens):
+        custo = min(float(tokens), self.capacidade_tok)
+        return self._transacao(lambda req, tok: self._consumir(req, tok, custo))
+
+    def adquirir(self, tokens):
+        """Bloqueia a thread atual até haver cota para uma chamada de ``tokens``."""
+        while True:
+            espera = self._tentar_reservar(tokens)
+            if espera == 0.0:
+                return
+            self.espera_total_s += espera
+            time.sleep(espera)
+
+    async def aadquirir(self, tokens):
+        """Versão assíncrona de ``adquirir``: cede o event loop enquanto espera."""
+        while True:
+            espera = self._tentar_reservar(tokens)
+            if espera == 0.0:
+                return
+            self.espera_total_s += espera
+            await asyncio.sleep(espera)
+
+    def esvaziar(self):
+        """Zera os baldes (ex.: após um 429), pausando todos os chamadores juntos."""
+        self._transacao(lambda req, tok: (min(req, 0.0), min(tok, 0.0), None))
+
+
+# Limitador padrão usado pelas chamadas à LLM; desativado até ``configurar_limitador``.
+_limitador = None
+
+
+def configurar_limitador(rpm, tpm, margem=0.9, caminho=None):
+    """Ativa o limitador de taxa para todas as chamadas à LLM deste processo."""
+    global _limitador
+    _limitador = LimitadorTaxa(rpm, tpm, margem=margem, caminho=caminho)
+    return _limitador
+
+
+def get_limitador():
+    """Retorna o limitador ativo ou ``None`` se ele não foi configurado."""
+    return _limitador
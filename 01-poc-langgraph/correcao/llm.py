@@ -0,0 +1,238 @@
+# Chamadas à API do Gemini com retries e backoff (versões síncrona e assíncrona).
+# A decisão de retentar, as esperas, o prazo e o disjuntor ficam em retentativas.py.
+
+import asyncio
+import json
+import time
+
+from .cache import chave_cache, get_cache
+from .cliente import get_client
+from .config import MODEL_NAME
+from .limite_taxa import estimar_tokens, get_limitador
+from .metricas import span
+from .retentativas import ControleRetentativas
+
+
+def _montar_config(system_instruction, response_schema=None, contexto=None, timeout_s=None):
+    if contexto is not None:
+        # System instruction e enunciado já estão na entrada do cache de contexto.
+        config = {"cached_content": contexto.nome}
+    else:
+        config = {"system_instruction": system_instruction}
+    if response_schema is not None:
+        # Saída estruturada: o modelo devolve JSON validado contra o schema.
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = response_schema
+    if timeout_s is not None:
+        config["http_options"] = {"timeout": max(1, int(timeout_s * 1000))}
+    return config
+
+
+def _tokens_entrada(prompt, system_instruction, contexto):
+    # Com cache de contexto, só o trecho do aluno é enviado na requisição.
+    if contexto is not None:
+        return estimar_tokens(prompt)
+    return estimar_tokens(system_instruction, prompt)
+
+
+def _estado_cache(cache, resposta):
+    if cache is None:
+        return "desativado"
+    return "miss" if resposta is None else "hit"
+
+
+def _consultar_cache(prompt, system_instruction, response_schema=None, contexto=None, model_name=MODEL_NAME):
+    """Retorna ``(cache, chave, resposta)``; ``resposta`` é ``None`` em caso de miss.
+
+    A chave usa sempre o prompt completo (prefixo em cache + trecho enviado),
+    então o cache de respostas é o mesmo com ou sem cache de contexto.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None, None, None
+    extras = ()
+    if response_schema is not None:
+        extras = (json.dumps(response_schema.model_json_schema(), sort_keys=True),)
+    prompt_completo = contexto.prefixo + prompt if contexto is not None else prompt
+    chave = chave_cache(model_name, system_instruction, prompt_completo, *extras)
+    return cache, chave, cache.get(chave)
+
+
+def generate_content_with_retry(prompt, system_instruction, response_schema=None, contexto=None,
+                                model_name=MODEL_NAME):
+    """Função robusta para chamar a API do Gemini com retries e backoff.
+
+    Se um cache de respostas estiver configurado, consulta-o antes da chamada.
+    Com ``response_schema`` (modelo Pydantic), pede saída JSON nesse formato e
+    devolve o texto JSON. Com ``contexto`` (``ContextoCacheado``), ``prompt`` é
+    só o trecho que segue o prefixo guardado no cache de contexto. ``model_name``
+    permite usar outro modelo (ex.: um mais barato) na mesma chamada. Falhas
+    permanentes (ex.: pedido inválido) sobem na hora; as demais seguem
+    ``retentativas.ControleRetentativas``.
+    """
+    with span("llm", "llm", atual=False, modelo=model_name, streaming=False) as medicao:
+        cache, chave, resposta = _consultar_cache(prompt, system_instruction, response_schema, contexto, model_name)
+        medicao.definir(cache=_estado_cache(cache, resposta))
+        if resposta is not None:
+            return resposta
+        client = get_client()
+        limitador = get_limitador()
+        controle = ControleRetentativas(medicao, limitador)
+        while True:
+            while (espera := controle.antes()):
+                time.sleep(espera)
+            with controle.em_tentativa():
+                if limitador is not None:
+                    inicio = time.perf_counter()
+                    limitador.adquirir(_tokens_entrada(prompt, system_instruction, contexto))
+                    medicao.somar("espera_limitador_s", time.perf_counter() - inicio)
+                timeout_s = controle.timeout()
+                try:
+                    response = client.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=_montar_config(system_instruction, response_schema, contexto, timeout_s)
+                    )
+                except Exception as e:
+                    time.sleep(controle.falha(e))
+                    continue
+            controle.sucesso()
+            medicao.registrar_uso(model_name, response.usage_metadata)
+            if cache is not None:
+                cache.put(chave, model_name, response.text)
+            return response.text
+
+
+async def agenerate_content_with_retry(prompt, system_instruction, response_schema=None, contexto=None,
+                                       model_name=MODEL_NAME):
+    """Versão assíncrona: usa ``client.aio`` e não bloqueia o event loop no backoff."""
+    with span("llm", "llm", atual=False, modelo=model_name, streaming=False) as medicao:
+        cache, chave, resposta = _consultar_cache(prompt, system_instruction, response_schema, contexto, model_name)
+        medicao.definir(cache=_estado_cache(cache, resposta))
+        if resposta is not None:
+            return resposta
+        client = get_client()
+        limitador = get_limitador()
+        controle = ControleRetentativas(medicao, limitador)
+        while True:
+            while (espera := controle.antes()):
+                await asyncio.sleep(espera)
+            with controle.em_tentativa():
+                if limitador is not None:
+                    inicio = time.perf_counter()
+                    await limitador.aadquirir(_tokens_entrada(prompt, system_instruction, contexto))
+                    medicao.somar("espera_limitador_s", time.perf_counter() - inicio)
+                timeout_s = controle.timeout()
+                try:
+                    response = await asyncio.wait_for(client.aio.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=_montar_config(system_instruction, response_schema, contexto, timeout_s)
+                    ), timeout_s)
+                except Exception as e:
+                    await asyncio.sleep(controle.falha(e))
+                    continue
+            controle.sucesso()
+            medicao.registrar_uso(model_name, response.usage_metadata)
+            if cache is not None:
+                cache.put(chave, model_name, response.text)
+            return response.text
+
+
+def generate_content_stream_with_retry(prompt, system_instruction, contexto=None):
+    """Versão em streaming: gera os trechos de texto conforme o modelo responde.
+
+    Só há retry antes do primeiro trecho; depois que a resposta começou a ser
+    entregue, um erro é propagado (não dá para "desentregar" o que já saiu).
+    Em caso de hit no cache, a resposta inteira sai em um único trecho.
+    """
+    with span("llm", "llm", atual=False, modelo=MODEL_NAME, streaming=True) as medicao:
+        cache, chave, resposta = _consultar_cache(prompt, system_instruction, contexto=contexto)
+        medicao.definir(cache=_estado_cache(cache, resposta))
+        if resposta is not None:
+            yield resposta
+            return
+        client = get_client()
+        limitador = get_limitador()
+        controle = ControleRetentativas(medicao, limitador)
+        while True:
+            while (espera := controle.antes()):
+                time.sleep(espera)
+            partes = []
+            with controle.em_tentativa():
+                if limitador is not None:
+                    inicio = time.perf_counter()
+                    limitador.adquirir(_tokens_entrada(prompt, system_instruction, contexto))
+                    medicao.somar("espera_limitador_s", time.perf_counter() - inicio)
+                timeout_s = controle.timeout()
+                inicio = time.perf_counter()
+                uso = None
+                try:
+                    for chunk in client.models.generate_content_stream(
+                        model=MODEL_NAME,
+                        contents=prompt,
+                        config=_montar_config(system_instruction, contexto=contexto, timeout_s=timeout_s)
+                    ):
+                        uso = chunk.usage_metadata or uso
+                        if chunk.text:
+                            if not partes:
+                                medicao.definir(primeiro_trecho_s=time.perf_counter() - inicio)
+                            partes.append(chunk.text)
+                            yield chunk.text
+                except Exception as e:
+                    if partes:
+                        raise
+                    time.sleep(controle.falha(e))
+                    continue
+            controle.sucesso()
+            medicao.registrar_uso(MODEL_NAME, uso)
+            if cache is not None:
+                cache.put(chave, MODEL_NAME, "".join(partes))
+            return
+
+
+async def agenerate_content_stream_with_retry(prompt, system_instruction, contexto=None):
+    """Versão assíncrona de ``generate_content_stream_with_retry``."""
+    with span("llm", "llm", atual=False, modelo=MODEL_NAME, streaming=True) as medicao:
+        cache, chave, resposta = _consultar_cache(prompt, system_instruction, contexto=contexto)
+        medicao.definir(cache=_estado_cache(cache, resposta))
+        if resposta is not None:
+            yield resposta
+            return
+        client = get_client()
+        limitador = get_limitador()
+        controle = ControleRetentativas(medicao, limitador)
+        while True:
+            while (espera := controle.antes()):
+                await asyncio.sleep(espera)
+            partes = []
+            with controle.em_tentativa():
+                if limitador is not None:
+                    inicio = time.perf_counter()
+                    await limitador.aadquirir(_tokens_entrada(prompt, system_instruction, contexto))
+                    medicao.somar("espera_limitador_s", time.perf_counter() - inicio)
+                timeout_s = controle.timeout()
+                inicio = time.perf_counter()
+                uso = None
+                try:
+                    async for chunk in await client.aio.models.generate_content_stream(
+                        model=MODEL_NAME,
+                        contents=prompt,
+                        config=_montar_config(system_instruction, contexto=contexto, timeout_s=timeout_s)
+                    ):
+                        uso = chunk.usage_metadata or uso
+                        if chunk.text:
+                            if not partes:
+                                medicao.definir(primeiro_trecho_s=time.perf_counter() - inicio)
+                            partes.append(chunk.text)
+                            yield chunk.text
+                except Exception as e:
+                    if partes:
+                        raise
+                    await asyncio.sleep(controle.falha(e))
+                    continue
+            controle.sucesso()
+            medicao.registrar_uso(MODEL_NAME, uso)
+            if cache is not None:
+                cache.put(chave, MODEL_NAME, "".join(partes))
+            return
@@ -0,0 +1,275 @@
+# Correção em lote: descobre submissões em uma pasta e executa o grafo
+# concorrentemente, com um limite de chamadas simultâneas (fixo ou ajustado
+# pela ``concorrencia.LimitadorConcorrencia``).
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+from .arquivos import read_and_concat_java_files, read_file_content
+from .avaliacao import categorias_falha
+from .concorrencia import LimitadorConcorrencia
+from .deduplicacao import agrupar
+from .empacotamento import MODELO_DIRNAME, carregar_modelo
+from .execucao_java import TESTES_DIRNAME, carregar_testes
+from .grafo import estado_inicial
+from .metricas import contabilizar_uso, span
+from .pre_analise import carregar_regras
+from .retentativas import prazo
+from .retomada import thread_id_submissao
+
+ENUNCIADO_FILENAME = "enunciado_exercicio.txt"
+
+
+@dataclass
+class Submissao:
+    """Uma unidade de correção: uma pasta com arquivos .java e seu enunciado."""
+    id: str
+    pasta: str
+    enunciado_path: str
+    arquivos_java: List[str] = field(default_factory=list)
+
+    def ler(self):
+        """Lê ``(enunciado, codigo, regras, testes, modelo)`` dos arquivos da submissão."""
+        return (
+            read_file_content(self.enunciado_path),
+            read_and_concat_java_files(self.arquivos_java),
+            carregar_regras(self.enunciado_path),
+            carregar_testes(self.enunciado_path),
+            carregar_modelo(self.enunciado_path),
+        )
+
+
+@dataclass
+class ResultadoSubmissao:
+    """Resultado da correção de uma submissão (feedback ou erro)."""
+    id: str
+    feedback_bruto: str = ""
+    avaliacao_status: str = ""
+    erro: Optional[str] = None
+    duracao_s: float = 0.0
+    representante: Optional[str] = None  # preenchido quando o feedback veio de uma cópia idêntica
+    avaliacao_estruturada: Optional[dict] = None  # só no modo de saída estruturada
+    retomada: bool = False  # resultado reaproveitado/retomado de um checkpoint
+    historico_cascata: Optional[List[dict]] = None  # níveis consultados, só com cascata de modelos
+    categorias_falha: List[str] = field(default_factory=list)  # ver ``avaliacao.categorias_falha``
+    modelo: Optional[str] = None  # modelo com mais chamadas na correção
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+    custo_usd: float = 0.0
+
+
+def _procurar_enunciado(pasta, raiz):
+    """Procura o enunciado na própria pasta e nas pastas acima, até a raiz."""
+    atual = pasta
+    while True:
+        candidato = os.path.join(atual, ENUNCIADO_FILENAME)
+        if os.path.isfile(candidato):
+            return candidato
+        if os.path.samefile(atual, raiz):
+            return None
+        atual = os.path.dirname(atual)
+
+
+def descobrir_submissoes(raiz):
+    """Percorre ``raiz`` e devolve uma submissão por pasta com arquivos .java.
+
+    Suporta tanto o layout de ``02-dados-teste/casoN/`` (enunciado junto do
+    código) quanto ``<exercicio>/<aluno>/`` com o enunciado na pasta do
+    exercício. Pastas sem enunciado acessível são ignoradas com aviso, assim
+    como as pastas ``testes/`` e ``modelo/`` com os testes e o modelo do professor.
+    """
+    raiz = os.path.abspath(raiz)
+    submissoes = []
+    for pasta, subpastas, arquivos in os.walk(raiz):
+        subpastas[:] = sorted(p for p in subpastas if p not in (TESTES_DIRNAME, MODELO_DIRNAME))
+        javas = sorted(a for a in arquivos if a.endswith(".java"))
+        if not javas:
+            continue
+        enunciado = _procurar_enunciado(pasta, raiz)
+        if enunciado is None:
+            print(f"Aviso: nenhum {ENUNCIADO_FILENAME} encontrado para {pasta}; ignorando.")
+            continue
+        submissoes.append(Submissao(
+            id=os.path.relpath(pasta, raiz).replace(os.sep, "/"),
+            pasta=pasta,
+            enunciado_path=enunciado,
+            arquivos_java=[os.path.join(pasta, a) for a in javas],
+        ))
+    return submissoes
+
+
+async def _executar_grafo(app, submissao, manifesto, configuracao=""):
+    """Executa o grafo, retomando do checkpoint quando o app tem checkpointer.
+
+    ``configuracao`` (hash das opções do grafo) entra no thread do checkpoint.
+    Retorna ``(final_state, retomada)``.
+    """
+    enunciado, codigo, regras, testes, modelo = submissao.ler()
+    if app.checkpointer is None:
+        return await app.ainvoke(estado_inicial(enunciado, codigo, regras, testes, modelo)), False
+
+    thread_id = thread_id_submissao(submissao.id, enunciado, codigo, regras, testes, modelo, configuracao)
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = await app.aget_state(config)
+    if snapshot.values and not snapshot.next:
+        return snapshot.values, True  # já concluída numa execução anterior
+    if manifesto is not None:
+        manifesto.marcar(submissao.id, "em_andamento", thread_id)
+    if snapshot.next:
+        # Falhou no meio: ``None`` como entrada retoma a partir do último nó concluído.
+        return await app.ainvoke(None, config), True
+    return await app.ainvoke(estado_inicial(enunciado, codigo, regras, testes, modelo), config), False
+
+
+async def corrigir_submissao(app, submissao, semaforo, manifesto=None, prazo_s=None, configuracao=""):
+    """Lê os arquivos e executa o grafo para uma submissão, sem propagar erros.
+
+    ``submissao`` é uma ``Submissao`` ou qualquer objeto com ``id`` e ``ler()``
+    (ex.: ``ingestao.SubmissaoPacote``); falhas de leitura viram o erro dela.
+
+    ``prazo_s`` limita o tempo total das chamadas à LLM da submissão
+    (contado a partir da saída da fila); esgotado, ela termina com erro.
+    ``semaforo`` é um ``asyncio.Semaphore`` ou um ``LimitadorConcorrencia``.
+    ``configuracao`` identifica as opções do grafo nos checkpoints (ver ``_executar_grafo``).
+    """
+    chegada = time.perf_counter()
+    async with semaforo:
+        with span("submissao", "submissao", submissao=submissao.id) as medicao:
+            inicio = time.perf_counter()
+            medicao.definir(espera_fila_s=inicio - chegada)
+            if isinstance(semaforo, LimitadorConcorrencia):
+                medicao.definir(limite_concorrencia=semaforo.limite, em_andamento=semaforo.em_andamento)
+            try:
+                with prazo(prazo_s), contabilizar_uso() as uso:
+                    final_state, retomada = await _executar_grafo(app, submissao, manifesto, configuracao)
+                if manifesto is not None:
+                    manifesto.marcar(submissao.id, "concluida")
+                medicao.definir(avaliacao=final_state.get("avaliacao_status", ""), retomada=retomada)
+                return ResultadoSubmissao(
+                    id=submissao.id,
+                    feedback_bruto=final_state.get("feedback_bruto", ""),
+                    avaliacao_status=final_state.get("avaliacao_status", ""),
+                    avaliacao_estruturada=final_state.get("avaliacao_estruturada") or None,
+                    historico_cascata=final_state.get("historico_cascata") or None,
+                    categorias_falha=categorias_falha(final_state),
+                    modelo=uso.modelo,
+                    tokens_entrada=uso.tokens_entrada,
+                    tokens_saida=uso.tokens_saida,
+                    custo_usd=uso.custo_usd,
+                    duracao_s=time.perf_counter() - inicio,
+                    retomada=retomada,
+                )
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                medicao.definir(erro_correcao=erro)
+                if manifesto is not None:
+                    manifesto.marcar(submissao.id, "erro", erro=erro)
+                return ResultadoSubmissao(
+                    id=submissao.id,
+                    erro=erro,
+                    duracao_s=time.perf_counter() - inicio,
+                )
+
+
+async def corrigir_lote(app, submissoes, max_concorrencia=8, ao_concluir=None, manifesto=None, prazo_s=None,
+                        limitador=None, configuracao=""):
+    """Corrige todas as submissões com no máximo ``max_concorrencia`` em andamento.
+
+    ``ao_concluir`` (opcional) é chamado com cada ``ResultadoSubmissao`` assim
+    que ele fica pronto. O retorno segue a ordem de ``submissoes``. Com um
+    ``ManifestoExecucao``, o estado de cada submissão é registrado nele.
+    ``prazo_s`` e ``configuracao`` seguem para ``corrigir_submissao``.
+    Com ``limitador`` (``LimitadorConcorrencia``), o limite é o dele, ajustado
+    durante a execução, e ``max_concorrencia`` é ignorado.
+    """
+    semaforo = limitador or asyncio.Semaphore(max_concorrencia)
+
+    async def _executar(submissao):
+        resultado = await corrigir_submissao(app, submissao, semaforo, manifesto, prazo_s, configuracao)
+        if ao_concluir is not None:
+            ao_concluir(resultado)
+        return resultado
+
+    return await asyncio.gather(*(_executar(s) for s in submissoes))
+
+
+async def corrigir_fluxo(app, submissoes, max_concorrencia=8, ao_concluir=None, manifesto=None, prazo_s=None,
+                         limitador=None, configuracao=""):
+    """Como ``corrigir_lote``, mas puxa as submissões de um iterável sob demanda (ex.: ``ingestao.ler_pacote``).
+
+    No máximo ``max_concorrencia`` submissões (ou o limite atual do
+    ``limitador``) ficam lidas e em correção ao mesmo tempo, e os resultados
+    só vão para ``ao_concluir``: a memória não cresce com o tamanho da turma.
+    Retorna ``(corrigidas, com_erro)``.
+    """
+    semaforo = limitador or asyncio.Semaphore(max_concorrencia)
+    iterador = iter(submissoes)
+    pendentes = set()
+    esgotado = False
+    corrigidas = com_erro = 0
+    while True:
+        while not esgotado and len(pendentes) < (limitador.limite if limitador else max_concorrencia):
+            # A leitura (descompressão) sai do loop de eventos para não travar as correções em andamento.
+            submissao = await asyncio.to_thread(next, iterador, None)
+            if submissao is None:
+                esgotado = True
+            else:
+                pendentes.add(asyncio.create_task(corrigir_submissao(app, submissao, semaforo, manifesto, prazo_s,
+                                                                  configuracao)))
+        if not pendentes:
+            return corrigidas, com_erro
+        prontas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+        for tarefa in prontas:
+            resultado = tarefa.result()
+            if resultado.erro:
+                com_erro += 1
+            else:
+                corrigidas += 1
+            if ao_concluir is not None:
+                ao_concluir(resultado)
+
+
+def deduplicar_submissoes(submissoes, limiar_similaridade=0.7):
+    """Agrupa submissões do mesmo exercício com o mesmo programa.
+
+    O exercício é o enunciado com suas regras, testes e modelo: o mesmo código
+    pode valer notas diferentes contra entradas diferentes. Retorna
+    ``(representantes, agrupamento)``: só os representantes precisam ser
+    corrigidos; ``replicar_resultados`` distribui o feedback aos demais.
+    Submissões cujos arquivos não podem ser lidos ficam sozinhas, para que o
+    erro apareça normalmente na correção.
+    """
+    itens = []
+    preservar = {}
+    for submissao in submissoes:
+        try:
+            enunciado, codigo, regras, testes, modelo = submissao.ler()
+            exercicio = json.dumps([enunciado, regras, testes, modelo], sort_keys=True, ensure_ascii=False)
+            grupo = hashlib.sha256(exercicio.encode("utf-8")).hexdigest()
+            if grupo not in preservar:
+                preservar[grupo] = set(re.findall(r"\w+", exercicio))
+        except Exception:
+            codigo, grupo = "", f"erro:{submissao.id}"
+        itens.append((submissao.id, codigo, grupo))
+    agrupamento = agrupar(itens, limiar_similaridade=limiar_similaridade, preservar=preservar)
+    escolhidos = set(agrupamento.representantes)
+    return [s for s in submissoes if s.id in escolhidos], agrupamento
+
+
+def replicar_resultados(resultados, submissoes, agrupamento):
+    """Expande os resultados dos representantes para todas as ``submissoes``, na ordem delas."""
+    por_id = {r.id: r for r in resultados}
+    expandidos = []
+    for submissao in submissoes:
+        origem = agrupamento.representante_de.get(submissao.id, submissao.id)
+        resultado = por_id[origem]
+        if origem != submissao.id:
+            resultado = replace(resultado, id=submissao.id, representante=origem)
+        expandidos.append(resultado)
+    return expandidos
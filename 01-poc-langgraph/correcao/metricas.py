@@ -0,0 +1,382 @@
+# Instrumentação: latência, tokens e custo por nó do grafo e por chamada à LLM.
+#
+# Cada medição é um "span" (nome, início, fim, atributos) encadeado ao span
+# em andamento por um ContextVar, o que funciona tanto em threads quanto em
+# tarefas asyncio. Uma submissão do lote é a raiz do seu trace; os nós do
+# grafo e as chamadas à LLM ficam abaixo dela. Os spans terminados vão para
+# um log JSON (uma linha por span), opcionalmente para um arquivo de spans no
+# formato JSON do OTLP (OpenTelemetry) e para o resumo do fim da execução
+# (p50/p95/p99 e custo por submissão). Num processo de longa duração (o
+# serviço), ``max_spans`` limita os registros guardados para o resumo: as
+# distribuições passam a ser dos spans mais recentes, e os totais das
+# chamadas à LLM continuam sendo somados desde o início.
+#
+# Sem ``configurar_metricas``, ``span`` não faz nada (custo desprezível). O uso
+# de tokens de cada submissão (``contabilizar_uso``) é somado mesmo assim,
+# para acompanhar o resultado.
+
+import collections
+import contextvars
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Preço em USD por 1 milhão de tokens: (entrada, entrada em cache, saída).
+# Tokens de "thinking" são cobrados como saída.
+PRECOS_POR_MILHAO = {
+    "gemini-2.5-flash": (0.30, 0.075, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.025, 0.40),
+    "gemini-2.5-pro": (1.25, 0.31, 10.00),
+}
+
+_span_atual = contextvars.ContextVar("correcao_span_atual", default=None)
+_uso_atual = contextvars.ContextVar("correcao_uso_atual", default=None)
+_coletor = None
+
+
+def _novo_id(bytes_):
+    return os.urandom(bytes_).hex()
+
+
+def custo_usd(model_name, tokens_entrada, tokens_cache, tokens_saida):
+    """Custo estimado de uma chamada pela tabela ``PRECOS_POR_MILHAO`` (0 se o modelo não está nela)."""
+    precos = PRECOS_POR_MILHAO.get(model_name)
+    if precos is None:
+        return 0.0
+    entrada, cache, saida = precos
+    return ((tokens_entrada - tokens_cache) * entrada + tokens_cache * cache + tokens_saida * saida) / 1_000_000
+
+
+class UsoSubmissao:
+    """Tokens, custo e modelos das chamadas à LLM feitas para uma submissão."""
+
+    def __init__(self):
+        self.chamadas = 0
+        self.tokens_entrada = 0
+        self.tokens_saida = 0
+        self.custo_usd = 0.0
+        self.modelos = {}  # modelo -> chamadas
+        self._lock = threading.Lock()
+
+    def somar(self, model_name, entrada, cache, saida):
+        with self._lock:
+            self.chamadas += 1
+            self.tokens_entrada += entrada
+            self.tokens_saida += saida
+            self.custo_usd += custo_usd(model_name, entrada, cache, saida)
+            self.modelos[model_name] = self.modelos.get(model_name, 0) + 1
+
+    @property
+    def modelo(self):
+        """O modelo com mais chamadas, ou ``None`` se não houve chamada."""
+        return max(self.modelos, key=self.modelos.get) if self.modelos else None
+
+
+@contextmanager
+def contabilizar_uso():
+    """Soma o uso das chamadas à LLM feitas dentro do bloco (inclusive em tarefas e threads filhas)."""
+    uso = UsoSubmissao()
+    token = _uso_atual.set(uso)
+    try:
+        yield uso
+    finally:
+        _uso_atual.reset(token)
+
+
+def _ler_uso(uso):
+    """``(entrada, cache, saida)`` do ``usage_metadata`` do Gemini."""
+    entrada = uso.prompt_token_count or 0
+    cache = getattr(uso, "cached_content_token_count", None) or 0
+    saida = (uso.candidates_token_count or 0) + (getattr(uso, "thoughts_token_count", None) or 0)
+    return entrada, cache, saida
+
+
+def _somar_uso_submissao(model_name, entrada, cache, saida):
+    uso = _uso_atual.get()
+    if uso is not None:
+        uso.somar(model_name, entrada, cache, saida)
+
+
+class Span:
+    """Uma medição em andamento; ``definir``/``somar`` preenchem os atributos."""
+
+    def __init__(self, coletor, nome, tipo, pai, atributos):
+        self.coletor = coletor
+        self.nome = nome
+        self.tipo = tipo
+        self.trace_id = pai.trace_id if pai is not None else _novo_id(16)
+        self.span_id = _novo_id(8)
+        self.pai_id = pai.span_id if pai is not None else None
+        self.inicio_ns = time.time_ns()
+        self._inicio = time.perf_counter()
+        self.duracao_s = None
+        self.erro = None
+        self.atributos = dict(atributos)
+
+    def definir(self, **atributos):
+        self.atributos.update(atributos)
+
+    def somar(self, chave, valor):
+        self.atributos[chave] = self.atributos.get(chave, 0) + valor
+
+    def registrar_uso(self, model_name, uso):
+        """Lê ``usage_metadata`` da resposta do Gemini (tokens e custo)."""
+        if uso is None:
+            return
+        entrada, cache, saida = _ler_uso(uso)
+        _somar_uso_submissao(model_name, entrada, cache, saida)
+        self.definir(tokens_entrada=entrada, tokens_cache=cache, tokens_saida=saida,
+                     custo_usd=custo_usd(model_name, entrada, cache, saida))
+
+    def finalizar(self):
+        if self.duracao_s is None:
+            self.duracao_s = time.perf_counter() - self._inicio
+            self.coletor.registrar(self)
+
+
+class _SpanNulo:
+    """Usado quando a instrumentação está desligada: aceita e descarta tudo."""
+    def definir(self, **atributos):
+        pass
+
+    def somar(self, chave, valor):
+        pass
+
+    def registrar_uso(self, model_name, uso):
+        if uso is not None:
+            _somar_uso_submissao(model_name, *_ler_uso(uso))
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+@contextmanager
+def span(nome, tipo="interno", atual=True, **atributos):
+    """Mede o bloco como um span filho do span em andamento.
+
+    Com ``atual=False`` o span não vira pai dos spans abertos dentro do bloco
+    (use em geradores, que podem ser consumidos em outro contexto).
+    """
+    coletor = _coletor
+    if coletor is None:
+        yield _SPAN_NULO
+        return
+    medicao = Span(coletor, nome, tipo, _span_atual.get(), atributos)
+    token = _span_atual.set(medicao) if atual else None
+    try:
+        yield medicao
+    except GeneratorExit:
+        medicao.definir(interrompido=True)
+        raise
+    except BaseException as e:
+        medicao.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if token is not None:
+            _span_atual.reset(token)
+        medicao.finalizar()
+
+
+def span_atual():
+    """O span em andamento neste contexto (um span nulo se não houver), para acrescentar atributos."""
+    return _span_atual.get() or _SPAN_NULO
+
+
+def instrumentar(nome, func, tipo="no"):
+    """Envolve um nó do grafo (função síncrona ou ``async``) em um ``span``."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def anodo(state):
+            with span(nome, tipo, no=nome):
+                return await func(state)
+        return anodo
+
+    @functools.wraps(func)
+    def nodo(state):
+        with span(nome, tipo, no=nome):
+            return func(state)
+    return nodo
+
+
+def _percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (``valores`` já ordenados)."""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def distribuicao(valores):
+    valores = sorted(valores)
+    return {
+        "n": len(valores),
+        "p50": _percentil(valores, 50),
+        "p95": _percentil(valores, 95),
+        "p99": _percentil(valores, 99),
+        "max": valores[-1] if valores else 0.0,
+    }
+
+
+def _valor_otlp(valor):
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    return {"stringValue": str(valor)}
+
+
+_TOTAIS_LLM = ("chamadas", "erros", "cache_hits", "cache_misses", "retries", "backoff_s", "espera_limitador_s",
+               "tokens_entrada", "tokens_cache", "tokens_saida", "custo_usd")
+
+
+def _somar_llm(totais, s):
+    totais["chamadas"] += 1
+    totais["erros"] += 1 if s["erro"] else 0
+    totais["cache_hits"] += 1 if s.get("cache") == "hit" else 0
+    totais["cache_misses"] += 1 if s.get("cache") == "miss" else 0
+    totais["retries"] += max(0, s.get("tentativas", 1) - 1)
+    for chave in ("backoff_s", "espera_limitador_s", "tokens_entrada", "tokens_cache", "tokens_saida", "custo_usd"):
+        totais[chave] += s.get(chave, 0)
+
+
+class ColetorMetricas:
+    """Recebe os spans terminados; grava os logs e monta o resumo (seguro para threads).
+
+    Com ``max_spans``, guarda para as distribuições só os spans mais recentes.
+    """
+
+    def __init__(self, caminho_log=None, caminho_spans=None, servico="correcao", max_spans=None):
+        self.servico = servico
+        self._lock = threading.Lock()
+        self._spans = collections.deque(maxlen=max_spans)  # registros compactos para o resumo
+        self._registrados = 0
+        self._llm = dict.fromkeys(_TOTAIS_LLM, 0)  # totais desde o início, mesmo com ``max_spans``
+        self._log = open(caminho_log, "a", encoding="utf-8") if caminho_log else None
+        self._otlp = open(caminho_spans, "a", encoding="utf-8") if caminho_spans else None
+
+    def registrar(self, medicao):
+        registro = {
+            "nome": medicao.nome,
+            "tipo": medicao.tipo,
+            "trace_id": medicao.trace_id,
+            "span_id": medicao.span_id,
+            "pai_id": medicao.pai_id,
+            "duracao_s": medicao.duracao_s,
+            "erro": medicao.erro,
+            **medicao.atributos,
+        }
+        with self._lock:
+            self._spans.append(registro)
+            self._registrados += 1
+            if registro["tipo"] == "llm":
+                _somar_llm(self._llm, registro)
+            if self._log is not None:
+                linha = {"ts": datetime.fromtimestamp(medicao.inicio_ns / 1e9, timezone.utc).isoformat(), **registro}
+                self._log.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                self._log.flush()
+            if self._otlp is not None:
+                self._otlp.write(json.dumps(self._para_otlp(medicao), ensure_ascii=False) + "\n")
+                self._otlp.flush()
+
+    def _para_otlp(self, medicao):
+        """Um ``ExportTraceServiceRequest`` em JSON (formato do file exporter do OpenTelemetry)."""
+        otlp_span = {
+            "traceId": medicao.trace_id,
+            "spanId": medicao.span_id,
+            "name": medicao.nome,
+            "kind": 3 if medicao.tipo == "llm" else 1,  # CLIENT / INTERNAL
+            "startTimeUnixNano": str(medicao.inicio_ns),
+            "endTimeUnixNano": str(medicao.inicio_ns + int(medicao.duracao_s * 1e9)),
+            "attributes": [
+                {"key": f"correcao.{k}", "value": _valor_otlp(v)}
+                for k, v in medicao.atributos.items() if v is not None
+            ],
+            "status": {"code": 2, "message": medicao.erro} if medicao.erro else {"code": 1},
+        }
+        if medicao.pai_id is not None:
+            otlp_span["parentSpanId"] = medicao.pai_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.servico}}]},
+            "scopeSpans": [{"scope": {"name": "correcao.metricas"}, "spans": [otlp_span]}],
+        }]}
+
+    def resumo(self):
+        """Distribuição de latência por span, totais das chamadas à LLM e custo por submissão."""
+        with self._lock:
+            spans = list(self._spans)
+            llm_total = dict(self._llm)
+            descartados = self._registrados - len(spans)
+        duracoes = {}
+        for s in spans:
+            duracoes.setdefault(s["nome"], []).append(s["duracao_s"])
+        llm = [s for s in spans if s["tipo"] == "llm"]
+        custo_por_trace = {}
+        for s in llm:
+            custo_por_trace[s["trace_id"]] = custo_por_trace.get(s["trace_id"], 0.0) + s.get("custo_usd", 0.0)
+        submissoes = [s for s in spans if s["tipo"] == "submissao"]
+        custos = [custo_por_trace.get(s["trace_id"], 0.0) for s in submissoes]
+        return {
+            "spans": {nome: distribuicao(valores) for nome, valores in sorted(duracoes.items())},
+            "spans_descartados": descartados,
+            "llm": llm_total,
+            "submissoes": {
+                "n": len(submissoes),
+                "espera_fila_s": distribuicao([s.get("espera_fila_s", 0.0) for s in submissoes]),
+                "custo_usd": {**distribuicao(custos), "media": sum(custos) / len(custos) if custos else 0.0},
+            },
+        }
+
+    def fechar(self):
+        with self._lock:
+            for arquivo in (self._log, self._otlp):
+                if arquivo is not None:
+                    arquivo.close()
+            self._log = self._otlp = None
+
+
+def formatar_resumo(resumo):
+    """Texto do resumo para o fim da execução."""
+    janela = f", últimos {sum(d['n'] for d in resumo['spans'].values())} spans" if resumo["spans_descartados"] else ""
+    linhas = [f"Latência por etapa (s{janela}):"]
+    for nome, d in resumo["spans"].items():
+        linhas.append(f"  {nome:<24} n={d['n']:<5} p50={d['p50']:.3f} p95={d['p95']:.3f} "
+                      f"p99={d['p99']:.3f} max={d['max']:.3f}")
+    llm = resumo["llm"]
+    linhas.append(
+        f"LLM: {llm['chamadas']} chamada(s), {llm['erros']} erro(s), cache {llm['cache_hits']} hit(s)/"
+        f"{llm['cache_misses']} miss(es), {llm['retries']} retry(s), {llm['backoff_s']:.2f}s de backoff, "
+        f"{llm['espera_limitador_s']:.2f}s no limitador."
+    )
+    linhas.append(
+        f"Tokens: {llm['tokens_entrada']} de entrada ({llm['tokens_cache']} em cache), "
+        f"{llm['tokens_saida']} de saída; custo estimado US$ {llm['custo_usd']:.4f}."
+    )
+    sub = resumo["submissoes"]
+    if sub["n"]:
+        custo = sub["custo_usd"]
+        linhas.append(
+            f"Por submissão (n={sub['n']}): custo médio US$ {custo['media']:.5f} "
+            f"(p50 {custo['p50']:.5f}, p95 {custo['p95']:.5f}); espera na fila p50 "
+            f"{sub['espera_fila_s']['p50']:.2f}s, p95 {sub['espera_fila_s']['p95']:.2f}s."
+        )
+    return "\n".join(linhas)
+
+
+def configurar_metricas(caminho_log=None, caminho_spans=None, max_spans=None):
+    """Liga a instrumentação deste processo e retorna o coletor (``max_spans``: ver ``ColetorMetricas``)."""
+    global _coletor
+    _coletor = ColetorMetricas(caminho_log, caminho_spans, max_spans=max_spans)
+    return _coletor
+
+
+def get_coletor():
+    """Retorna o coletor ativo ou ``None`` se a instrumentação está desligada."""
+    return _coletor
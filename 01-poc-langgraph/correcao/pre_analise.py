@@ -0,0 +1,176 @@
+# Pré-análise estática das submissões, executada antes do nó de correção.
+# Confronta o código com regras estruturadas do exercício (``regras_exercicio.json``,
+# ao lado de ``enunciado_exercicio.txt``) e com verificações que valem para qualquer
+# exercício (ex.: chamada estática a método de instância, que nem compila).
+#
+# Formato das regras (todas as chaves são opcionais):
+#   {
+#     "classes": ["ContaBancaria"],
+#     "atributos": [{"classe": "ContaBancaria", "nome": "saldo", "tipo": "double",
+#                    "modificadores": ["private"]}],
+#     "metodos": [{"classe": "ContaBancaria", "nome": "sacar", "parametros": ["double"],
+#                  "retorno": "void", "modificadores": ["public"]}],
+#     "pular_llm_se_errado": true
+#   }
+
+import json
+import os
+import re
+
+from .java_analise import analisar_java
+
+REGRAS_FILENAME = "regras_exercicio.json"
+# Delimitador gravado por ``read_and_concat_java_files`` no início de cada arquivo.
+_INICIO_ARQUIVO_RE = re.compile(r"^// --- ARQUIVO INÍCIO: (.+) ---$")
+
+
+def carregar_regras(enunciado_path):
+    """Lê ``regras_exercicio.json`` da pasta do enunciado, se existir."""
+    caminho = os.path.join(os.path.dirname(enunciado_path), REGRAS_FILENAME)
+    if not os.path.isfile(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _achado(regra, severidade, mensagem, sugestao):
+    return {"regra": regra, "severidade": severidade, "mensagem": mensagem, "sugestao": sugestao}
+
+
+def _localizador(codigo_aluno):
+    """Converte linhas do código concatenado em "Arquivo.java, linha N"."""
+    inicios = []
+    for numero, linha in enumerate(codigo_aluno.split("\n"), start=1):
+        m = _INICIO_ARQUIVO_RE.match(linha.strip())
+        if m:
+            inicios.append((numero, m.group(1)))
+
+    def localizar(linha):
+        for inicio, nome in reversed(inicios):
+            if linha > inicio:
+                return f"{nome}, linha {linha - inicio}"
+        return f"linha {linha}"
+    return localizar
+
+
+# Tipos com métodos implícitos ou herdados que a análise não enxerga (values()/valueOf()
+# de enum, acessores de record, métodos default e estáticos de interface).
+_TIPOS_COM_METODOS_IMPLICITOS = ("enum", "record", "interface")
+
+
+def _verificar_chamadas_estaticas(classes, localizar):
+    """Chamadas ``Classe.metodo()`` a métodos que a classe declara sem ``static``.
+
+    Um método que a classe não declara só vira aviso (nunca pula a LLM): pode
+    vir de Object, de uma interface ou de outro arquivo que não foi analisado.
+    """
+    por_nome = {c.nome: c for c in classes}
+    achados = []
+    for classe in classes:
+        for metodo in classe.metodos:
+            for chamada in metodo.chamadas:
+                alvo = por_nome.get(chamada.receptor)
+                if alvo is None:
+                    continue
+                declarados = alvo.metodos_chamados(chamada.metodo)
+                if declarados and not any(m.estatico for m in declarados):
+                    achados.append(_achado(
+                        "chamada_estatica", "erro",
+                        f"{classe.nome}.{metodo.nome} chama {alvo.nome}.{chamada.metodo}() de forma estática "
+                        f"({localizar(chamada.linha)}), mas '{chamada.metodo}' é um método de instância: o código não compila.",
+                        f"Crie uma instância de {alvo.nome} e chame o método nela, ou declare "
+                        f"'{chamada.metodo}' como static se ele não depender do estado do objeto.",
+                    ))
+                elif (not declarados and alvo.superclasse is None and not alvo.interfaces
+                      and alvo.tipo not in _TIPOS_COM_METODOS_IMPLICITOS):
+                    achados.append(_achado(
+                        "metodo_inexistente", "aviso",
+                        f"{classe.nome}.{metodo.nome} chama {alvo.nome}.{chamada.metodo}() ({localizar(chamada.linha)}), "
+                        f"mas {alvo.nome} não declara esse método.",
+                        f"Declare '{chamada.metodo}' em {alvo.nome} ou corrija o nome da chamada.",
+                    ))
+    return achados
+
+
+def _verificar_regras(classes, regras, localizar):
+    por_nome = {c.nome: c for c in classes}
+    achados = []
+    for nome in regras.get("classes", []):
+        if nome not in por_nome:
+            achados.append(_achado("classe", "erro", f"A classe '{nome}' pedida no enunciado não foi declarada.",
+                                   f"Declare a classe {nome}."))
+
+    for regra in regras.get("atributos", []):
+        classe = por_nome.get(regra["classe"])
+        if classe is None:
+            continue
+        atributo = classe.atributo(regra["nome"])
+        if atributo is None:
+            achados.append(_achado("atributo", "erro",
+                                   f"{classe.nome} não declara o atributo '{regra['nome']}'.",
+                                   f"Declare o atributo '{regra['nome']}' em {classe.nome}."))
+            continue
+        if "tipo" in regra and atributo.tipo != regra["tipo"]:
+            achados.append(_achado("atributo_tipo", "erro",
+                                   f"O atributo {classe.nome}.{atributo.nome} é do tipo '{atributo.tipo}', "
+                                   f"mas o enunciado pede '{regra['tipo']}'.",
+                                   f"Declare '{atributo.nome}' como {regra['tipo']}."))
+        for modificador in regra.get("modificadores", []):
+            if modificador not in atributo.modificadores:
+                achados.append(_achado("atributo_modificador", "erro",
+                                       f"O atributo {classe.nome}.{atributo.nome} ({localizar(atributo.linha)}) "
+                                       f"não é '{modificador}', como pede o enunciado "
+                                       f"(modificadores atuais: {' '.join(atributo.modificadores) or 'nenhum'}).",
+                                       f"Declare '{atributo.nome}' como {modificador}"
+                                       + (" e exponha-o por métodos de acesso (encapsulamento)."
+                                          if modificador == "private" else ".")))
+
+    for regra in regras.get("metodos", []):
+        classe = por_nome.get(regra["classe"])
+        if classe is None:
+            continue
+        candidatos = classe.metodos_chamados(regra["nome"])
+        if "parametros" in regra:
+            candidatos = [m for m in candidatos if m.parametros == regra["parametros"]]
+        assinatura = f"{regra['nome']}({', '.join(regra.get('parametros', []))})"
+        if not candidatos:
+            achados.append(_achado("metodo", "erro",
+                                   f"{classe.nome} não declara o método '{assinatura}'.",
+                                   f"Declare o método {assinatura} em {classe.nome}."))
+            continue
+        metodo = candidatos[0]
+        if "retorno" in regra and metodo.retorno != regra["retorno"]:
+            achados.append(_achado("metodo_retorno", "erro",
+                                   f"{classe.nome}.{assinatura} retorna '{metodo.retorno}', "
+                                   f"mas deveria retornar '{regra['retorno']}'.",
+                                   f"Altere o tipo de retorno para {regra['retorno']}."))
+        for modificador in regra.get("modificadores", []):
+            if modificador not in metodo.modificadores:
+                achados.append(_achado("metodo_modificador", "erro",
+                                       f"{classe.nome}.{assinatura} ({localizar(metodo.linha)}) não é '{modificador}'.",
+                                       f"Declare {assinatura} como {modificador}."))
+    return achados
+
+
+def analisar_submissao(codigo_aluno, regras=None):
+    """Executa a análise estática e devolve a lista de achados."""
+    classes = analisar_java(codigo_aluno)
+    localizar = _localizador(codigo_aluno)
+    achados = _verificar_chamadas_estaticas(classes, localizar)
+    if regras:
+        achados.extend(_verificar_regras(classes, regras, localizar))
+    return achados
+
+
+def formatar_feedback_estatico(achados):
+    """Feedback no mesmo formato pedido à LLM, montado só com os achados certos."""
+    justificativa = "\n".join(f"- {a['mensagem']}" for a in achados)
+    sugestoes = "\n".join(f"- {a['sugestao']}" for a in achados)
+    return (
+        "1. **Avaliação:** Errado\n"
+        "2. **Justificativa:** A análise estática encontrou problemas que violam o enunciado "
+        "ou impedem a compilação:\n"
+        f"{justificativa}\n"
+        "3. **Sugestão de Correção:**\n"
+        f"{sugestoes}"
+    )
@@ -0,0 +1,351 @@
+# Política de retentativas das chamadas à LLM.
+#
+# Cada falha é classificada pelo tipo/código, não pelo texto da mensagem:
+#   - "limite_taxa": 429 (cota); espera o Retry-After/RetryInfo do servidor
+#     ou, com limitador de taxa, deixa o limitador espaçar as chamadas;
+#   - "transitoria": 408/500/502/503/504, timeouts e falhas de rede (menos o
+#     timeout que só aconteceu porque o prazo da submissão acabou: esse vira
+#     ``PrazoEsgotado`` e não conta contra a API);
+#   - "permanente": o resto (ex.: 400 pedido inválido, 403 chave sem acesso),
+#     propagada na hora, sem retentar.
+# As esperas seguem backoff exponencial com "decorrelated jitter" e nunca
+# passam do prazo da submissão (``prazo``), que também limita o timeout de
+# cada tentativa. Um disjuntor (circuit breaker) compartilhado pelo processo
+# abre depois de várias falhas transitórias seguidas: enquanto aberto, as
+# chamadas esperam (sem ocupar a thread, na versão assíncrona) até uma
+# única tentativa de teste passar, em vez de insistir contra uma API fora do ar.
+# Com concorrência adaptativa (``concorrencia.py``), a latência de cada
+# tentativa bem-sucedida e cada 429 viram sinais para o limite de correções
+# simultâneas.
+
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .concorrencia import get_concorrencia
+from .config import MAX_RETRIES
+
+LIMITE_TAXA = "limite_taxa"
+TRANSITORIA = "transitoria"
+PERMANENTE = "permanente"
+
+CODIGOS_TRANSITORIOS = {408, 500, 502, 503, 504}
+
+_prazo = contextvars.ContextVar("correcao_prazo", default=None)  # instante (time.monotonic) limite
+
+
+class PrazoEsgotado(TimeoutError):
+    """O prazo da submissão acabou antes de uma resposta da LLM."""
+
+
+class CircuitoAberto(RuntimeError):
+    """A API está falhando seguidamente e o disjuntor não deixou a chamada sair dentro do prazo."""
+
+
+class RetentativasEsgotadas(RuntimeError):
+    """Todas as tentativas permitidas falharam (a última falha fica em ``__cause__``)."""
+
+
+def classificar(erro):
+    """Classe da falha: ``LIMITE_TAXA``, ``TRANSITORIA`` ou ``PERMANENTE``."""
+    import httpx
+    from google.genai.errors import APIError
+
+    if isinstance(erro, APIError):
+        if erro.code == 429:
+            return LIMITE_TAXA
+        return TRANSITORIA if erro.code in CODIGOS_TRANSITORIOS else PERMANENTE
+    if isinstance(erro, (httpx.TransportError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return TRANSITORIA
+    return PERMANENTE
+
+
+def _eh_timeout(erro):
+    import httpx
+
+    return isinstance(erro, (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException))
+
+
+def espera_sugerida(erro):
+    """Segundos pedidos pelo servidor (cabeçalho Retry-After ou ``RetryInfo`` do erro), se houver."""
+    resposta = getattr(erro, "response", None)
+    cabecalho = getattr(resposta, "headers", {}).get("retry-after") if resposta is not None else None
+    if cabecalho:
+        try:
+            return max(0.0, float(cabecalho))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(cabecalho) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    detalhes = getattr(erro, "details", None)
+    if isinstance(detalhes, dict):
+        for item in (detalhes.get("error") or {}).get("details") or []:
+            atraso = item.get("retryDelay") if isinstance(item, dict) else None
+            if isinstance(atraso, str) and atraso.endswith("s"):
+                try:
+                    return float(atraso[:-1])
+                except ValueError:
+                    pass
+    return None
+
+
+@contextmanager
+def prazo(segundos):
+    """Limita o tempo total das chamadas à LLM feitas dentro do bloco (``None`` = sem prazo).
+
+    O prazo segue o contexto (threads e tarefas asyncio criadas dentro dele).
+    """
+    if segundos is None:
+        yield
+        return
+    token = _prazo.set(time.monotonic() + segundos)
+    try:
+        yield
+    finally:
+        _prazo.reset(token)
+
+
+def tempo_restante():
+    """Segundos até o fim do prazo em andamento, ou ``None`` se não houver prazo."""
+    limite = _prazo.get()
+    return None if limite is None else limite - time.monotonic()
+
+
+class Disjuntor:
+    """Circuit breaker: fechado -> aberto (após ``limiar_falhas`` falhas transitórias seguidas)
+    -> meio aberto (após ``aberto_s``, uma chamada de teste) -> fechado (se ela passar).
+    """
+
+    def __init__(self, limiar_falhas=5, aberto_s=30.0):
+        self.limiar_falhas = limiar_falhas
+        self.aberto_s = aberto_s
+        self.falhas_seguidas = 0
+        self.aberturas = 0
+        self._aberto_ate = None
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self):
+        with self._lock:
+            if self._aberto_ate is None:
+                return "fechado"
+            return "aberto" if time.monotonic() < self._aberto_ate or self._teste_em_andamento else "meio_aberto"
+
+    def espera(self):
+        """``(segundos, teste)``: 0 se a chamada pode sair agora; ``teste`` indica que ela reservou
+        a tentativa de teste (meio aberto) e precisa devolvê-la com ``sucesso``, ``falha`` ou
+        ``liberar_teste``.
+        """
+        with self._lock:
+            if self._aberto_ate is None:
+                return 0.0, False
+            agora = time.monotonic()
+            if agora < self._aberto_ate:
+                return self._aberto_ate - agora, False
+            if self._teste_em_andamento:
+                return min(1.0, self.aberto_s), False
+            self._teste_em_andamento = True
+            return 0.0, True
+
+    def sucesso(self):
+        with self._lock:
+            self.falhas_seguidas = 0
+            self._aberto_ate = None
+            self._teste_em_andamento = False
+
+    def falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            if self._teste_em_andamento or (self._aberto_ate is None and self.falhas_seguidas >= self.limiar_falhas):
+                if self._aberto_ate is None:
+                    print(f"Aviso: {self.falhas_seguidas} falhas seguidas da API; pausando as chamadas "
+                          f"por {self.aberto_s:.0f}s.")
+                self.aberturas += 1
+                self._aberto_ate = time.monotonic() + self.aberto_s
+                self._teste_em_andamento = False
+
+    def liberar_teste(self):
+        """Devolve a vaga de teste sem resultado (erro permanente, prazo esgotado, cancelamento)."""
+        with self._lock:
+            self._teste_em_andamento = False
+
+
+class PoliticaRetentativa:
+    """Parâmetros das retentativas; ``timeout_s`` limita cada tentativa (além do prazo)."""
+
+    def __init__(self, max_tentativas=MAX_RETRIES, base_s=1.0, teto_s=32.0, timeout_s=120.0):
+        self.max_tentativas = max_tentativas
+        self.base_s = base_s
+        self.teto_s = teto_s
+        self.timeout_s = timeout_s
+
+    def proxima_espera(self, anterior, rng=random):
+        """Decorrelated jitter: ``min(teto, uniforme(base, 3 * espera anterior))``."""
+        return min(self.teto_s, rng.uniform(self.base_s, max(self.base_s, anterior) * 3))
+
+
+class ControleRetentativas:
+    """Estado das tentativas de uma chamada; a mesma lógica serve às versões síncrona e assíncrona.
+
+    Uso (a versão assíncrona troca ``time.sleep`` por ``await asyncio.sleep``)::
+
+        controle = ControleRetentativas(medicao)
+        while True:
+            while (espera := controle.antes()):
+                time.sleep(espera)
+            try:
+                resposta = chamar(timeout_s=controle.timeout())
+            except Exception as e:
+                time.sleep(controle.falha(e))  # propaga se não valer retentar
+            else:
+                controle.sucesso()
+                break
+
+    O timeout é calculado fora do ``try``: prazo esgotado não é falha da API.
+    Nas chamadas reais (``llm.py``), a tentativa fica dentro de ``em_tentativa()``
+    para que um cancelamento devolva a vaga de teste do disjuntor.
+    """
+
+    def __init__(self, medicao=None, limitador=None, politica=None, disjuntor=None):
+        self.medicao = medicao
+        self.limitador = limitador
+        self.politica = politica or get_politica()
+        self.disjuntor = disjuntor if disjuntor is not None else get_disjuntor()
+        self.concorrencia = get_concorrencia()
+        self.tentativa = 0
+        self._inicio_tentativa = None
+        self._teste = False  # esta chamada reservou a tentativa de teste do disjuntor
+        self._timeout_pelo_prazo = False  # o timeout da tentativa foi encurtado pelo prazo
+        self._espera_anterior = self.politica.base_s
+
+    def _restante(self):
+        restante = tempo_restante()
+        if restante is not None and restante <= 0:
+            raise PrazoEsgotado("Prazo da submissão esgotado antes da resposta da LLM.")
+        return restante
+
+    def antes(self):
+        """Segundos a esperar antes de chamar ``antes`` de novo; 0 libera a próxima tentativa."""
+        restante = self._restante()
+        espera, self._teste = self.disjuntor.espera() if self.disjuntor is not None else (0.0, False)
+        if espera and restante is not None and espera >= restante:
+            raise CircuitoAberto("API indisponível (disjuntor aberto) até o fim do prazo da submissão.")
+        if espera:
+            self._somar("espera_disjuntor_s", espera)
+            return espera
+        self.tentativa += 1
+        self._inicio_tentativa = time.monotonic()
+        if self.medicao is not None:
+            self.medicao.definir(tentativas=self.tentativa)
+        return 0.0
+
+    def timeout(self):
+        """Timeout da tentativa: o da política, limitado pelo que resta do prazo."""
+        restante = self._restante()
+        self._timeout_pelo_prazo = restante is not None and restante < self.politica.timeout_s
+        return self.politica.timeout_s if not self._timeout_pelo_prazo else restante
+
+    def abandonar(self):
+        """A tentativa terminou sem dizer nada da API: devolve a vaga de teste do disjuntor, se for desta chamada."""
+        if self._teste and self.disjuntor is not None:
+            self.disjuntor.liberar_teste()
+        self._teste = False
+
+    @contextmanager
+    def em_tentativa(self):
+        """Envolve uma tentativa: se ela sair por cancelamento, Ctrl+C ou erro propagado, chama ``abandonar``."""
+        try:
+            yield
+        except BaseException:
+            self.abandonar()
+            raise
+
+    def sucesso(self):
+        self._teste = False
+        if self.disjuntor is not None:
+            self.disjuntor.sucesso()
+        if self.concorrencia is not None and self._inicio_tentativa is not None:
+            # Inclui a espera no limitador de taxa: chamadas demais para a cota também aparecem como latência.
+            self.concorrencia.registrar_latencia(time.monotonic() - self._inicio_tentativa)
+
+    def falha(self, erro):
+        """Decide o que fazer com ``erro``: devolve a espera até a próxima tentativa ou propaga."""
+        if isinstance(erro, (PrazoEsgotado, CircuitoAberto)):
+            self.abandonar()
+            raise erro
+        classe = classificar(erro)
+        if classe == TRANSITORIA and self._timeout_pelo_prazo and _eh_timeout(erro):
+            # O timeout local foi o fim do prazo da submissão, não lentidão da API.
+            self.abandonar()
+            raise PrazoEsgotado("Prazo da submissão esgotado durante a chamada à LLM.") from erro
+        if self.medicao is not None:
+            self.medicao.definir(ultima_falha=classe)
+        if classe == PERMANENTE:
+            self.abandonar()
+            raise erro
+        if classe == TRANSITORIA and self.disjuntor is not None:
+            self._teste = False
+            self.disjuntor.falha()
+        else:
+            self.abandonar()
+        if classe == LIMITE_TAXA and self.concorrencia is not None:
+            self.concorrencia.registrar_sobrecarga()
+        if self.tentativa >= self.politica.max_tentativas:
+            raise RetentativasEsgotadas(
+                f"Falha ao gerar conteúdo após {self.tentativa} tentativa(s): {type(erro).__name__}: {erro}"
+            ) from erro
+
+        sugerida = espera_sugerida(erro)
+        if sugerida is not None:
+            espera = sugerida + random.uniform(0, min(1.0, sugerida * 0.1))
+        elif classe == LIMITE_TAXA and self.limitador is not None:
+            # A cota real é menor que a configurada: zera os baldes e deixa
+            # o limitador espaçar a próxima tentativa de todos os chamadores.
+            self.limitador.esvaziar()
+            espera = 0.0
+        else:
+            espera = self.politica.proxima_espera(self._espera_anterior)
+            self._espera_anterior = espera
+        restante = self._restante()
+        if restante is not None and espera >= restante:
+            raise PrazoEsgotado(
+                f"Prazo da submissão esgotado: a próxima tentativa seria em {espera:.1f}s "
+                f"(restam {restante:.1f}s)."
+            ) from erro
+        descricao = "Taxa limite atingida" if classe == LIMITE_TAXA else f"Falha transitória ({type(erro).__name__})"
+        print(f"Aviso: {descricao}. Tentando novamente em {espera:.2f} segundos...")
+        self._somar("backoff_s", espera)
+        return espera
+
+    def _somar(self, chave, valor):
+        if self.medicao is not None:
+            self.medicao.somar(chave, valor)
+
+
+_politica = PoliticaRetentativa()
+_disjuntor = Disjuntor()
+
+
+def configurar_retentativas(max_tentativas=MAX_RETRIES, base_s=1.0, teto_s=32.0, timeout_s=120.0,
+                            limiar_falhas=5, aberto_s=30.0):
+    """Troca a política e o disjuntor do processo; ``limiar_falhas=None`` desliga o disjuntor."""
+    global _politica, _disjuntor
+    _politica = PoliticaRetentativa(max_tentativas, base_s, teto_s, timeout_s)
+    _disjuntor = Disjuntor(limiar_falhas, aberto_s) if limiar_falhas else None
+    return _politica, _disjuntor
+
+
+def get_politica():
+    return _politica
+
+
+def get_disjuntor():
+    """O disjuntor do processo (``None`` se desligado)."""
+    return _disjuntor
@@ -0,0 +1,101 @@
+# Execuções em lote retomáveis: checkpointer SQLite do LangGraph (um thread por
+# submissão) e um manifesto da execução com o estado de cada submissão.
+# Numa nova execução, submissões concluídas são reaproveitadas do checkpoint e
+# as que falharam recomeçam a partir do último nó concluído.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+
+@asynccontextmanager
+async def abrir_checkpointer(caminho):
+    """Abre um ``AsyncSqliteSaver`` (pacote ``langgraph-checkpoint-sqlite``)."""
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "Checkpoints persistentes exigem o pacote 'langgraph-checkpoint-sqlite' "
+            "(pip install langgraph-checkpoint-sqlite)."
+        ) from e
+    async with AsyncSqliteSaver.from_conn_string(caminho) as saver:
+        yield saver
+
+
+_INTERVALO_GRAVACAO_S = 2.0
+
+
+def thread_id_submissao(submissao_id, enunciado, codigo, regras=None, testes=None, modelo=None, configuracao=""):
+    """Thread do checkpointer: o id da submissão + hash das entradas e da configuração.
+
+    ``configuracao`` é o hash das opções do grafo (``incremental.impressao_configuracao``).
+    Se o aluno reenviar, o enunciado, as regras, os testes ou o modelo mudarem,
+    ou o lote rodar com outro grafo (ex.: com ``--pre-analise``), o thread muda
+    e a submissão é corrigida de novo em vez de reaproveitar um resultado antigo.
+    """
+    h = hashlib.sha256()
+    extras = json.dumps([regras, testes, modelo], sort_keys=True, ensure_ascii=False)
+    for parte in (enunciado, codigo, extras, configuracao):
+        h.update(parte.encode("utf-8"))
+        h.update(b"\0")
+    return f"{submissao_id}@{h.hexdigest()[:16]}"
+
+
+class ManifestoExecucao:
+    """Registro em JSON do andamento de uma execução (uma entrada por submissão).
+
+    Cada gravação substitui o arquivo de forma atômica (arquivo temporário +
+    ``os.replace``), então uma queda no meio nunca deixa o manifesto corrompido.
+    As gravações são agrupadas como em ``incremental.ManifestoIncremental``:
+    ``marcar`` grava no máximo a cada poucos segundos e ``salvar`` grava o que
+    faltar no fim (o estado que vale para retomar está no checkpoint).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._ultima_gravacao = 0.0
+        self._sujo = False
+        self.submissoes = {}
+        if os.path.isfile(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                self.submissoes = json.load(f).get("submissoes", {})
+
+    def status(self, submissao_id):
+        return self.submissoes.get(submissao_id, {}).get("status")
+
+    def marcar(self, submissao_id, status, thread_id=None, erro=None):
+        with self._lock:
+            entrada = self.submissoes.setdefault(submissao_id, {"tentativas": 0})
+            entrada["status"] = status
+            entrada["atualizado_em"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            if thread_id is not None:
+                entrada["thread_id"] = thread_id
+            if status == "em_andamento":
+                entrada["tentativas"] += 1
+            entrada["erro"] = erro
+            self._sujo = True
+            if time.monotonic() - self._ultima_gravacao >= _INTERVALO_GRAVACAO_S:
+                self._salvar()
+
+    def salvar(self):
+        with self._lock:
+            if self._sujo:
+                self._salvar()
+
+    def resumo(self):
+        contagem = {}
+        for entrada in self.submissoes.values():
+            contagem[entrada["status"]] = contagem.get(entrada["status"], 0) + 1
+        return contagem
+
+    def _salvar(self):
+        temporario = f"{self.caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"submissoes": self.submissoes}, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+        self._ultima_gravacao = time.monotonic()
+        self._sujo = False
@@ -0,0 +1,460 @@
+# Serviço residente de correção (HTTP local ou socket Unix).
+#
+# Um único processo mantém carregados o grafo compilado, o cliente Gemini (com
+# o pool de conexões) e os caches; cada pedido paga só a latência da LLM. Os
+# pedidos entram numa fila limitada e são corrigidos por ``concorrencia``
+# tarefas asyncio numa thread própria (ou por um número ajustado durante a
+# execução, com ``concorrencia.LimitadorConcorrencia``). Com a fila cheia, o serviço responde
+# 503 com Retry-After em vez de acumular trabalho: numa rajada perto do prazo
+# de entrega, o LMS espera e reenvia. Pedidos idênticos (mesmo enunciado,
+# código e regras) enquanto o primeiro ainda está na fila ou em andamento
+# são unidos à mesma tarefa: dez cliques em "corrigir" viram uma chamada à LLM.
+#
+# Rotas:
+#   POST /correcoes                 {"enunciado", "codigo_aluno" | "arquivos": {nome: conteúdo}, "regras"?}
+#                                   -> 202 com a tarefa (ou 200 com o resultado, com ?esperar=S)
+#   GET  /correcoes/<id>[?esperar=S] estado da tarefa (espera até S segundos pelo fim)
+#   GET  /correcoes/<id>/eventos    stream SSE: trechos do feedback, estado e resultado final
+#   GET  /saude                     tamanho da fila, tarefas em andamento e contadores
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import socketserver
+import threading
+import time
+import uuid
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .arquivos import concatenar_arquivos_java
+from .avaliacao import categorias_falha
+from .fila import CONCLUIDA, EM_ANDAMENTO, ERRO, PENDENTE
+from .grafo import estado_inicial
+from .lote import ResultadoSubmissao
+from .metricas import contabilizar_uso, span
+from .retentativas import prazo
+
+ESPERA_MAXIMA_S = 300.0  # teto do ?esperar= e do intervalo entre eventos do stream
+
+
+class FilaCheia(RuntimeError):
+    """A fila do serviço está no limite; ``espera_s`` estima quando tentar de novo."""
+
+    def __init__(self, espera_s):
+        super().__init__(f"Fila de correção cheia; tente novamente em {espera_s:.0f}s.")
+        self.espera_s = espera_s
+
+
+class ServicoEncerrado(RuntimeError):
+    """O serviço está encerrando e não aceita novos pedidos."""
+
+
+def chave_pedido(enunciado, codigo_aluno, regras=None):
+    """Identidade do pedido para unir pedidos idênticos em andamento."""
+    h = hashlib.sha256()
+    for parte in (enunciado, codigo_aluno, json.dumps(regras or {}, sort_keys=True)):
+        h.update(parte.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class Tarefa:
+    """Uma correção em andamento, compartilhada por todos os pedidos idênticos.
+
+    ``eventos`` guarda tudo o que foi publicado (trechos, mudanças de estado),
+    para que um stream aberto no meio da correção receba o feedback desde o
+    início. As threads HTTP esperam novos eventos pela ``threading.Condition``.
+    """
+
+    def __init__(self, id_, chave, entrada):
+        self.id = id_
+        self.chave = chave
+        self.entrada = entrada
+        self.estado = PENDENTE
+        self.pedidos = 1
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.concluida_em = None
+        self.resultado = None
+        self.eventos = []
+        self._cond = threading.Condition()
+
+    @property
+    def terminada(self):
+        return self.estado in (CONCLUIDA, ERRO)
+
+    def publicar(self, evento):
+        with self._cond:
+            self.eventos.append(evento)
+            self._cond.notify_all()
+
+    def iniciar(self):
+        self.iniciada_em = time.time()
+        self.estado = EM_ANDAMENTO
+        self.publicar({"estado": EM_ANDAMENTO})
+
+    def concluir(self, resultado):
+        with self._cond:
+            self.resultado = resultado
+            self.concluida_em = time.time()
+            self.estado = ERRO if resultado.erro else CONCLUIDA
+            self.eventos.append({"estado": self.estado, "resultado": asdict(resultado)})
+            self._cond.notify_all()
+
+    def aguardar(self, timeout):
+        """Espera o fim da correção por até ``timeout`` segundos; devolve se terminou."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.terminada, timeout)
+
+    def eventos_desde(self, indice, timeout):
+        """Eventos a partir de ``indice``, esperando até ``timeout`` se ainda não houver nenhum."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.eventos) > indice or self.terminada, timeout)
+            return self.eventos[indice:]
+
+    def resumo(self):
+        agora = time.time()
+        resumo = {
+            "id": self.id,
+            "estado": self.estado,
+            "pedidos": self.pedidos,
+            "espera_fila_s": round((self.iniciada_em or agora) - self.criada_em, 3),
+        }
+        if self.resultado is not None:
+            resumo["resultado"] = asdict(self.resultado)
+        elif self.estado == EM_ANDAMENTO:
+            resumo["feedback_parcial"] = "".join(e.get("trecho", "") for e in list(self.eventos))
+        return resumo
+
+
+class ServicoCorrecao:
+    """Fila limitada + trabalhadores asyncio em volta de um grafo compilado.
+
+    ``submeter`` pode ser chamado de qualquer thread; as correções rodam no
+    loop de eventos da thread do serviço (``iniciar``/``encerrar``). Com
+    ``limitador``, há um trabalhador por vaga possível (``limitador.maximo``)
+    e cada correção espera uma vaga do limite atual.
+    """
+
+    def __init__(self, app, max_fila=200, concorrencia=8, prazo_s=None, retencao_s=900.0, limitador=None):
+        self.app = app
+        self.max_fila = max_fila
+        self.concorrencia = concorrencia
+        self.limitador = limitador
+        self.prazo_s = prazo_s
+        self.retencao_s = retencao_s
+        self.recebidos = 0
+        self.coalescidos = 0
+        self.recusados = 0
+        self.concluidos = 0
+        self.erros = 0
+        self._tarefas = {}  # id -> Tarefa (em andamento ou concluída há menos de ``retencao_s``)
+        self._em_voo = {}  # chave do pedido -> Tarefa na fila ou em andamento
+        self._na_fila = 0
+        self._em_andamento = 0
+        self._duracao_media_s = None
+        self._encerrando = False
+        self._lock = threading.Lock()
+        self._loop = None
+        self._fila = None
+        self._thread = None
+
+    def iniciar(self):
+        pronto = threading.Event()
+        self._thread = threading.Thread(target=self._executar_loop, args=(pronto,), daemon=True,
+                                        name="servico-correcao")
+        self._thread.start()
+        pronto.wait()
+        return self
+
+    def _executar_loop(self, pronto):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._fila = asyncio.Queue()
+        n = self.limitador.maximo if self.limitador is not None else self.concorrencia
+        trabalhadores = [self._loop.create_task(self._trabalhar()) for _ in range(n)]
+        pronto.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for t in trabalhadores:
+                t.cancel()
+            self._loop.run_until_complete(asyncio.gather(*trabalhadores, return_exceptions=True))
+            self._loop.close()
+
+    def encerrar(self, timeout=None):
+        """Para de aceitar pedidos, espera a fila esvaziar (até ``timeout``) e para os trabalhadores."""
+        with self._lock:
+            self._encerrando = True
+        if self._loop is None:
+            return
+        if timeout is None or timeout > 0:
+            esvaziar = asyncio.run_coroutine_threadsafe(self._fila.join(), self._loop)
+            try:
+                esvaziar.result(timeout)
+            except TimeoutError:
+                esvaziar.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def submeter(self, enunciado, codigo_aluno, regras=None):
+        """Enfileira o pedido (ou o une a um idêntico em andamento); devolve ``(tarefa, coalescida)``.
+
+        Levanta ``FilaCheia`` se já houver ``max_fila`` tarefas esperando.
+        """
+        chave = chave_pedido(enunciado, codigo_aluno, regras)
+        with self._lock:
+            if self._encerrando:
+                raise ServicoEncerrado("Serviço encerrando; não aceita novos pedidos.")
+            self._expirar()
+            self.recebidos += 1
+            tarefa = self._em_voo.get(chave)
+            if tarefa is not None:
+                tarefa.pedidos += 1
+                self.coalescidos += 1
+                return tarefa, True
+            if self._na_fila >= self.max_fila:
+                self.recusados += 1
+                raise FilaCheia(self._espera_estimada())
+            tarefa = Tarefa(uuid.uuid4().hex, chave, estado_inicial(enunciado, codigo_aluno, regras))
+            self._tarefas[tarefa.id] = tarefa
+            self._em_voo[chave] = tarefa
+            self._na_fila += 1
+        self._loop.call_soon_threadsafe(self._fila.put_nowait, tarefa)
+        return tarefa, False
+
+    def obter(self, id_):
+        with self._lock:
+            return self._tarefas.get(id_)
+
+    def _expirar(self):
+        limite = time.time() - self.retencao_s
+        for id_ in [i for i, t in self._tarefas.items() if t.terminada and t.concluida_em < limite]:
+            del self._tarefas[id_]
+
+    def _concorrencia_atual(self):
+        return self.limitador.limite if self.limitador is not None else self.concorrencia
+
+    def _espera_estimada(self):
+        duracao = self._duracao_media_s or 10.0
+        return max(1.0, duracao * (self._na_fila + self._em_andamento) / self._concorrencia_atual())
+
+    def estatisticas(self):
+        with self._lock:
+            adaptativa = self.limitador.estatisticas() if self.limitador is not None else None
+            if adaptativa is not None:
+                del adaptativa["historico"]  # a resposta de /saude fica pequena
+            return {
+                "na_fila": self._na_fila,
+                "max_fila": self.max_fila,
+                "em_andamento": self._em_andamento,
+                "concorrencia": self._concorrencia_atual(),
+                "concorrencia_adaptativa": adaptativa,
+                "recebidos": self.recebidos,
+                "coalescidos": self.coalescidos,
+                "recusados": self.recusados,
+                "concluidos": self.concluidos,
+                "erros": self.erros,
+                "retidos": len(self._tarefas),
+                "duracao_media_s": self._duracao_media_s,
+                "encerrando": self._encerrando,
+            }
+
+    async def _trabalhar(self):
+        while True:
+            tarefa = await self._fila.get()
+            async with self.limitador or contextlib.nullcontext():
+                with self._lock:
+                    self._na_fila -= 1
+                    self._em_andamento += 1
+                resultado = await self._corrigir(tarefa)
+            tarefa.concluir(resultado)
+            with self._lock:
+                self._em_andamento -= 1
+                self._em_voo.pop(tarefa.chave, None)
+                if resultado.erro:
+                    self.erros += 1
+                else:
+                    self.concluidos += 1
+                # Média móvel exponencial, para estimar o Retry-After.
+                media = self._duracao_media_s
+                self._duracao_media_s = resultado.duracao_s if media is None else 0.8 * media + 0.2 * resultado.duracao_s
+            self._fila.task_done()
+
+    async def _corrigir(self, tarefa):
+        """Executa o grafo repassando os eventos ``custom`` (trechos) aos streams da tarefa."""
+        tarefa.iniciar()
+        with span("submissao", "submissao", submissao=tarefa.id) as medicao:
+            inicio = time.perf_counter()
+            medicao.definir(espera_fila_s=tarefa.iniciada_em - tarefa.criada_em)
+            try:
+                final_state = tarefa.entrada
+                with prazo(self.prazo_s), contabilizar_uso() as uso:
+                    async for modo, evento in self.app.astream(tarefa.entrada, stream_mode=["custom", "values"]):
+                        if modo == "custom":
+                            tarefa.publicar(evento)
+                        else:
+                            final_state = evento
+                medicao.definir(avaliacao=final_state.get("avaliacao_status", ""), pedidos=tarefa.pedidos)
+                return ResultadoSubmissao(
+                    id=tarefa.id,
+                    feedback_bruto=final_state.get("feedback_bruto", ""),
+                    avaliacao_status=final_state.get("avaliacao_status", ""),
+                    avaliacao_estruturada=final_state.get("avaliacao_estruturada") or None,
+                    categorias_falha=categorias_falha(final_state),
+                    modelo=uso.modelo,
+                    tokens_entrada=uso.tokens_entrada,
+                    tokens_saida=uso.tokens_saida,
+                    custo_usd=uso.custo_usd,
+                    duracao_s=time.perf_counter() - inicio,
+                )
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                medicao.definir(erro_correcao=erro)
+                return ResultadoSubmissao(id=tarefa.id, erro=erro, duracao_s=time.perf_counter() - inicio)
+
+
+def _segundos(consulta, nome):
+    try:
+        return min(ESPERA_MAXIMA_S, max(0.0, float(consulta.get(nome, ["0"])[0])))
+    except ValueError:
+        return 0.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    servico = None  # definido na subclasse criada por ServidorCorrecao
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _json(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _erro(self, status, mensagem, cabecalhos=None):
+        self._json(status, {"erro": mensagem}, cabecalhos)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if url.path.rstrip("/") != "/correcoes":
+            return self._erro(404, "rota não encontrada")
+        try:
+            pedido = json.loads(corpo or b"{}")
+            enunciado = pedido["enunciado"]
+            codigo = pedido.get("codigo_aluno")
+            if codigo is None:
+                codigo = concatenar_arquivos_java(pedido["arquivos"])
+            if not isinstance(enunciado, str) or not isinstance(codigo, str) or not codigo.strip():
+                raise ValueError("enunciado e código devem ser texto não vazio")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self._erro(400, f"pedido inválido ({type(e).__name__}: {e}); "
+                                   "envie enunciado e codigo_aluno (ou arquivos)")
+        try:
+            tarefa, coalescida = self.servico.submeter(enunciado, codigo, pedido.get("regras"))
+        except FilaCheia as e:
+            return self._erro(503, str(e), {"Retry-After": str(int(e.espera_s + 0.999))})
+        except ServicoEncerrado as e:
+            return self._erro(503, str(e))
+        esperar = _segundos(parse_qs(url.query), "esperar")
+        terminada = tarefa.aguardar(esperar) if esperar else tarefa.terminada
+        self._json(200 if terminada else 202, {**tarefa.resumo(), "coalescida": coalescida},
+                   {"Location": f"/correcoes/{tarefa.id}"})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        partes = [p for p in url.path.split("/") if p]
+        if partes == ["saude"]:
+            return self._json(200, self.servico.estatisticas())
+        if len(partes) not in (2, 3) or partes[0] != "correcoes" or (len(partes) == 3 and partes[2] != "eventos"):
+            return self._erro(404, "rota não encontrada")
+        tarefa = self.servico.obter(partes[1])
+        if tarefa is None:
+            return self._erro(404, "tarefa não encontrada (ou já expirada)")
+        if len(partes) == 3:
+            return self._stream(tarefa)
+        esperar = _segundos(parse_qs(url.query), "esperar")
+        if esperar:
+            tarefa.aguardar(esperar)
+        self._json(200, tarefa.resumo())
+
+    def _stream(self, tarefa):
+        """Server-sent events com os eventos da tarefa, do início até o resultado final."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        indice = 0
+        try:
+            while True:
+                eventos = tarefa.eventos_desde(indice, ESPERA_MAXIMA_S)
+                indice += len(eventos)
+                dados = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in eventos) or ": ping\n\n"
+                dados = dados.encode("utf-8")
+                self.wfile.write(f"{len(dados):x}\r\n".encode("ascii") + dados + b"\r\n")
+                self.wfile.flush()
+                if tarefa.terminada and indice >= len(tarefa.eventos):
+                    break
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # o cliente desistiu; a correção continua para os demais
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # rajadas de pedidos chegam antes da fila do serviço decidir
+
+
+class _ServidorUnix(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def get_request(self):
+        conexao, _ = super().get_request()
+        return conexao, ("unix", 0)  # BaseHTTPRequestHandler espera um endereço (host, porta)
+
+
+class ServidorCorrecao:
+    """Expõe um ``ServicoCorrecao`` por HTTP em ``host:porta`` ou num socket Unix (``caminho_socket``)."""
+
+    def __init__(self, servico, host="127.0.0.1", porta=8090, caminho_socket=None):
+        self.servico = servico
+        self.caminho_socket = caminho_socket
+        handler = type("Handler", (_Handler,), {"servico": servico})
+        if caminho_socket:
+            if os.path.exists(caminho_socket):
+                os.unlink(caminho_socket)
+            self._servidor = _ServidorUnix(caminho_socket, handler)
+        else:
+            self._servidor = _ServidorHTTP((host, porta), handler)
+
+    @property
+    def endereco(self):
+        if self.caminho_socket:
+            return f"unix:{self.caminho_socket}"
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def servir(self):
+        """Atende pedidos até ``parar`` (chamado de outra thread) ou Ctrl+C."""
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+            if self.caminho_socket and os.path.exists(self.caminho_socket):
+                os.unlink(self.caminho_socket)
+
+    def parar(self):
+        self._servidor.shutdown()
@@ -0,0 +1,362 @@
+# Servidor local que imita a API REST do Gemini, para benchmarks sem chave
+# nem cota. Atende ``models/*:generateContent``, ``:streamGenerateContent``
+# (SSE) e ``cachedContents``; o cliente real chega até ele por
+# ``GEMINI_BASE_URL`` (ver ``cliente.py``), então o caminho medido é o mesmo
+# da produção: pool HTTP, retries, limitador, cache e grafo.
+#
+# Latência, tamanho da resposta, taxa de tokens e erros 429 seguem
+# distribuições configuráveis. Com ``capacidade``, o servidor satura: acima
+# desse número de gerações simultâneas, latência e geração ficam mais lentas
+# na proporção do excesso (como uma API sob carga). Os sorteios dependem só da semente, do corpo
+# da requisição e de quantas vezes esse corpo já foi recebido, então a mesma
+# sequência de requisições produz as mesmas respostas.
+#
+# Uso avulso:
+#   python -m correcao.servidor_falso --porta 8089 --latencia lognormal:0.8,0.5 --prob-429 0.05
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .avaliacao import AVALIACOES
+
+CHARS_POR_TOKEN = 4
+
+
+def sortear(especificacao, rng):
+    """Sorteia um valor de ``"fixa:v"``, ``"uniforme:a,b"``, ``"normal:media,desvio"`` ou ``"lognormal:mediana,sigma"``."""
+    tipo, _, parametros = especificacao.partition(":")
+    valores = [float(v) for v in parametros.split(",")] if parametros else []
+    if tipo == "fixa":
+        return valores[0]
+    if tipo == "uniforme":
+        return rng.uniform(valores[0], valores[1])
+    if tipo == "normal":
+        return max(0.0, rng.gauss(valores[0], valores[1]))
+    if tipo == "lognormal":
+        return rng.lognormvariate(math.log(valores[0]), valores[1])
+    raise ValueError(f"Distribuição desconhecida: {especificacao!r}")
+
+
+@dataclass
+class ConfigServidorFalso:
+    """Comportamento do servidor falso."""
+    semente: int = 0
+    latencia: str = "lognormal:0.6,0.4"  # até o primeiro token, em segundos
+    tokens_saida: str = "normal:350,120"  # tamanho da resposta
+    tokens_por_s: float = 250.0  # velocidade de geração (define a duração da resposta)
+    prob_429: float = 0.0  # 429 aleatório, independente da cota
+    rpm: int = 0  # cota de requisições por minuto (0 = sem cota); acima dela, 429
+    capacidade: int = 0  # gerações simultâneas sem perda de velocidade (0 = ilimitada)
+    fracao_certo: float = 0.45
+    fracao_errado: float = 0.35  # o restante é "Parcialmente Certo"
+
+
+class _Estado:
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.vistos = {}  # hash do corpo -> vezes recebido
+        self.janela_rpm = deque()
+        self.caches = {}  # nome -> tokens do conteúdo
+        self.requisicoes = 0
+        self.erros_429 = 0
+        self.ativas = 0
+        self.max_ativas = 0
+        self.tokens_entrada = 0
+        self.tokens_saida = 0
+
+    def entrar(self):
+        """Conta uma geração em andamento; devolve o fator de lentidão pela saturação."""
+        with self.lock:
+            self.ativas += 1
+            self.max_ativas = max(self.max_ativas, self.ativas)
+            if not self.config.capacidade:
+                return 1.0
+            return max(1.0, self.ativas / self.config.capacidade)
+
+    def sair(self):
+        with self.lock:
+            self.ativas -= 1
+
+    def rng(self, corpo):
+        digest = hashlib.sha256(corpo).hexdigest()
+        with self.lock:
+            vez = self.vistos.get(digest, 0)
+            self.vistos[digest] = vez + 1
+        return random.Random(f"{self.config.semente}:{digest}:{vez}")
+
+    def admitir(self, rng):
+        """Decide se a requisição recebe 429 (cota por minuto ou injeção aleatória)."""
+        agora = time.monotonic()
+        with self.lock:
+            self.requisicoes += 1
+            if self.config.rpm:
+                while self.janela_rpm and agora - self.janela_rpm[0] > 60:
+                    self.janela_rpm.popleft()
+                if len(self.janela_rpm) >= self.config.rpm:
+                    self.erros_429 += 1
+                    return False
+            if rng.random() < self.config.prob_429:
+                self.erros_429 += 1
+                return False
+            if self.config.rpm:
+                self.janela_rpm.append(agora)
+            return True
+
+
+def _texto(partes):
+    return "".join(p.get("text", "") for p in partes or [])
+
+
+def _tokens(texto):
+    return len(texto) // CHARS_POR_TOKEN + 1
+
+
+def _veredito(config, prompt):
+    # Depende só do prompt, para que o mesmo código receba sempre o mesmo veredito.
+    x = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+    if x < config.fracao_certo:
+        return AVALIACOES[0]
+    if x < config.fracao_certo + config.fracao_errado:
+        return AVALIACOES[1]
+    return AVALIACOES[2]
+
+
+_PALAVRAS = ("encapsulamento", "atributo", "método", "classe", "validação", "saldo", "retorno",
+             "parâmetro", "instância", "estático", "lógica", "código", "objeto", "estado")
+
+
+def _frase(rng, tokens):
+    return " ".join(rng.choice(_PALAVRAS) for _ in range(max(1, tokens))) + "."
+
+
+def _valor_schema(schema, rng, veredito, tokens):
+    """Valor que satisfaz o ``responseSchema`` (subconjunto OpenAPI enviado pelo SDK)."""
+    tipo = schema.get("type", "STRING").upper()
+    if "enum" in schema:
+        return veredito if veredito in schema["enum"] else schema["enum"][0]
+    if tipo == "OBJECT":
+        return {
+            nome: _valor_schema(sub, rng, veredito, tokens // max(1, len(schema.get("properties", {}))))
+            for nome, sub in schema.get("properties", {}).items()
+            if nome in schema.get("required", []) or rng.random() < 0.5
+        }
+    if tipo == "ARRAY":
+        return [_valor_schema(schema.get("items", {}), rng, veredito, tokens // 3) for _ in range(rng.randint(1, 3))]
+    if tipo in ("NUMBER", "INTEGER"):
+        valor = rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 10.0))
+        return round(valor) if tipo == "INTEGER" else round(valor, 2)
+    if tipo == "BOOLEAN":
+        return rng.random() < 0.5
+    return _frase(rng, tokens)
+
+
+def _resposta(config, requisicao, rng, tokens_saida):
+    prompt = "".join(_texto(c.get("parts")) for c in requisicao.get("contents", []))
+    veredito = _veredito(config, prompt)
+    geracao = requisicao.get("generationConfig") or {}
+    schema = geracao.get("responseSchema")
+    if geracao.get("responseMimeType") == "application/json" and schema:
+        return json.dumps(_valor_schema(schema, rng, veredito, tokens_saida), ensure_ascii=False)
+    terco = max(1, tokens_saida // 3)
+    return (
+        f"1. **Avaliação:** {veredito}\n"
+        f"2. **Justificativa:** {_frase(rng, terco * 2)}\n"
+        f"3. **Sugestão de Correção:** {_frase(rng, terco)}"
+    )
+
+
+def _corpo_resposta(texto, model, tokens_entrada, tokens_cache, tokens_saida, final=True):
+    corpo = {
+        "candidates": [{"content": {"parts": [{"text": texto}], "role": "model"}, "index": 0}],
+        "modelVersion": model,
+    }
+    if final:
+        corpo["candidates"][0]["finishReason"] = "STOP"
+        corpo["usageMetadata"] = {
+            "promptTokenCount": tokens_entrada,
+            "cachedContentTokenCount": tokens_cache,
+            "candidatesTokenCount": tokens_saida,
+            "totalTokenCount": tokens_entrada + tokens_saida,
+        }
+    return corpo
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    estado = None  # definido na subclasse criada por ServidorGeminiFalso
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _json(self, status, corpo):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _ler(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self):
+        corpo = self._ler()
+        caminho = self.path.split("?")[0]
+        if caminho.endswith("/cachedContents"):
+            return self._criar_cache(json.loads(corpo or b"{}"))
+        if ":generateContent" in caminho or ":streamGenerateContent" in caminho:
+            return self._gerar(caminho, corpo, streaming=":streamGenerateContent" in caminho)
+        self._json(404, {"error": {"code": 404, "message": "não encontrado", "status": "NOT_FOUND"}})
+
+    def do_PATCH(self):
+        self._ler()
+        self._json(200, {"name": self.path.split("/v1beta/")[-1]})
+
+    def do_DELETE(self):
+        nome = self.path.split("/v1beta/")[-1].split("?")[0]
+        with self.estado.lock:
+            self.estado.caches.pop(nome, None)
+        self._json(200, {})
+
+    def _criar_cache(self, requisicao):
+        conteudo = "".join(_texto(c.get("parts")) for c in requisicao.get("contents", []))
+        conteudo += _texto((requisicao.get("systemInstruction") or {}).get("parts"))
+        with self.estado.lock:
+            nome = f"cachedContents/falso{len(self.estado.caches) + 1}"
+            self.estado.caches[nome] = _tokens(conteudo)
+        self._json(200, {"name": nome, "model": requisicao.get("model"),
+                         "usageMetadata": {"totalTokenCount": self.estado.caches[nome]}})
+
+    def _gerar(self, caminho, corpo, streaming):
+        config = self.estado.config
+        rng = self.estado.rng(corpo)
+        requisicao = json.loads(corpo)
+        model = caminho.rsplit("/", 1)[-1].split(":")[0]
+        latencia = sortear(config.latencia, rng)
+        tokens_saida = max(1, int(sortear(config.tokens_saida, rng)))
+        if not self.estado.admitir(rng):
+            time.sleep(min(latencia, 0.05))
+            return self._json(429, {"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED",
+                "message": "Resource has been exhausted (e.g. check quota).",
+            }})
+        tokens_cache = self.estado.caches.get(requisicao.get("cachedContent"), 0)
+        entrada = "".join(_texto(c.get("parts")) for c in requisicao.get("contents", []))
+        entrada += _texto((requisicao.get("systemInstruction") or {}).get("parts"))
+        tokens_entrada = _tokens(entrada) + tokens_cache
+        texto = _resposta(config, requisicao, rng, tokens_saida)
+        with self.estado.lock:
+            self.estado.tokens_entrada += tokens_entrada
+            self.estado.tokens_saida += tokens_saida
+        lentidao = self.estado.entrar()
+        try:
+            self._responder(texto, model, tokens_entrada, tokens_cache, tokens_saida,
+                            latencia * lentidao, tokens_saida / config.tokens_por_s * lentidao, streaming)
+        finally:
+            self.estado.sair()
+
+    def _responder(self, texto, model, tokens_entrada, tokens_cache, tokens_saida, latencia, duracao_geracao,
+                   streaming):
+        time.sleep(latencia)
+        if not streaming:
+            time.sleep(duracao_geracao)
+            return self._json(200, _corpo_resposta(texto, model, tokens_entrada, tokens_cache, tokens_saida))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        n_trechos = max(1, min(20, len(texto) // 40))
+        tamanho = math.ceil(len(texto) / n_trechos)
+        for i in range(n_trechos):
+            trecho = texto[i * tamanho:(i + 1) * tamanho]
+            final = i == n_trechos - 1
+            evento = _corpo_resposta(trecho, model, tokens_entrada, tokens_cache, tokens_saida, final)
+            dados = f"data: {json.dumps(evento)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(dados):x}\r\n".encode("ascii") + dados + b"\r\n")
+            self.wfile.flush()
+            if not final:
+                time.sleep(duracao_geracao / n_trechos)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # o padrão (5) descarta conexões em rajadas de chamadas simultâneas
+
+
+class ServidorGeminiFalso:
+    """Servidor falso em uma thread própria; use como context manager ou ``iniciar``/``encerrar``."""
+
+    def __init__(self, config=None, host="127.0.0.1", porta=0):
+        self.config = config or ConfigServidorFalso()
+        self.estado = _Estado(self.config)
+        handler = type("Handler", (_Handler,), {"estado": self.estado})
+        self._servidor = _ServidorHTTP((host, porta), handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def estatisticas(self):
+        with self.estado.lock:
+            return {
+                "requisicoes": self.estado.requisicoes,
+                "erros_429": self.estado.erros_429,
+                "tokens_entrada": self.estado.tokens_entrada,
+                "tokens_saida": self.estado.tokens_saida,
+                "max_simultaneas": self.estado.max_ativas,
+            }
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+
+def main():
+    padrao = ConfigServidorFalso()
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API do Gemini.")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--semente", type=int, default=padrao.semente)
+    parser.add_argument("--latencia", default=padrao.latencia)
+    parser.add_argument("--tokens-saida", default=padrao.tokens_saida)
+    parser.add_argument("--tokens-por-s", type=float, default=padrao.tokens_por_s)
+    parser.add_argument("--prob-429", type=float, default=padrao.prob_429)
+    parser.add_argument("--rpm", type=int, default=padrao.rpm)
+    parser.add_argument("--capacidade", type=int, default=padrao.capacidade)
+    args = parser.parse_args()
+    config = ConfigServidorFalso(semente=args.semente, latencia=args.latencia, tokens_saida=args.tokens_saida,
+                                 tokens_por_s=args.tokens_por_s, prob_429=args.prob_429, rpm=args.rpm,
+                                 capacidade=args.capacidade)
+    servidor = ServidorGeminiFalso(config, porta=args.porta)
+    print(f"Servidor falso em {servidor.url} (use GEMINI_BASE_URL={servidor.url} e qualquer GEMINI_API_KEY).")
+    try:
+        servidor._servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
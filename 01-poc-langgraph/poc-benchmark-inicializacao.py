@@ -0,0 +1,133 @@
+# POC Benchmark de Inicialização
+# Mede o custo fixo de subir cada ponto de entrada (o que um agendador ou o
+# webhook do LMS paga a cada job curto): executa cada alvo várias vezes com
+# ``python -X importtime``, reportando o tempo de parede mediano, o tempo total
+# de imports e os pacotes mais pesados. Alvos "leves" (--help, consultas) não
+# podem carregar LangGraph, o SDK do Gemini nem o Tkinter; com --orcamento-ms,
+# o script sai com código 1 se algum alvo leve passar do orçamento.
+#
+# Uso:
+#   python poc-benchmark-inicializacao.py
+#   python poc-benchmark-inicializacao.py --repeticoes 10 --orcamento-ms 400
+#   python poc-benchmark-inicializacao.py --alvo lote-help --relatorio inicializacao.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Pacotes que só devem ser importados quando a correção de fato roda.
+PESADOS = ("langgraph", "langchain_core", "google.genai", "tkinter")
+
+ALVOS = [
+    {"nome": "lote-help", "argv": ["poc-correcao-lote-langgraph.py", "--help"], "leve": True},
+    {"nome": "distribuida-help", "argv": ["poc-correcao-distribuida-langgraph.py", "--help"], "leve": True},
+    {"nome": "leitura-help", "argv": ["poc-leitura-arquivos-langgraph.py", "--help"], "leve": True},
+    {"nome": "servico-help", "argv": ["poc-servico-correcao.py", "--help"], "leve": True},
+    {"nome": "painel-help", "argv": ["poc-painel-turma.py", "--help"], "leve": True},
+    {"nome": "import-lote", "argv": ["-c", "import correcao.lote"], "leve": True},
+    {"nome": "import-fila", "argv": ["-c", "import correcao.fila"], "leve": True},
+    # Referência: o que a primeira correção paga (LangGraph + grafo compilado).
+    {"nome": "montar-grafo", "argv": ["-c", "from correcao.grafo import obter_grafo; obter_grafo()"],
+     "leve": False},
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização dos pontos de entrada.")
+    parser.add_argument("--alvo", nargs="*", metavar="NOME", help="Mede só os alvos com esses nomes.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções medidas por alvo (padrão: 5).")
+    parser.add_argument("--top", type=int, default=5, help="Quantos pacotes mais pesados listar (padrão: 5).")
+    parser.add_argument("--orcamento-ms", type=float,
+                        help="Tempo de parede mediano máximo dos alvos leves; acima dele, sai com código 1.")
+    parser.add_argument("--relatorio", help="Arquivo JSON onde gravar o relatório completo.")
+    return parser.parse_args()
+
+
+def ler_importtime(stderr):
+    """Linhas de ``-X importtime`` como ``(modulo, proprio_us, cumulativo_us, profundidade)``."""
+    imports = []
+    for linha in stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        profundidade = (len(nome) - len(nome.lstrip()) - 1) // 2
+        imports.append((nome.strip(), int(proprio), int(cumulativo), profundidade))
+    return imports
+
+
+def executar(alvo):
+    """Uma execução do alvo: (tempo de parede em s, imports)."""
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", *alvo["argv"]],
+        cwd=DIRETORIO, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    duracao = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(f"Alvo {alvo['nome']} falhou:\n{processo.stderr[-2000:]}")
+    return duracao, ler_importtime(processo.stderr)
+
+
+def medir(alvo, repeticoes, top):
+    executar(alvo)  # aquecimento: compila os .pyc e popula o cache do sistema de arquivos
+    paredes, totais, imports = [], [], []
+    for _ in range(repeticoes):
+        duracao, imports = executar(alvo)
+        paredes.append(duracao * 1000)
+        totais.append(sum(proprio for _, proprio, _, _ in imports) / 1000)
+    raizes = [(nome, cumulativo / 1000) for nome, _, cumulativo, profundidade in imports if profundidade == 0]
+    nomes = {nome for nome, _, _, _ in imports}
+    return {
+        "nome": alvo["nome"],
+        "argv": alvo["argv"],
+        "leve": alvo["leve"],
+        "parede_ms": statistics.median(paredes),
+        "parede_min_ms": min(paredes),
+        "imports_ms": statistics.median(totais),
+        "modulos": len(nomes),
+        "mais_pesados": sorted(raizes, key=lambda r: r[1], reverse=True)[:top],
+        "pesados_carregados": [p for p in PESADOS if p in nomes],
+    }
+
+
+def main():
+    args = parse_args()
+    alvos = [a for a in ALVOS if not args.alvo or a["nome"] in args.alvo]
+
+    print("\n" + "=" * 80)
+    print("BENCHMARK DE INICIALIZAÇÃO (python -X importtime)")
+    print("=" * 80)
+    print(f"{'alvo':<20} {'parede (ms)':>11} {'imports (ms)':>12} {'módulos':>8}  pesados carregados")
+
+    medicoes, violacoes = [], []
+    for alvo in alvos:
+        m = medir(alvo, args.repeticoes, args.top)
+        medicoes.append(m)
+        print(f"{m['nome']:<20} {m['parede_ms']:>11.1f} {m['imports_ms']:>12.1f} {m['modulos']:>8}  "
+              f"{', '.join(m['pesados_carregados']) or '-'}")
+        print("    " + ", ".join(f"{nome} {ms:.1f}" for nome, ms in m["mais_pesados"]))
+        if m["leve"] and m["pesados_carregados"]:
+            violacoes.append(f"{m['nome']} carrega {', '.join(m['pesados_carregados'])}")
+        if m["leve"] and args.orcamento_ms is not None and m["parede_ms"] > args.orcamento_ms:
+            violacoes.append(f"{m['nome']} levou {m['parede_ms']:.0f} ms (orçamento: {args.orcamento_ms:.0f} ms)")
+
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "repeticoes": args.repeticoes, "orcamento_ms": args.orcamento_ms,
+                       "alvos": medicoes, "violacoes": violacoes}, f, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.relatorio}.")
+    print("=" * 80)
+    for v in violacoes:
+        print(f"FORA DO ORÇAMENTO: {v}")
+    if violacoes:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
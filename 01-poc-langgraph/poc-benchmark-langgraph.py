@@ -0,0 +1,163 @@
+# POC Benchmark da Correção em Lote (LangGraph)
+# Mede a correção em lote sem chave nem cota: sobe o servidor falso do Gemini
+# (correcao/servidor_falso.py), gera uma turma sintética (correcao/dados_sinteticos.py)
+# e executa poc-correcao-lote-langgraph.py contra ele em cenários reproduzíveis,
+# reportando submissões/s, latência p50/p95 por submissão e retries.
+#
+# Uso:
+#   python poc-benchmark-langgraph.py
+#   python poc-benchmark-langgraph.py --alunos 100 --exercicios 3 --cenario concorrencia-32 cota-rpm
+#   python poc-benchmark-langgraph.py --cenarios cenarios.json --relatorio benchmark.json
+#
+# Um arquivo de cenários é uma lista de objetos como:
+#   {"nome": "cota-rpm", "servidor": {"rpm": 120, "latencia": "fixa:0.2"},
+#    "args": ["--concorrencia", "16", "--rpm", "100"], "execucoes": 1}
+# Em "args", ``{tmp}`` é trocado pela pasta temporária do cenário.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import fields
+
+from correcao.dados_sinteticos import gerar_turma
+from correcao.metricas import distribuicao
+from correcao.servidor_falso import ConfigServidorFalso, ServidorGeminiFalso
+
+SCRIPT_LOTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poc-correcao-lote-langgraph.py")
+
+CENARIOS = [
+    {"nome": "concorrencia-1", "args": ["--concorrencia", "1"]},
+    {"nome": "concorrencia-8", "args": ["--concorrencia", "8"]},
+    {"nome": "concorrencia-32", "args": ["--concorrencia", "32"]},
+    {"nome": "erros-429", "servidor": {"prob_429": 0.1}, "args": ["--concorrencia", "8"]},
+    {"nome": "cota-rpm", "servidor": {"rpm": 120, "latencia": "fixa:0.2"}, "args": ["--concorrencia", "16"]},
+    {"nome": "cota-rpm-limitador", "servidor": {"rpm": 120, "latencia": "fixa:0.2"},
+     "args": ["--concorrencia", "16", "--rpm", "110"]},
+    {"nome": "saturacao-fixa-4", "servidor": {"capacidade": 16, "latencia": "fixa:0.3"},
+     "args": ["--concorrencia", "4"]},
+    {"nome": "saturacao-fixa-64", "servidor": {"capacidade": 16, "latencia": "fixa:0.3"},
+     "args": ["--concorrencia", "64"]},
+    {"nome": "saturacao-adaptativa", "servidor": {"capacidade": 16, "latencia": "fixa:0.3"},
+     "args": ["--concorrencia", "4", "--concorrencia-adaptativa", "64"]},
+    {"nome": "cota-rpm-adaptativa", "servidor": {"rpm": 120, "latencia": "fixa:0.2"},
+     "args": ["--concorrencia", "4", "--concorrencia-adaptativa", "64"]},
+    {"nome": "cache-quente", "args": ["--concorrencia", "8", "--cache", "{tmp}/cache.db"], "execucoes": 2},
+    {"nome": "cache-contexto", "args": ["--concorrencia", "8", "--cache-contexto"]},
+    {"nome": "deduplicacao", "args": ["--concorrencia", "8", "--deduplicar"]},
+    {"nome": "por-criterio", "args": ["--concorrencia", "8", "--por-criterio"]},
+    {"nome": "saida-estruturada", "args": ["--concorrencia", "8", "--saida-estruturada"]},
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark offline da correção em lote.")
+    parser.add_argument("--alunos", type=int, default=40, help="Alunos por exercício (padrão: 40).")
+    parser.add_argument("--exercicios", type=int, default=2, help="Número de exercícios (padrão: 2).")
+    parser.add_argument("--semente", type=int, default=0, help="Semente da turma e do servidor (padrão: 0).")
+    parser.add_argument("--cenarios", help="Arquivo JSON com a lista de cenários (padrão: os embutidos).")
+    parser.add_argument("--cenario", nargs="*", metavar="NOME", help="Executa só os cenários com esses nomes.")
+    parser.add_argument("--latencia", help="Distribuição de latência padrão do servidor (ex.: lognormal:0.6,0.4).")
+    parser.add_argument("--relatorio", help="Arquivo JSON onde gravar o relatório completo.")
+    return parser.parse_args()
+
+
+def _config_servidor(semente, padrao, sobrescritas):
+    nomes = {f.name for f in fields(ConfigServidorFalso)}
+    desconhecidas = set(sobrescritas) - nomes
+    if desconhecidas:
+        raise ValueError(f"Opções do servidor desconhecidas: {sorted(desconhecidas)}")
+    return ConfigServidorFalso(**{"semente": semente, **padrao, **sobrescritas})
+
+
+def _ler_jsonl(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def executar_cenario(cenario, turma, semente, padrao_servidor):
+    """Executa o cenário (uma ou mais vezes, com o mesmo servidor) e devolve as medições de cada execução."""
+    config = _config_servidor(semente, padrao_servidor, cenario.get("servidor", {}))
+    execucoes = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp, ServidorGeminiFalso(config) as servidor:
+        env = {**os.environ, "GEMINI_BASE_URL": servidor.url, "GEMINI_API_KEY": "chave-falsa"}
+        env.pop("CORRECAO_BACKEND", None)
+        args = [a.replace("{tmp}", tmp) for a in cenario.get("args", [])]
+        for i in range(cenario.get("execucoes", 1)):
+            saida = os.path.join(tmp, f"resultados-{i}.jsonl")
+            metricas = os.path.join(tmp, f"metricas-{i}.jsonl")
+            antes = servidor.estatisticas()
+            inicio = time.perf_counter()
+            processo = subprocess.run(
+                [sys.executable, SCRIPT_LOTE, turma, "--saida", saida, "--metricas", metricas, *args],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+            )
+            duracao = time.perf_counter() - inicio
+            if processo.returncode != 0:
+                raise RuntimeError(f"Cenário {cenario['nome']} falhou:\n{processo.stderr[-2000:]}")
+            depois = servidor.estatisticas()
+            resultados = _ler_jsonl(saida)
+            spans = _ler_jsonl(metricas)
+            llm = [s for s in spans if s["tipo"] == "llm"]
+            latencias = distribuicao([s["duracao_s"] for s in spans if s["tipo"] == "submissao"])
+            execucoes.append({
+                "execucao": i + 1,
+                "submissoes": len(resultados),
+                "erros": sum(1 for r in resultados if r.get("erro")),
+                "duracao_s": duracao,
+                "submissoes_por_s": len(resultados) / duracao if duracao else 0.0,
+                "latencia_submissao_s": latencias,
+                "chamadas_llm": len(llm),
+                "retries": sum(max(0, s.get("tentativas", 1) - 1) for s in llm),
+                "requisicoes_servidor": depois["requisicoes"] - antes["requisicoes"],
+                "erros_429": depois["erros_429"] - antes["erros_429"],
+                "max_simultaneas_servidor": depois["max_simultaneas"],
+            })
+    return {"nome": cenario["nome"], "servidor": vars(config), "args": cenario.get("args", []), "execucoes": execucoes}
+
+
+def main():
+    args = parse_args()
+    cenarios = CENARIOS
+    if args.cenarios:
+        with open(args.cenarios, encoding="utf-8") as f:
+            cenarios = json.load(f)
+    if args.cenario:
+        cenarios = [c for c in cenarios if c["nome"] in args.cenario]
+    padrao_servidor = {"latencia": args.latencia} if args.latencia else {}
+
+    print("\n" + "=" * 80)
+    print("BENCHMARK DA CORREÇÃO EM LOTE (SERVIDOR FALSO)")
+    print("=" * 80)
+
+    relatorio = {"alunos": args.alunos, "exercicios": args.exercicios, "semente": args.semente, "cenarios": []}
+    with tempfile.TemporaryDirectory(prefix="turma-") as turma:
+        resumo = gerar_turma(turma, alunos=args.alunos, exercicios=args.exercicios, semente=args.semente)
+        relatorio["turma"] = resumo
+        print(f"Turma sintética: {resumo['submissoes']} submissão(ões), {resumo['arquivos']} arquivo(s), "
+              f"variantes {resumo['variantes']}.")
+        print(f"{'cenário':<24} {'exec':>4} {'subm/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} "
+              f"{'chamadas':>8} {'retries':>7} {'429':>5} {'erros':>5}")
+        for cenario in cenarios:
+            resultado = executar_cenario(cenario, turma, args.semente, padrao_servidor)
+            relatorio["cenarios"].append(resultado)
+            for e in resultado["execucoes"]:
+                lat = e["latencia_submissao_s"]
+                print(f"{resultado['nome']:<24} {e['execucao']:>4} {e['submissoes_por_s']:>8.2f} "
+                      f"{lat['p50']:>8.3f} {lat['p95']:>8.3f} {e['chamadas_llm']:>8} {e['retries']:>7} "
+                      f"{e['erros_429']:>5} {e['erros']:>5}")
+
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.relatorio}.")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
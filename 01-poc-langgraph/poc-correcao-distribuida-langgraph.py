@@ -0,0 +1,256 @@
+# POC Correção Distribuída (LangGraph)
+# Divide a correção em lote entre vários processos, em uma ou mais máquinas,
+# para usar todos os núcleos: o pré-processamento do Java, a análise estática
+# e o pós-processamento são CPU e disputam o GIL quando tudo roda em um só
+# interpretador. Um coordenador põe as submissões em uma fila durável
+# (SQLite, correcao/fila.py); cada trabalhador reivindica tarefas com
+# concessão por tempo limitado, executa o grafo e grava o resultado na fila.
+# Se um trabalhador morrer, as concessões dele vencem e outro assume.
+#
+# Uso (uma máquina, 4 processos):
+#   python poc-correcao-distribuida-langgraph.py executar ../02-dados-teste --fila turma.fila.db --processos 4
+# Várias máquinas com a pasta da turma compartilhada:
+#   python poc-correcao-distribuida-langgraph.py enfileirar /mnt/turma --fila /mnt/turma/fila.db --pre-analise
+#   python poc-correcao-distribuida-langgraph.py trabalhar --fila /mnt/turma/fila.db --raiz /mnt/turma   # em cada máquina
+#   python poc-correcao-distribuida-langgraph.py status --fila /mnt/turma/fila.db
+#   python poc-correcao-distribuida-langgraph.py exportar --fila /mnt/turma/fila.db --saida resultados.jsonl
+#   python poc-correcao-distribuida-langgraph.py exportar --fila /mnt/turma/fila.db --armazem turma.db
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+
+from correcao.armazem import ArmazemResultados
+from correcao.cache import configurar_cache
+from correcao.concorrencia import configurar_concorrencia, formatar_estatisticas
+from correcao.execucao_java import PoolJVM
+from correcao.fila import FilaTrabalho, trabalhar
+from correcao.grafo import obter_grafo
+from correcao.limite_taxa import configurar_limitador
+from correcao.lote import descobrir_submissoes
+from correcao.metricas import configurar_metricas, formatar_resumo
+
+
+def _opcoes_grafo(parser):
+    grupo = parser.add_argument_group("correção (gravadas na fila e usadas por todos os trabalhadores)")
+    grupo.add_argument("--pre-analise", action="store_true",
+                       help="Executa a análise estática antes da LLM (usa regras_exercicio.json, se houver).")
+    grupo.add_argument("--testes", action="store_true",
+                       help="Compila e roda os testes do professor (pasta testes/ ao lado do enunciado).")
+    grupo.add_argument("--saida-estruturada", action="store_true",
+                       help="Pede a avaliação em JSON com schema fixo.")
+    grupo.add_argument("--por-criterio", nargs="*", metavar="CRITERIO",
+                       help="Avalia cada critério em um nó próprio (sem nomes: todos os critérios).")
+    grupo.add_argument("--orcamento-tokens", type=int, metavar="TOKENS",
+                       help="Empacota o código do aluno em até TOKENS tokens.")
+    grupo.add_argument("--prazo-submissao", type=float, metavar="SEGUNDOS",
+                       help="Prazo de cada submissão para as chamadas à LLM, incluindo retentativas.")
+
+
+def _opcoes_trabalhador(parser):
+    grupo = parser.add_argument_group("trabalhador")
+    grupo.add_argument("--concorrencia", type=int, default=8,
+                       help="Submissões em andamento por processo (padrão: 8).")
+    grupo.add_argument("--concorrencia-adaptativa", type=int, nargs="?", const=64, metavar="MAX",
+                       help="Ajusta as submissões em andamento de cada processo entre 1 e MAX (padrão: 64), "
+                            "começando em --concorrencia, pela latência da LLM e pelos 429.")
+    grupo.add_argument("--concessao", type=float, default=120.0, metavar="SEGUNDOS",
+                       help="Duração da concessão de cada tarefa; renovada enquanto o trabalhador vive (padrão: 120).")
+    grupo.add_argument("--cache", help="Arquivo SQLite do cache de respostas (pode ser compartilhado).")
+    grupo.add_argument("--rpm", type=int, help="Cota de requisições por minuto, somando todos os processos.")
+    grupo.add_argument("--tpm", type=int, default=1_000_000,
+                       help="Cota de tokens por minuto usada junto com --rpm (padrão: 1000000).")
+    grupo.add_argument("--limite-arquivo",
+                       help="Arquivo SQLite do limitador compartilhado (padrão com --rpm: <fila>.limite.db).")
+    grupo.add_argument("--jvms", type=int, default=2, help="Pool de JVMs por processo para --testes (padrão: 2).")
+    grupo.add_argument("--metricas", nargs="?", const="", metavar="ARQUIVO",
+                       help="Mede latência, tokens e custo; com ARQUIVO, grava o log JSON "
+                            "(com vários processos, um arquivo por trabalhador: ARQUIVO.<id>).")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Correção distribuída de exercícios Java com LangGraph + Gemini.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    enfileirar = comandos.add_parser("enfileirar", help="Descobre as submissões e as põe na fila.")
+    enfileirar.add_argument("raiz", help="Pasta com as submissões (uma subpasta por aluno/caso).")
+    enfileirar.add_argument("--fila", required=True, help="Arquivo SQLite da fila.")
+    enfileirar.add_argument("--reabrir-erros", action="store_true",
+                            help="Devolve à fila as submissões que terminaram com erro.")
+    _opcoes_grafo(enfileirar)
+
+    trabalhador = comandos.add_parser("trabalhar", help="Processa tarefas da fila até ela esvaziar.")
+    trabalhador.add_argument("--fila", required=True, help="Arquivo SQLite da fila.")
+    trabalhador.add_argument("--raiz", help="Onde a pasta da turma está montada nesta máquina "
+                                            "(padrão: a usada ao enfileirar).")
+    trabalhador.add_argument("--id", help="Identificador do trabalhador (padrão: máquina:pid).")
+    _opcoes_trabalhador(trabalhador)
+
+    executar = comandos.add_parser("executar", help="Enfileira e corrige com vários processos nesta máquina.")
+    executar.add_argument("raiz", help="Pasta com as submissões (uma subpasta por aluno/caso).")
+    executar.add_argument("--fila", required=True, help="Arquivo SQLite da fila.")
+    executar.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                          help="Processos trabalhadores (padrão: número de CPUs).")
+    executar.add_argument("--reabrir-erros", action="store_true",
+                          help="Devolve à fila as submissões que terminaram com erro.")
+    executar.add_argument("--saida", help="Arquivo JSONL onde gravar um resultado por linha no fim.")
+    executar.add_argument("--armazem", help="Arquivo SQLite do armazém de resultados, carregado no fim.")
+    _opcoes_grafo(executar)
+    _opcoes_trabalhador(executar)
+
+    status = comandos.add_parser("status", help="Mostra o andamento da fila.")
+    status.add_argument("--fila", required=True, help="Arquivo SQLite da fila.")
+
+    exportar = comandos.add_parser("exportar", help="Grava os resultados da fila em JSONL e/ou no armazém.")
+    exportar.add_argument("--fila", required=True, help="Arquivo SQLite da fila.")
+    exportar.add_argument("--saida", help="Arquivo JSONL de saída.")
+    exportar.add_argument("--armazem", help="Arquivo SQLite do armazém de resultados (relatórios da turma).")
+    return parser.parse_args()
+
+
+def cmd_enfileirar(args, fila):
+    submissoes = descobrir_submissoes(args.raiz)
+    opcoes = {
+        "pre_analise": args.pre_analise, "testes": args.testes, "saida_estruturada": args.saida_estruturada,
+        "criterios": args.por_criterio, "orcamento_tokens": args.orcamento_tokens,
+        "prazo_s": args.prazo_submissao,
+    }
+    novas = fila.enfileirar(submissoes, args.raiz, opcoes)
+    reabertas = fila.reabrir_erros() if args.reabrir_erros else 0
+    print(f"{len(submissoes)} submissão(ões) em {args.raiz}: {novas} nova(s) na fila"
+          f"{f', {reabertas} reaberta(s)' if reabertas else ''}.")
+
+
+def cmd_trabalhar(args, fila):
+    trabalhador = args.id or f"{socket.gethostname()}:{os.getpid()}"
+    opcoes = fila.meta("opcoes", {})
+    if args.cache:
+        configurar_cache(args.cache)
+    if args.rpm:
+        configurar_limitador(args.rpm, args.tpm, caminho=args.limite_arquivo or f"{args.fila}.limite.db")
+    concorrencia_adaptativa = None
+    if args.concorrencia_adaptativa:
+        concorrencia_adaptativa = configurar_concorrencia(args.concorrencia, maximo=args.concorrencia_adaptativa)
+    coletor = None
+    if args.metricas is not None:
+        coletor = configurar_metricas(args.metricas or None)
+    pool_jvm = PoolJVM(tamanho=args.jvms) if opcoes.get("testes") else None
+
+    def ao_concluir(resultado, gravado):
+        status = "ERRO" if resultado.erro else "OK"
+        descartado = "" if gravado else " [descartado: concessão perdida]"
+        print(f"[{status}] {trabalhador} {resultado.id} ({resultado.duracao_s:.2f}s){descartado}", flush=True)
+
+    inicio = time.perf_counter()
+    try:
+        app = obter_grafo(pre_analise=opcoes.get("pre_analise", False), pool_jvm=pool_jvm,
+                            saida_estruturada=opcoes.get("saida_estruturada", False),
+                            criterios=opcoes.get("criterios"), orcamento_tokens=opcoes.get("orcamento_tokens"))
+        gravados = asyncio.run(trabalhar(app, fila, trabalhador, args.concorrencia, args.concessao,
+                                         opcoes.get("prazo_s"), args.raiz, ao_concluir,
+                                         limitador=concorrencia_adaptativa))
+    finally:
+        if pool_jvm is not None:
+            pool_jvm.encerrar()
+        if coletor is not None:
+            coletor.fechar()
+    print(f"Trabalhador {trabalhador}: {gravados} resultado(s) gravado(s) em {time.perf_counter() - inicio:.2f}s.")
+    if concorrencia_adaptativa is not None:
+        print(formatar_estatisticas(concorrencia_adaptativa.estatisticas()))
+    if coletor is not None:
+        print(formatar_resumo(coletor.resumo()))
+
+
+def cmd_status(args, fila):
+    contagem = fila.contagem()
+    total = sum(contagem.values())
+    print(f"{total} tarefa(s): " + ", ".join(f"{n} {estado}" for estado, n in contagem.items()) + ".")
+    for trabalhador, n in sorted(fila.trabalhadores().items()):
+        print(f"  {trabalhador}: {n} em andamento")
+
+
+def cmd_exportar(args, fila):
+    resultados = fila.resultados()
+    erros = sum(1 for r in resultados if r.erro)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            for resultado in resultados:
+                f.write(json.dumps(asdict(resultado), ensure_ascii=False) + "\n")
+        print(f"{len(resultados)} resultado(s) gravado(s) em {args.saida} ({erros} com erro).")
+    if args.armazem:
+        armazem = ArmazemResultados(args.armazem)
+        try:
+            armazem.registrar_varios(resultados, fila.submissoes())
+        finally:
+            armazem.close()
+        print(f"{len(resultados)} resultado(s) carregado(s) no armazém {args.armazem} "
+              f"(execução {armazem.execucao}).")
+
+
+def _argumentos_trabalhador(args, indice):
+    """Repassa as opções de ``executar`` para um subprocesso ``trabalhar``."""
+    argv = ["trabalhar", "--fila", args.fila, "--concorrencia", str(args.concorrencia),
+            "--concessao", str(args.concessao), "--jvms", str(args.jvms),
+            "--id", f"{socket.gethostname()}:{os.getpid()}:{indice}"]
+    if args.concorrencia_adaptativa:
+        argv += ["--concorrencia-adaptativa", str(args.concorrencia_adaptativa)]
+    if args.cache:
+        argv += ["--cache", args.cache]
+    if args.rpm:
+        argv += ["--rpm", str(args.rpm), "--tpm", str(args.tpm)]
+        if args.limite_arquivo:
+            argv += ["--limite-arquivo", args.limite_arquivo]
+    if args.metricas is not None:
+        argv += ["--metricas"] + ([f"{args.metricas}.{indice}"] if args.metricas else [])
+    return argv
+
+
+def cmd_executar(args, fila):
+    cmd_enfileirar(args, fila)
+    if args.rpm and not args.limite_arquivo and os.path.exists(f"{args.fila}.limite.db"):
+        os.remove(f"{args.fila}.limite.db")  # baldes de uma execução anterior
+    print(f"Iniciando {args.processos} trabalhador(es) (concorrência {args.concorrencia} cada).")
+    inicio = time.perf_counter()
+    processos = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), *_argumentos_trabalhador(args, i)])
+        for i in range(args.processos)
+    ]
+    try:
+        while any(p.poll() is None for p in processos):
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        for p in processos:
+            p.terminate()
+        raise
+    falhos = [p.returncode for p in processos if p.returncode != 0]
+    if falhos:
+        print(f"Aviso: {len(falhos)} trabalhador(es) terminaram com erro (códigos {falhos}).")
+    duracao = time.perf_counter() - inicio
+
+    print("\n" + "=" * 80)
+    contagem = fila.contagem()
+    print(f"FIM DA CORREÇÃO DISTRIBUÍDA: {contagem['concluida']} ok, {contagem['erro']} com erro, "
+          f"{contagem['pendente'] + contagem['em_andamento']} sem resultado, {duracao:.2f}s no total.")
+    if args.saida or args.armazem:
+        cmd_exportar(args, fila)
+    print("=" * 80)
+
+
+def main():
+    args = parse_args()
+    fila = FilaTrabalho(args.fila)
+    try:
+        {"enfileirar": cmd_enfileirar, "trabalhar": cmd_trabalhar, "executar": cmd_executar,
+         "status": cmd_status, "exportar": cmd_exportar}[args.comando](args, fila)
+    finally:
+        fila.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# POC Correção em Lote (LangGraph)
+# Corrige, sem interface gráfica, todas as submissões encontradas em uma pasta
+# (layout de 02-dados-teste/casoN/), executando o grafo com concorrência limitada.
+#
+# Uso:
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --concorrencia 8 --saida resultados.jsonl
+#   python poc-correcao-lote-langgraph.py export_lms.zip --enunciado exercicio01/enunciado_exercicio.txt
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --cache cache_respostas.db
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --rpm 15 --tpm 250000
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --concorrencia 4 --concorrencia-adaptativa 64
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --cache-contexto
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --por-criterio encapsulamento logica
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --cascata gemini-2.5-flash-lite,gemini-2.5-flash:100
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --orcamento-tokens 8000
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --incremental turma.manifesto.json
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --prazo-submissao 300 --max-tentativas 8
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --armazem turma.db   (relatórios: poc-painel-turma.py)
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --modo-batch gemini
+#   python poc-correcao-lote-langgraph.py ../02-dados-teste --metricas metricas.jsonl --spans-otlp spans.jsonl
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+
+from correcao.armazem import ArmazemResultados
+from correcao.batch import BackendGemini, BackendLocal, corrigir_lote_batch
+from correcao.cache import configurar_cache
+from correcao.cache_contexto import configurar_cache_contexto
+from correcao.cascata import RoteadorCascata, niveis_de_texto
+from correcao.concorrencia import configurar_concorrencia, formatar_estatisticas
+from correcao.config import MAX_RETRIES
+from correcao.execucao_java import PoolJVM
+from correcao.grafo import obter_grafo
+from correcao.incremental import ManifestoIncremental, impressao_configuracao
+from correcao.ingestao import ErroIngestao, eh_pacote, ler_pacote
+from correcao.limite_taxa import configurar_limitador
+from correcao.metricas import configurar_metricas, formatar_resumo
+from correcao.retentativas import configurar_retentativas
+from correcao.retomada import ManifestoExecucao, abrir_checkpointer
+from correcao.lote import (
+    corrigir_fluxo,
+    corrigir_lote,
+    deduplicar_submissoes,
+    descobrir_submissoes,
+    replicar_resultados,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Correção em lote de exercícios Java com LangGraph + Gemini.")
+    parser.add_argument("raiz", help="Pasta com as submissões (uma subpasta por aluno/caso) ou pacote "
+                                     ".zip/.tar(.gz) exportado do LMS, lido sem extrair.")
+    parser.add_argument("--enunciado",
+                        help="Enunciado em disco para as submissões de um pacote que não traz o seu "
+                             "(testes/ e modelo/ ao lado dele também são usados).")
+    parser.add_argument("--concorrencia", type=int, default=8,
+                        help="Máximo de submissões sendo corrigidas ao mesmo tempo (padrão: 8).")
+    parser.add_argument("--concorrencia-adaptativa", type=int, nargs="?", const=64, metavar="MAX",
+                        help="Ajusta o número de submissões simultâneas durante a execução, entre 1 e MAX "
+                             "(padrão: 64), começando em --concorrencia: cresce enquanto a latência da LLM "
+                             "fica estável e cai rápido com 429 ou latência em alta.")
+    parser.add_argument("--saida", help="Arquivo JSONL onde gravar um resultado por linha.")
+    parser.add_argument("--armazem", help="Arquivo SQLite do armazém de resultados, para os relatórios da turma.")
+    parser.add_argument("--execucao", help="Nome desta execução no armazém (padrão: data e hora).")
+    parser.add_argument("--cache", help="Arquivo SQLite do cache de respostas (reaproveita correções idênticas).")
+    parser.add_argument("--cache-ttl-horas", type=float, help="Validade das respostas em cache, em horas.")
+    parser.add_argument("--cache-max-entradas", type=int, help="Máximo de respostas mantidas no cache.")
+    parser.add_argument("--cache-contexto", action="store_true",
+                        help="Guarda system instruction + enunciado no cache de contexto do Gemini "
+                             "e envia só o código de cada aluno.")
+    parser.add_argument("--cache-contexto-ttl-min", type=float, default=60.0,
+                        help="Validade das entradas do cache de contexto, em minutos (padrão: 60).")
+    parser.add_argument("--rpm", type=int, help="Cota de requisições por minuto (ativa o limitador de taxa).")
+    parser.add_argument("--tpm", type=int, default=1_000_000,
+                        help="Cota de tokens por minuto usada junto com --rpm (padrão: 1000000).")
+    parser.add_argument("--limite-arquivo",
+                        help="Arquivo SQLite para compartilhar o limitador entre vários processos.")
+    parser.add_argument("--pre-analise", action="store_true",
+                        help="Executa a análise estática antes da LLM (usa regras_exercicio.json, se houver).")
+    parser.add_argument("--testes", action="store_true",
+                        help="Compila e roda os testes do professor (pasta testes/ ao lado do enunciado).")
+    parser.add_argument("--jvms", type=int, default=2, help="Tamanho do pool de JVMs para --testes (padrão: 2).")
+    parser.add_argument("--saida-estruturada", action="store_true",
+                        help="Pede à LLM uma resposta JSON tipada (veredito, justificativa, sugestões, notas).")
+    parser.add_argument("--por-criterio", nargs="*", metavar="CRITERIO",
+                        help="Corrige cada critério em um nó próprio, em paralelo, e consolida o resultado "
+                             "(sem nomes = todos: encapsulamento, compilacao, logica, estilo).")
+    parser.add_argument("--cascata", nargs="?", const="gemini-2.5-flash-lite,gemini-2.5-flash",
+                        metavar="MODELO[:ORCAMENTO],...",
+                        help="Corrige com o modelo mais barato e só escala os casos incertos para os "
+                             "seguintes (padrão: gemini-2.5-flash-lite,gemini-2.5-flash; ORCAMENTO = "
+                             "máximo de chamadas do nível).")
+    parser.add_argument("--limiar-confianca", type=float, default=0.7,
+                        help="Confiança mínima para aceitar o veredito de um nível da cascata (padrão: 0.7).")
+    parser.add_argument("--orcamento-tokens", type=int, metavar="TOKENS",
+                        help="Máximo de tokens de código por prompt: ignora código gerado e arquivos iguais ao "
+                             "modelo do professor (pasta modelo/), resume os menos relevantes às assinaturas e, "
+                             "se ainda não couber, analisa o código em partes antes da correção.")
+    parser.add_argument("--incremental", metavar="MANIFESTO",
+                        help="Arquivo JSON com os hashes das entradas e o resultado de cada submissão: "
+                             "uma nova execução só corrige as submissões cujos arquivos, enunciado, "
+                             "prompts ou modelos mudaram e reaproveita as demais.")
+    parser.add_argument("--prazo-submissao", type=float, metavar="SEGUNDOS",
+                        help="Prazo de cada submissão para as chamadas à LLM, incluindo retentativas.")
+    parser.add_argument("--max-tentativas", type=int, default=MAX_RETRIES,
+                        help=f"Tentativas por chamada à LLM em falhas transitórias (padrão: {MAX_RETRIES}).")
+    parser.add_argument("--timeout-chamada", type=float, default=120.0,
+                        help="Timeout de cada tentativa de chamada à LLM, em segundos (padrão: 120).")
+    parser.add_argument("--disjuntor-falhas", type=int, default=5,
+                        help="Falhas transitórias seguidas que pausam as chamadas à API (0 desliga; padrão: 5).")
+    parser.add_argument("--disjuntor-pausa", type=float, default=30.0,
+                        help="Duração da pausa do disjuntor, em segundos (padrão: 30).")
+    parser.add_argument("--checkpoint",
+                        help="Arquivo SQLite de checkpoints: uma nova execução pula as submissões já "
+                             "concluídas e retoma as que falharam a partir do último nó concluído.")
+    parser.add_argument("--manifesto",
+                        help="Arquivo JSON com o andamento de cada submissão (padrão: <checkpoint>.manifesto.json).")
+    parser.add_argument("--deduplicar", action="store_true",
+                        help="Corrige uma vez cada solução distinta (a menos de comentários e formatação) e "
+                             "replica o feedback; cópias com nomes trocados só são apontadas como suspeitas.")
+    parser.add_argument("--limiar-similaridade", type=float, default=0.8,
+                        help="Similaridade (Jaccard) a partir da qual pares são reportados como suspeitos (padrão: 0.8).")
+    parser.add_argument("--relatorio-similaridade", help="Arquivo JSON para gravar grupos e pares suspeitos.")
+    parser.add_argument("--metricas", nargs="?", const="", metavar="ARQUIVO",
+                        help="Mede latência, tokens e custo por nó e chamada à LLM e mostra o resumo no fim; "
+                             "com ARQUIVO, grava também um log JSON (uma linha por medição).")
+    parser.add_argument("--spans-otlp", metavar="ARQUIVO",
+                        help="Grava as medições como spans OpenTelemetry (OTLP/JSON, uma requisição por linha).")
+    parser.add_argument("--modo-batch", choices=["gemini", "local"],
+                        help="Envia todos os prompts em um único job da Batch API "
+                             "('local' usa um substituto offline, para testes).")
+    parser.add_argument("--batch-intervalo", type=float, default=30.0,
+                        help="Intervalo, em segundos, entre consultas ao estado do job (padrão: 30).")
+    args = parser.parse_args()
+    if args.modo_batch:
+        # O job da Batch API só faz a correção simples (com --orcamento-tokens); o resto precisa do grafo
+        # ou das chamadas síncronas (checkpoints, cache de contexto, concorrência e prazo por submissão).
+        incompativeis = [opcao for opcao, ativa in (
+            ("--pre-analise", args.pre_analise), ("--testes", args.testes),
+            ("--saida-estruturada", args.saida_estruturada), ("--por-criterio", args.por_criterio is not None),
+            ("--cascata", args.cascata), ("--checkpoint", args.checkpoint), ("--cache-contexto", args.cache_contexto),
+            ("--concorrencia-adaptativa", args.concorrencia_adaptativa), ("--prazo-submissao", args.prazo_submissao),
+        ) if ativa]
+        if incompativeis:
+            parser.error(f"--modo-batch não suporta {', '.join(incompativeis)}.")
+    return args
+
+
+async def corrigir_com_grafo(args, submissoes, ao_concluir, cascata=None, corrigir=corrigir_lote, limitador=None,
+                             configuracao=""):
+    """Monta o grafo (com checkpointer, se pedido) e corrige o lote com ``corrigir``.
+
+    ``configuracao`` (``impressao_configuracao``) separa nos checkpoints as execuções com opções diferentes.
+    """
+    pool_jvm = PoolJVM(tamanho=args.jvms) if args.testes else None
+    opcoes = dict(pre_analise=args.pre_analise, pool_jvm=pool_jvm, saida_estruturada=args.saida_estruturada,
+                  criterios=args.por_criterio, cascata=cascata, orcamento_tokens=args.orcamento_tokens)
+    try:
+        if not args.checkpoint:
+            app = obter_grafo(**opcoes)
+            return await corrigir(app, submissoes, args.concorrencia, ao_concluir, prazo_s=args.prazo_submissao,
+                                  limitador=limitador)
+        manifesto = ManifestoExecucao(args.manifesto or f"{args.checkpoint}.manifesto.json")
+        if manifesto.submissoes:
+            print(f"Retomando execução anterior: {manifesto.resumo()}")
+        try:
+            async with abrir_checkpointer(args.checkpoint) as checkpointer:
+                app = obter_grafo(checkpointer=checkpointer, **opcoes)
+                return await corrigir(app, submissoes, args.concorrencia, ao_concluir, manifesto,
+                                      args.prazo_submissao, limitador=limitador, configuracao=configuracao)
+        finally:
+            manifesto.salvar()
+    finally:
+        if pool_jvm is not None:
+            pool_jvm.encerrar()
+
+
+def _avisar_conversoes(submissoes):
+    """Repassa as submissões do pacote, avisando dos arquivos convertidos para UTF-8 ou ignorados."""
+    for submissao in submissoes:
+        if submissao.codificacoes:
+            convertidos = ", ".join(f"{n} ({c})" for n, c in submissao.codificacoes.items())
+            print(f"Aviso: {submissao.id}: {convertidos} convertido(s) para UTF-8.")
+        if submissao.ignorados:
+            print(f"Aviso: {submissao.id}: {len(submissao.ignorados)} arquivo(s) binário(s) ignorado(s).")
+        yield submissao
+
+
+def main():
+    args = parse_args()
+    if args.concorrencia_adaptativa:
+        concorrencia = f"adaptativa, de {args.concorrencia} até {args.concorrencia_adaptativa}"
+    else:
+        concorrencia = f"concorrência máxima: {args.concorrencia}"
+
+    print("\n" + "=" * 80)
+    print("INÍCIO DA EXECUÇÃO DO LANGGRAPH: CORREÇÃO EM LOTE")
+    print("=" * 80)
+
+    pacote = os.path.isfile(args.raiz) and eh_pacote(args.raiz)
+    if pacote:
+        # Submissões lidas sob demanda: nada de listas do tamanho da turma.
+        if args.incremental or args.deduplicar or args.modo_batch:
+            sys.exit("--incremental, --deduplicar e --modo-batch precisam da turma em pastas, não de um pacote.")
+        try:
+            submissoes = _avisar_conversoes(ler_pacote(args.raiz, args.enunciado))
+        except ErroIngestao as e:
+            sys.exit(str(e))
+        print(f"Lendo as submissões de {args.raiz} sob demanda ({concorrencia}).")
+        por_id = {}
+    else:
+        submissoes = descobrir_submissoes(args.raiz)
+        print(f"{len(submissoes)} submissão(ões) encontrada(s) em {args.raiz} ({concorrencia}).")
+        if not submissoes:
+            return
+        ordem = {s.id: i for i, s in enumerate(submissoes)}
+        por_id = {s.id: s for s in submissoes}
+    configuracao = impressao_configuracao(
+        saida_estruturada=args.saida_estruturada, criterios=args.por_criterio,
+        cascata=[n.model_name for n in niveis_de_texto(args.cascata)] if args.cascata else None,
+        pre_analise=args.pre_analise, testes=args.testes, orcamento_tokens=args.orcamento_tokens,
+    )
+    incremental, impressoes, reaproveitados = None, {}, []
+    if args.incremental:
+        incremental = ManifestoIncremental(args.incremental)
+        submissoes, reaproveitados, impressoes, motivos = incremental.calcular_pendentes(submissoes, configuracao)
+        detalhes = ", ".join(f"{n} {motivo}" for motivo, n in sorted(motivos.items()))
+        print(f"Incremental: {len(submissoes)} submissão(ões) a corrigir"
+              f"{f' ({detalhes})' if detalhes else ''}, {len(reaproveitados)} reaproveitada(s).")
+
+    todas = submissoes
+    agrupamento = None
+    if args.deduplicar:
+        submissoes, agrupamento = deduplicar_submissoes(todas, args.limiar_similaridade)
+        print(f"Deduplicação: {len(submissoes)} solução(ões) distinta(s) para corrigir; "
+              f"{len(agrupamento.grupos_canonicos)} grupo(s) de cópias com nomes trocados, "
+              f"{len(agrupamento.pares_similares)} par(es) com similaridade >= {args.limiar_similaridade:.0%}.")
+        for a, b, jaccard in agrupamento.pares_similares[:10]:
+            print(f"  Suspeita de plágio: {a} <-> {b} ({jaccard:.0%})")
+        if args.relatorio_similaridade:
+            with open(args.relatorio_similaridade, "w", encoding="utf-8") as f:
+                json.dump({
+                    "grupos_canonicos": agrupamento.grupos_canonicos,
+                    "pares_similares": [{"a": a, "b": b, "jaccard": j} for a, b, j in agrupamento.pares_similares],
+                }, f, ensure_ascii=False, indent=2)
+
+    cache = None
+    if args.cache:
+        ttl_s = args.cache_ttl_horas * 3600 if args.cache_ttl_horas else None
+        cache = configurar_cache(args.cache, ttl_s=ttl_s, max_entradas=args.cache_max_entradas)
+
+    limitador = None
+    if args.rpm:
+        limitador = configurar_limitador(args.rpm, args.tpm, caminho=args.limite_arquivo)
+
+    concorrencia_adaptativa = None
+    if args.concorrencia_adaptativa:
+        concorrencia_adaptativa = configurar_concorrencia(args.concorrencia, maximo=args.concorrencia_adaptativa)
+
+    _, disjuntor = configurar_retentativas(args.max_tentativas, timeout_s=args.timeout_chamada,
+                                           limiar_falhas=args.disjuntor_falhas or None,
+                                           aberto_s=args.disjuntor_pausa)
+
+    gerenciador_contexto = None
+    if args.cache_contexto:
+        gerenciador_contexto = configurar_cache_contexto(ttl_s=int(args.cache_contexto_ttl_min * 60))
+
+    cascata = None
+    if args.cascata:
+        cascata = RoteadorCascata(niveis_de_texto(args.cascata), limiar_confianca=args.limiar_confianca)
+
+    coletor = None
+    if args.metricas is not None or args.spans_otlp:
+        coletor = configurar_metricas(args.metricas or None, args.spans_otlp)
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else None
+    armazem = ArmazemResultados(args.armazem, args.execucao) if args.armazem else None
+
+    def ao_concluir(resultado):
+        status = "ERRO" if resultado.erro else ("RETOMADA" if resultado.retomada else "OK")
+        print(f"[{status}] {resultado.id} ({resultado.duracao_s:.2f}s)")
+        if pacote and resultado.erro:
+            print(f"  {resultado.erro}")  # sem a lista final de resultados, o erro sai aqui
+        if saida is not None:
+            saida.write(json.dumps(asdict(resultado), ensure_ascii=False) + "\n")
+            saida.flush()
+        if armazem is not None:
+            armazem.registrar(resultado, por_id.get(resultado.id))
+        if incremental is not None and resultado.id in impressoes:
+            incremental.registrar(resultado, impressoes[resultado.id])
+
+    inicio = time.perf_counter()
+    try:
+        for resultado in reaproveitados:
+            ao_concluir(resultado)
+        if pacote:
+            corrigidas, com_erro = asyncio.run(
+                corrigir_com_grafo(args, submissoes, ao_concluir, cascata, corrigir_fluxo, concorrencia_adaptativa,
+                                   configuracao))
+            resultados = []
+        elif not submissoes:
+            resultados = []
+        elif args.modo_batch:
+            backend = BackendGemini() if args.modo_batch == "gemini" else BackendLocal()
+            resultados = corrigir_lote_batch(submissoes, backend, intervalo_s=args.batch_intervalo,
+                                             orcamento_tokens=args.orcamento_tokens)
+            for resultado in resultados:
+                ao_concluir(resultado)
+        else:
+            resultados = asyncio.run(
+                corrigir_com_grafo(args, submissoes, ao_concluir, cascata, limitador=concorrencia_adaptativa,
+                                   configuracao=configuracao))
+        if agrupamento is not None:
+            resultados = replicar_resultados(resultados, todas, agrupamento)
+            for resultado in resultados:
+                if resultado.representante is not None:
+                    ao_concluir(resultado)
+        if not pacote:
+            resultados = sorted(reaproveitados + resultados, key=lambda r: ordem[r.id])
+            com_erro = sum(1 for r in resultados if r.erro)
+            corrigidas = len(resultados) - com_erro
+    finally:
+        if incremental is not None:
+            incremental.salvar()
+        if saida is not None:
+            saida.close()
+        if armazem is not None:
+            armazem.close()
+        if gerenciador_contexto is not None:
+            gerenciador_contexto.encerrar()
+        if coletor is not None:
+            coletor.fechar()
+    duracao = time.perf_counter() - inicio
+
+    for resultado in resultados:
+        print("\n" + "=" * 80)
+        print(f"RESULTADO - {resultado.id}")
+        print("-" * 80)
+        print(resultado.erro or resultado.feedback_bruto)
+
+    print("\n" + "=" * 80)
+    print(f"FIM DA CORREÇÃO EM LOTE: {corrigidas} ok, {com_erro} com erro, {duracao:.2f}s no total.")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"(taxa de acerto {stats['hit_rate']:.0%}, {stats['entradas']} entradas).")
+    if gerenciador_contexto is not None:
+        print(f"Cache de contexto: {gerenciador_contexto.criados} entrada(s) criada(s), "
+              f"{gerenciador_contexto.reutilizados} reutilização(ões).")
+    if cascata is not None:
+        print("Cascata de modelos:")
+        for nivel in cascata.relatorio():
+            restante = "" if nivel["orcamento_restante"] is None else f", orçamento restante {nivel['orcamento_restante']}"
+            print(f"  [{nivel['nivel']}] {nivel['modelo']}: {nivel['chamadas']} chamada(s), "
+                  f"{nivel['finalizadas']} finalizada(s) ({nivel['fracao_trafego']:.0%}), "
+                  f"{nivel['escaladas']} escalada(s){restante}.")
+    if limitador is not None:
+        print(f"Limitador de taxa: {limitador.espera_total_s:.2f}s de espera acumulada.")
+    if concorrencia_adaptativa is not None:
+        print(formatar_estatisticas(concorrencia_adaptativa.estatisticas()))
+    if disjuntor is not None and disjuntor.aberturas:
+        print(f"Disjuntor: aberto {disjuntor.aberturas} vez(es) por falhas seguidas da API.")
+    if coletor is not None:
+        print(formatar_resumo(coletor.resumo()))
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,18 @@
 # POC Correção Simples
 # Este script utiliza o Gemini para atuar como corretor de exercícios de POO em Java.
 
-import os
-import time
-from dotenv import load_dotenv
-from google import genai
+from correcao.config import SYSTEM_INSTRUCTION_CORRECAO
+from correcao.llm import generate_content_with_retry
 
-# Carrega variáveis de ambiente do arquivo .env
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-
-# Função para chamada à API Gemini
+# Função para chamada à API Gemini (cliente compartilhado e retries do pacote correcao)
 # Retorna a resposta do modelo ou None em caso de falha
 
-def generate_content_with_retry(prompt, model_name="gemini-2.5-flash", max_retries=5, base_delay=2):
-    """
-    Chama a API Gemini com exponential backoff para erros temporários.
-    Retorna a resposta do modelo ou None em caso de falha.
-    """
-    for attempt in range(max_retries):
-        try:
-            client = genai.Client(api_key=api_key)
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt
-            )
-            return response.text
-        except Exception as e:
-            print(f"Erro ao chamar Gemini (tentativa {attempt+1}):", e)
-            # Exponential backoff: espera dobra a cada tentativa
-            wait = base_delay * (2 ** attempt)
-            time.sleep(wait)
-    return None
+def corrigir(prompt):
+    try:
+        return generate_content_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO)
+    except Exception as e:
+        print("Erro ao chamar Gemini:", e)
+        return None
 
 # Enunciado do exercício (exemplo simples de Java)
 exercise_statement = (
@@ -92,40 +73,29 @@ public class ContaBancaria {
 }
 '''
 
-system_prompt = (
-    "Você é um Professor de Programação Orientada a Objetos (POO) da UFLA. "
-    "Sua função é avaliar o código Java de um aluno, considerando o enunciado. "
-    "Forneça um feedback construtivo e educativo, focado em princípios de POO (Encapsulamento, Herança, Lógica). "
-    "Sua resposta DEVE seguir EXATAMENTE esta estrutura, usando os títulos em negrito:\n"
-    "1. **Avaliação:** Certo, Errado ou Parcialmente Certo.\n"
-    "2. **Justificativa:** Explique detalhadamente a lógica e a aplicação dos princípios de POO.\n"
-    "3. **Sugestão de Correção:** Apresente sugestões para aprimoramento ou correção do código, mesmo que ele esteja 'Certo'.\n"
-    "Responda integralmente em português."
-)
-
 # Função para montar o prompt completo
+# (o system prompt vai como system instruction, não mais dentro do texto)
 
-def build_prompt(system_prompt, exercise_statement, student_code):
+def build_prompt(exercise_statement, student_code):
     return (
-        f"{system_prompt}\n\n"
         f"Enunciado do exercício:\n{exercise_statement}\n\n"
         f"Código do aluno:\n{student_code}\n"
     )
 
 # Testa o caso correto
 print("\n--- Teste: Código Correto ---")
-prompt_correct = build_prompt(system_prompt, exercise_statement, student_code_correct)
-feedback_correct = generate_content_with_retry(prompt_correct)
+prompt_correct = build_prompt(exercise_statement, student_code_correct)
+feedback_correct = corrigir(prompt_correct)
 print(feedback_correct or "Erro ao obter resposta do Gemini.")
 
 # Testa o caso com erro
 print("\n--- Teste: Código com Erro ---")
-prompt_error = build_prompt(system_prompt, exercise_statement, student_code_error)
-feedback_error = generate_content_with_retry(prompt_error)
+prompt_error = build_prompt(exercise_statement, student_code_error)
+feedback_error = corrigir(prompt_error)
 print(feedback_error or "Erro ao obter resposta do Gemini.")
 
 # Testa o caso parcial
 print("\n--- Teste: Código Parcial ---")
-prompt_partial = build_prompt(system_prompt, exercise_statement, student_code_partial)
-feedback_partial = generate_content_with_retry(prompt_partial)
+prompt_partial = build_prompt(exercise_statement, student_code_partial)
+feedback_partial = corrigir(prompt_partial)
 print(feedback_partial or "Erro ao obter resposta do Gemini.")
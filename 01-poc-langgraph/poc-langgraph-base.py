@@ -1,16 +1,8 @@
-# Carrega variáveis de ambiente do arquivo .env
-import os
-from dotenv import load_dotenv
-from google import genai
+# Obtém o client compartilhado (lê a chave da API do .env)
+from correcao.cliente import get_client
 
-load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-
-# Inicializa o client usando a chave da API do .env
 try:
-    if not api_key:
-        raise ValueError("A chave GEMINI_API_KEY não foi encontrada no arquivo .env.")
-    client = genai.Client(api_key=api_key)
+    client = get_client()
 except Exception as e:
     print("Erro ao inicializar o client Gemini:", e)
     exit(1)
@@ -1,20 +1,42 @@
-
+# POC Leitura de Arquivos (LangGraph)
+# Corrige um exercício a partir dos arquivos do enunciado e do código do aluno,
+# mostrando o feedback da LLM em streaming.
+#
+# Uso:
+#   python poc-leitura-arquivos-langgraph.py enunciado.txt Main.java Conta.java
+#   python poc-leitura-arquivos-langgraph.py   (sem arquivos: escolhe pela janela, se houver terminal e tela)
+#
+# A janela (Tkinter), o LangGraph e o SDK do Gemini só são importados quando
+# usados, então jobs não interativos (agendador, webhook do LMS) não pagam por eles.
+
+import argparse
 import os
-import time
-import random
-from dotenv import load_dotenv 
-from google import genai
-from google.genai.errors import APIError
-from typing import TypedDict
-from langgraph.graph import StateGraph, END
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Corrige um exercício a partir dos arquivos informados.")
+    parser.add_argument("enunciado", nargs="?", help="Arquivo do enunciado (.txt).")
+    parser.add_argument("codigos", nargs="*", help="Arquivos de código do aluno (.java).")
+    args = parser.parse_args()
+    if args.enunciado and not args.codigos:
+        parser.error("informe pelo menos um arquivo de código do aluno.")
+    if not args.enunciado and not modo_interativo():
+        parser.error("sem terminal ou tela para a janela de seleção; informe o enunciado e os códigos.")
+    return args
 
-# Interface gráfica para seleção dos arquivos (janela principal com campos e botões)
-import tkinter as tk
-from tkinter import filedialog, messagebox
 
+def modo_interativo():
+    """Há um usuário para a janela de seleção: terminal interativo e tela disponível."""
+    tela = os.name == "nt" or sys.platform == "darwin" or os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+    return sys.stdin.isatty() and bool(tela)
 
 
 def escolher_arquivos_via_gui():
+    # Interface gráfica para seleção dos arquivos (janela principal com campos e botões)
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     root = tk.Tk()
     root.title("Selecionar arquivos para correção")
     # Centralizar janela
@@ -92,151 +114,67 @@ def escolher_arquivos_via_gui():
         exit()
     return caminho_enunciado.get(), list(caminhos_codigos)
 
-# Seleciona os arquivos ao iniciar o script
-ENUNCIADO_FILE_PATH, CODIGOS_JAVA_PATHS = escolher_arquivos_via_gui()
-print(f"Enunciado selecionado: {ENUNCIADO_FILE_PATH}")
-print(f"Arquivos de código selecionados: {CODIGOS_JAVA_PATHS}")
-
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
-
-# --- 1. CONFIGURAÇÃO E AUTENTICAÇÃO DO GEMINI ---
-API_KEY = os.getenv("GEMINI_API_KEY")
-
-try:
-    if not API_KEY:
-        raise ValueError("Chave API não encontrada.")
-    client = genai.Client(api_key=API_KEY)
-except ValueError:
-    print("Erro: A chave API não foi carregada. Verifique o arquivo .env.")
-    exit()
-except Exception as e:
-    print(f"Erro ao inicializar o cliente Gemini: {e}")
-    exit()
-
-MODEL_NAME = "gemini-2.5-flash"
-MAX_RETRIES = 5
-SYSTEM_INSTRUCTION_CORRECAO = (
-    "Você é um Professor de Programação Orientada a Objetos (POO) da UFLA. "
-    "Sua função é avaliar o código Java de um aluno, considerando o enunciado. "
-    "Forneça um feedback construtivo e educativo, focado em princípios de POO (Encapsulamento, Herança, Lógica). "
-    "Sua resposta DEVE seguir EXATAMENTE esta estrutura, usando títulos em negrito:\n"
-    "1. **Avaliação:** Certo, Errado ou Parcialmente Certo.\n"
-    "2. **Justificativa:** Explique detalhadamente a lógica e a aplicação dos princípios de POO.\n"
-    "3. **Sugestão de Correção:** Apresente sugestões para aprimoramento ou correção do código, mesmo que ele esteja 'Certo'.\n"
-    "Responda integralmente em português."
-)
-
-# --- 2. DEFINIÇÃO DO ESTADO (STATE) DO LANGGRAPH ---
-class CorrectionState(TypedDict):
-    """Representa o estado do processo de correção."""
-    enunciado: str
-    codigo_aluno: str
-    feedback_bruto: str  # Resultado da LLM (Passo 1/Nó Básico)
-    avaliacao_status: str # Status extraído para tomada de decisão futura
-
-# --- 3. FUNÇÕES UTILITÁRIAS ---
-def read_file_content(file_path: str) -> str:
-    """Função para ler o conteúdo de um arquivo de forma segura."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        print(f"Erro: Arquivo não encontrado no caminho: {file_path}")
-        exit()
-    except Exception as e:
-        print(f"Erro ao ler o arquivo {file_path}: {e}")
-        exit()
+# --- 1. CONFIGURAÇÃO ---
+# Cliente Gemini, SYSTEM_INSTRUCTION_CORRECAO, estado e nós do grafo vêm do
+# pacote ``correcao`` (compartilhado com os demais POCs). O .env é carregado
+# na primeira chamada à LLM e o grafo é compilado uma vez por processo
+# (``obter_grafo``).
+
+# --- 2. FUNÇÕES UTILITÁRIAS ---
+# A leitura vem de ``correcao.arquivos``: detecta a codificação (UTF-8, cp1252
+# dos IDEs no Windows...) e concatena os arquivos com delimitadores para o LLM.
+
+# --- 3. EXECUÇÃO DO GRAFO ---
+def main():
+    args = parse_args()
+    from correcao.arquivos import read_and_concat_java_files, read_file_content
+    from correcao.grafo import estado_inicial, obter_grafo
+
+    if args.enunciado:
+        enunciado_path, codigos_paths = args.enunciado, args.codigos
+    else:
+        enunciado_path, codigos_paths = escolher_arquivos_via_gui()
+    print(f"Enunciado selecionado: {enunciado_path}")
+    print(f"Arquivos de código selecionados: {codigos_paths}")
 
-def generate_content_with_retry(prompt, system_instruction):
-    """Função robusta para chamar a API do Gemini com retries e backoff."""
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = client.models.generate_content(
-                model=MODEL_NAME,
-                contents=prompt,
-                config={"system_instruction": system_instruction}
-            )
-            return response.text
-        except APIError as e:
-            if "RESOURCE_EXHAUSTED" in str(e) or "429" in str(e):
-                delay = 2**attempt + random.uniform(0, 1)
-                print(f"Aviso: Taxa limite atingida. Tentando novamente em {delay:.2f} segundos...")
-                time.sleep(delay)
-            else:
-                raise e
-        except Exception as e:
-            raise e
-    raise Exception("Falha ao gerar conteúdo após múltiplas tentativas.")
-
-def format_correction_prompt(enunciado, codigo_aluno):
-    """Formata a entrada de dados para o modelo (usa o SYSTEM_INSTRUCTION global)."""
-    return (
-        f"--- ENUNCIADO DO EXERCÍCIO ---\n"
-        f"{enunciado}\n"
-        "--- CÓDIGO DO ALUNO ---\n"
-        f"```java\n{codigo_aluno}\n```\n\n"
-        "Siga a estrutura rígida definida no System Instruction."
-    )
-
-# --- 4. DEFINIÇÃO DOS NÓS DO LANGGRAPH ---
-def correction_node(state: CorrectionState) -> dict:
-    """
-    Nó de correção: Recebe o estado, executa a chamada à LLM
-    e atualiza o estado com o feedback bruto.
-    """
-    enunciado_log = state['enunciado'].split('\n')[0][:70] + '...'
-    print(f"\n--- INICIANDO CHAMADA À LLM: CORREÇÃO de '{enunciado_log}' ---")
-    enunciado = state["enunciado"]
-    codigo_aluno = state["codigo_aluno"]
-    prompt = format_correction_prompt(enunciado, codigo_aluno)
-    feedback = generate_content_with_retry(prompt, SYSTEM_INSTRUCTION_CORRECAO)
-    print("--- LLM RESPONDEU. RETORNANDO AO GRAFO. ---")
-    return {"feedback_bruto": feedback}
-def read_and_concat_java_files(file_paths):
-    """Lê múltiplos arquivos Java e concatena com delimitadores para o LLM."""
-    combined = ""
-    for path in file_paths:
-        nome = os.path.basename(path)
-        conteudo = read_file_content(path)
-        combined += f"// --- ARQUIVO INÍCIO: {nome} ---\n"
-        combined += conteudo.strip() + "\n"
-        combined += f"// --- ARQUIVO FIM: {nome} ---\n\n"
-    return combined
-
-# --- 5. EXECUÇÃO DO GRAFO ---
-if __name__ == "__main__":
     print("\n" + "=" * 80)
     print("INÍCIO DA EXECUÇÃO DO LANGGRAPH: PASSO 3 - LEITURA DE ARQUIVOS")
     print("=" * 80)
-    # 5.1. Leitura dos Arquivos
-    print(f"\n[PASSO 3] Lendo enunciado do arquivo: {ENUNCIADO_FILE_PATH}")
-    enunciado_content = read_file_content(ENUNCIADO_FILE_PATH)
-    print(f"[PASSO 3] Lendo arquivos de código do aluno: {CODIGOS_JAVA_PATHS}")
-    codigo_content = read_and_concat_java_files(CODIGOS_JAVA_PATHS)
+    # 3.1. Leitura dos Arquivos
+    try:
+        print(f"\n[PASSO 3] Lendo enunciado do arquivo: {enunciado_path}")
+        enunciado_content = read_file_content(enunciado_path)
+        print(f"[PASSO 3] Lendo arquivos de código do aluno: {codigos_paths}")
+        codigo_content = read_and_concat_java_files(codigos_paths)
+    except OSError as e:
+        sys.exit(f"Erro ao ler os arquivos: {e}")
     print("\n--- Conteúdo do Código Lido (Amostra) ---")
     print(codigo_content.strip()[:300] + '...')
     print("-" * 40)
-    # 5.2. Inicialização e Compilação do Grafo
-    workflow = StateGraph(CorrectionState)
-    workflow.add_node("correcao", correction_node)
-    workflow.set_entry_point("correcao")
-    workflow.add_edge("correcao", END)
-    app = workflow.compile()
-    # 5.3. Execução do LangGraph com o Conteúdo Lido
+    # 3.2. Inicialização e Compilação do Grafo (nó de correção em streaming)
+    app = obter_grafo(streaming=True)
+    # 3.3. Execução do LangGraph com o Conteúdo Lido
     TEST_CASE_NAME = "TESTE DE LEITURA DE ARQUIVOS"
     print(f"\nINÍCIO DA EXECUÇÃO DO GRAFO - {TEST_CASE_NAME}")
     print("-" * 80)
-    initial_state = {
-        "enunciado": enunciado_content,
-        "codigo_aluno": codigo_content,
-        "feedback_bruto": "",
-        "avaliacao_status": ""
-    }
-    final_state = app.invoke(initial_state)
-    print("\n--- RESULTADO FINAL DO GRAFO ---")
-    print(f"Feedback da LLM para {TEST_CASE_NAME}:")
-    print(final_state["feedback_bruto"])
+    initial_state = estado_inicial(enunciado_content, codigo_content)
+    print(f"\n--- FEEDBACK DA LLM PARA {TEST_CASE_NAME} (streaming) ---")
+    final_state = initial_state
+    avaliacao = ""
+    # "custom" traz os trechos conforme o modelo gera; "values" o estado ao fim de cada passo.
+    for modo, evento in app.stream(initial_state, stream_mode=["custom", "values"]):
+        if modo == "custom" and "trecho" in evento:
+            print(evento["trecho"], end="", flush=True)
+        elif modo == "custom" and "avaliacao_status" in evento:
+            avaliacao = evento["avaliacao_status"]
+        elif modo == "values":
+            final_state = evento
+    print("\n\n--- RESULTADO FINAL DO GRAFO ---")
+    print(f"Avaliação: {final_state.get('avaliacao_status') or avaliacao or 'não identificada'}")
     print("\n" + "=" * 80)
     print("FIM DA EXECUÇÃO DO LANGGRAPH: PASSO 3 CONCLUÍDO.")
     print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# POC Painel da Turma
+# Relatórios sobre o armazém de resultados (correcao/armazem.py) gravado por
+# poc-correcao-lote-langgraph.py --armazem ou pela exportação da correção
+# distribuída: distribuição de vereditos por exercício, falhas mais comuns,
+# histórico de um aluno e exportação em CSV/JSONL. Tudo sai de consultas
+# agregadas no SQLite, sem reler o texto dos feedbacks.
+#
+# Uso:
+#   python poc-painel-turma.py turma.db
+#   python poc-painel-turma.py turma.db --exercicio exercicio01 --falhas 20
+#   python poc-painel-turma.py turma.db --aluno aluno007
+#   python poc-painel-turma.py turma.db --exportar turma.csv
+#   python poc-painel-turma.py turma.db --json
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from correcao.armazem import ArmazemResultados
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Relatórios da turma a partir do armazém de resultados.")
+    parser.add_argument("armazem", help="Arquivo SQLite do armazém de resultados.")
+    parser.add_argument("--exercicio", help="Restringe os relatórios a um exercício.")
+    parser.add_argument("--execucao", help="Restringe os relatórios a uma execução.")
+    parser.add_argument("--falhas", type=int, default=10, help="Quantas categorias de falha listar (padrão: 10).")
+    parser.add_argument("--aluno", help="Mostra o histórico de correções de um aluno.")
+    parser.add_argument("--exportar", metavar="ARQUIVO",
+                        help="Exporta a correção mais recente de cada submissão (.csv ou .jsonl).")
+    parser.add_argument("--json", action="store_true", help="Imprime os relatórios em JSON.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.isfile(args.armazem):
+        sys.exit(f"Armazém não encontrado: {args.armazem}")
+    armazem = ArmazemResultados(args.armazem)
+    try:
+        inicio = time.perf_counter()
+        if args.exportar:
+            n = armazem.exportar(args.exportar, execucao=args.execucao)
+            print(f"{n} correção(ões) exportada(s) para {args.exportar} em {time.perf_counter() - inicio:.3f}s.")
+            return
+        if args.aluno:
+            painel = {"historico": armazem.historico_aluno(args.aluno, args.exercicio)}
+        else:
+            painel = {
+                "exercicios": armazem.resumo_exercicios(args.execucao),
+                "vereditos": armazem.distribuicao_vereditos(args.exercicio, args.execucao),
+                "falhas": armazem.falhas_frequentes(args.exercicio, args.execucao, args.falhas),
+            }
+        duracao = time.perf_counter() - inicio
+    finally:
+        armazem.close()
+
+    if args.json:
+        print(json.dumps(painel, ensure_ascii=False, indent=2))
+        return
+
+    print("\n" + "=" * 80)
+    if args.aluno:
+        print(f"HISTÓRICO DE {args.aluno}")
+        print("=" * 80)
+        for c in painel["historico"]:
+            quando = time.strftime("%Y-%m-%d %H:%M", time.localtime(c["criado_em"]))
+            nota = "" if c["nota"] is None else f" nota {c['nota']:.1f}"
+            falhas = f" [{', '.join(c['categorias'])}]" if c["categorias"] else ""
+            print(f"{quando}  {c['exercicio']:<20} {c['veredito']:<20}{nota}{falhas}")
+        if not painel["historico"]:
+            print("Nenhuma correção encontrada.")
+    else:
+        print("PAINEL DA TURMA")
+        print("=" * 80)
+        print(f"{'exercício':<24} {'subm.':>6} {'certas':>6} {'erros':>5} {'nota':>5} "
+              f"{'tokens':>10} {'custo US$':>10} {'lat. (s)':>8}")
+        for e in painel["exercicios"]:
+            nota = "-" if e["nota_media"] is None else f"{e['nota_media']:.1f}"
+            print(f"{e['exercicio']:<24} {e['submissoes']:>6} {e['certas']:>6} {e['erros']:>5} {nota:>5} "
+                  f"{e['tokens_entrada'] + e['tokens_saida']:>10} {e['custo_usd']:>10.4f} "
+                  f"{e['duracao_media_s']:>8.2f}")
+        print("\nVereditos por exercício:")
+        for exercicio, contagem in painel["vereditos"].items():
+            total = sum(contagem.values())
+            partes = ", ".join(f"{v} {n} ({n / total:.0%})" for v, n in contagem.items())
+            print(f"  {exercicio}: {partes}")
+        print("\nFalhas mais comuns:")
+        for f in painel["falhas"]:
+            print(f"  {f['categoria']:<40} {f['n']:>6} ({f['fracao']:.0%} das submissões)")
+        if not painel["falhas"]:
+            print("  Nenhuma.")
+    print("=" * 80)
+    print(f"Consultas em {duracao * 1000:.1f} ms.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# POC Serviço de Correção (LangGraph)
+# Mantém um processo residente com o grafo de correção já compilado (o mesmo
+# nó correcao de poc-correcao-simples-langgraph.py, em streaming), o cliente
+# Gemini e os caches aquecidos, atendendo pedidos por HTTP local ou socket
+# Unix (ver correcao/servico.py): fila limitada com 503 + Retry-After quando
+# cheia, pedidos idênticos em andamento unidos numa só chamada à LLM e
+# resultado por consulta (polling) ou stream SSE.
+#
+# Uso:
+#   python poc-servico-correcao.py --porta 8090 --concorrencia 16 --max-fila 500
+#   python poc-servico-correcao.py --socket /tmp/correcao.sock --cache cache_respostas.db
+#   python poc-servico-correcao.py --concorrencia 4 --concorrencia-adaptativa 64
+#
+#   curl -X POST localhost:8090/correcoes?esperar=60 \
+#        -d '{"enunciado": "Implemente ContaBancaria...", "codigo_aluno": "public class ContaBancaria {...}"}'
+#   curl localhost:8090/correcoes/<id>?esperar=30
+#   curl -N localhost:8090/correcoes/<id>/eventos
+#   curl localhost:8090/saude
+
+import argparse
+import signal
+import threading
+import time
+
+from correcao.cache import configurar_cache
+from correcao.cliente import get_client
+from correcao.concorrencia import configurar_concorrencia, formatar_estatisticas
+from correcao.config import MAX_RETRIES
+from correcao.grafo import obter_grafo
+from correcao.limite_taxa import configurar_limitador
+from correcao.metricas import configurar_metricas, formatar_resumo
+from correcao.retentativas import configurar_retentativas
+from correcao.servico import ServicoCorrecao, ServidorCorrecao
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serviço residente de correção com fila limitada.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço HTTP (padrão: 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=8090, help="Porta HTTP (padrão: 8090).")
+    parser.add_argument("--socket", metavar="CAMINHO", help="Atende num socket Unix em vez de TCP.")
+    parser.add_argument("--concorrencia", type=int, default=8,
+                        help="Máximo de correções em andamento ao mesmo tempo (padrão: 8).")
+    parser.add_argument("--concorrencia-adaptativa", type=int, nargs="?", const=64, metavar="MAX",
+                        help="Ajusta as correções em andamento entre 1 e MAX (padrão: 64), começando em "
+                             "--concorrencia: cresce enquanto a latência da LLM fica estável e cai rápido "
+                             "com 429 ou latência em alta (o limite atual aparece em /saude).")
+    parser.add_argument("--max-fila", type=int, default=200,
+                        help="Máximo de correções esperando; acima disso, responde 503 (padrão: 200).")
+    parser.add_argument("--retencao", type=float, default=900.0,
+                        help="Segundos que um resultado fica disponível para consulta (padrão: 900).")
+    parser.add_argument("--pre-analise", action="store_true",
+                        help="Executa a análise estática antes da LLM (com as regras enviadas no pedido).")
+    parser.add_argument("--cache", help="Arquivo SQLite do cache de respostas (reaproveita correções idênticas).")
+    parser.add_argument("--rpm", type=int, help="Cota de requisições por minuto (ativa o limitador de taxa).")
+    parser.add_argument("--tpm", type=int, default=1_000_000,
+                        help="Cota de tokens por minuto usada junto com --rpm (padrão: 1000000).")
+    parser.add_argument("--limite-arquivo",
+                        help="Arquivo SQLite para compartilhar o limitador com outros processos.")
+    parser.add_argument("--prazo-submissao", type=float, metavar="SEGUNDOS",
+                        help="Prazo de cada correção para as chamadas à LLM, incluindo retentativas.")
+    parser.add_argument("--max-tentativas", type=int, default=MAX_RETRIES,
+                        help=f"Tentativas por chamada à LLM em falhas transitórias (padrão: {MAX_RETRIES}).")
+    parser.add_argument("--timeout-chamada", type=float, default=120.0,
+                        help="Timeout de cada tentativa de chamada à LLM, em segundos (padrão: 120).")
+    parser.add_argument("--metricas", nargs="?", const="", metavar="ARQUIVO",
+                        help="Mede latência, tokens e custo e mostra o resumo ao encerrar; "
+                             "com ARQUIVO, grava também um log JSON.")
+    parser.add_argument("--metricas-janela", type=int, default=100_000, metavar="SPANS",
+                        help="Spans mais recentes guardados para as distribuições do resumo; os totais "
+                             "de tokens e custo contam desde o início (padrão: 100000).")
+    parser.add_argument("--encerramento", type=float, default=60.0,
+                        help="Segundos para terminar as correções em andamento ao encerrar (padrão: 60).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cache:
+        configurar_cache(args.cache)
+    if args.rpm:
+        configurar_limitador(args.rpm, args.tpm, caminho=args.limite_arquivo)
+    configurar_retentativas(args.max_tentativas, timeout_s=args.timeout_chamada)
+    limitador = None
+    if args.concorrencia_adaptativa:
+        limitador = configurar_concorrencia(args.concorrencia, maximo=args.concorrencia_adaptativa)
+    coletor = None
+    if args.metricas is not None:
+        # O serviço não termina entre lotes: sem limite, os spans guardados cresceriam para sempre.
+        coletor = configurar_metricas(args.metricas or None, max_spans=args.metricas_janela)
+
+    # Aquecimento: o .env, o cliente (pool de conexões) e o grafo ficam prontos antes do primeiro pedido.
+    inicio = time.perf_counter()
+    get_client()
+    app = obter_grafo(streaming=True, pre_analise=args.pre_analise)
+    print(f"Grafo e cliente prontos em {time.perf_counter() - inicio:.2f}s.")
+
+    servico = ServicoCorrecao(app, max_fila=args.max_fila, concorrencia=args.concorrencia,
+                              prazo_s=args.prazo_submissao, retencao_s=args.retencao,
+                              limitador=limitador).iniciar()
+    servidor = ServidorCorrecao(servico, args.host, args.porta, args.socket)
+    # shutdown() bloqueia até serve_forever voltar, então precisa vir de outra thread.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.parar, daemon=True).start())
+    concorrencia = (f"concorrência adaptativa {args.concorrencia}-{args.concorrencia_adaptativa}"
+                    if limitador is not None else f"concorrência {args.concorrencia}")
+    print(f"Serviço de correção em {servidor.endereco} ({concorrencia}, "
+          f"fila até {args.max_fila}). Ctrl+C encerra.", flush=True)
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Encerrando: esperando até {args.encerramento:.0f}s pelas correções pendentes...", flush=True)
+        servico.encerrar(args.encerramento)
+        estatisticas = servico.estatisticas()
+        print(f"{estatisticas['recebidos']} pedido(s): {estatisticas['concluidos']} corrigido(s), "
+              f"{estatisticas['erros']} com erro, {estatisticas['coalescidos']} unido(s) a um idêntico, "
+              f"{estatisticas['recusados']} recusado(s) por fila cheia.")
+        if limitador is not None:
+            print(formatar_estatisticas(limitador.estatisticas()))
+        if coletor is not None:
+            coletor.fechar()
+            print(formatar_resumo(coletor.resumo()))
+
+
+if __name__ == "__main__":
+    main()
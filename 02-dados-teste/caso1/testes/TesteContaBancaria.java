@@ -0,0 +1,28 @@
+public class TesteContaBancaria {
+
+    public void testSaldoInicialZero() {
+        ContaBancaria conta = new ContaBancaria();
+        Verificacao.assertEquals(0.0, conta.getSaldo(), 1e-9, "Uma conta nova deve começar com saldo zero");
+    }
+
+    public void testDepositarAcumula() {
+        ContaBancaria conta = new ContaBancaria();
+        conta.depositar(100.0);
+        conta.depositar(50.0);
+        Verificacao.assertEquals(150.0, conta.getSaldo(), 1e-9, "Depósitos sucessivos devem somar ao saldo");
+    }
+
+    public void testSacarComSaldo() {
+        ContaBancaria conta = new ContaBancaria();
+        conta.depositar(100.0);
+        conta.sacar(30.0);
+        Verificacao.assertEquals(70.0, conta.getSaldo(), 1e-9, "Saque com saldo suficiente deve subtrair o valor");
+    }
+
+    public void testSacarSemSaldoNaoAltera() {
+        ContaBancaria conta = new ContaBancaria();
+        conta.depositar(20.0);
+        conta.sacar(50.0);
+        Verificacao.assertEquals(20.0, conta.getSaldo(), 1e-9, "Saque sem saldo suficiente não deve alterar o saldo");
+    }
+}